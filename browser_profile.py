@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+交易页面渲染开销优化
+拦截图片/字体/统计脚本等机器人用不到的资源，并注入 CSS 隐藏 K 线图等重型组件，
+附带对比开启前后每个页面 CPU/内存和报价刷新间隔的基准测试
+"""
+
+import asyncio
+import json
+import time
+import weakref
+from typing import Dict, Iterable, Optional, Tuple
+
+from playwright.async_api import BrowserContext, Page, Route
+
+
+DEFAULT_BLOCKED_RESOURCE_TYPES = ("image", "font", "media")
+
+DEFAULT_BLOCKED_URL_PATTERNS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "sentry.io",
+    "segment.io",
+    "segment.com",
+    "mixpanel.com",
+    "amplitude.com",
+    "hotjar.com",
+    "intercom.io",
+    "intercomcdn.com",
+    "datadoghq.com",
+    "browser-intake",
+)
+
+# 机器人不读取的重型组件（K 线图等）
+DEFAULT_HIDDEN_SELECTORS = (
+    'iframe[id^="tradingview_"]',
+    'iframe[src*="tradingview"]',
+    'iframe[src*="charting_library"]',
+    '[data-sentry-component*="Chart"]',
+    '[aria-label="Chart"]',
+    '[class*="TradingView"]',
+)
+
+# 阻止 Chromium 对后台/被遮挡标签页的定时器和渲染降频
+ANTI_THROTTLING_ARGS = (
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--disable-features=IntensiveWakeUpThrottling,CalculateNativeWinOcclusion',
+)
+
+# 订单簿选择器，基准测试用来测量报价刷新间隔
+QUOTE_SELECTORS = {
+    "grvt": ".txt-feature-green",
+    "paradex": '[aria-label*="Bid @"]',
+}
+
+_UPDATE_PROBE_SCRIPT = '''
+(selector) => {
+    const target = document.querySelector(selector);
+    const root = target ? (target.closest('[role="grid"]') || target.parentElement.parentElement || target) : document.body;
+    window.__quoteUpdates = [];
+    if (window.__quoteObserver) window.__quoteObserver.disconnect();
+    window.__quoteObserver = new MutationObserver(() => {
+        window.__quoteUpdates.push(performance.now());
+        if (window.__quoteUpdates.length > 5000) window.__quoteUpdates.shift();
+    });
+    window.__quoteObserver.observe(root, { subtree: true, childList: true, characterData: true });
+    return !!target;
+}
+'''
+
+_READ_UPDATES_SCRIPT = '''
+() => {
+    const updates = window.__quoteUpdates || [];
+    window.__quoteUpdates = [];
+    return updates;
+}
+'''
+
+
+class RenderProfile:
+    """交易页面的资源拦截与重型组件隐藏配置"""
+
+    def __init__(
+            self,
+            blocked_resource_types: Iterable[str] = DEFAULT_BLOCKED_RESOURCE_TYPES,
+            blocked_url_patterns: Iterable[str] = DEFAULT_BLOCKED_URL_PATTERNS,
+            hidden_selectors: Iterable[str] = DEFAULT_HIDDEN_SELECTORS,
+            block_chart_scripts: bool = False,
+    ):
+        """
+        Args:
+            blocked_resource_types: 直接拦截的资源类型
+            blocked_url_patterns: URL 包含这些片段的请求会被拦截
+            hidden_selectors: 注入 CSS 隐藏的元素
+            block_chart_scripts: 是否连同 TradingView 图表脚本一起拦截
+                                 （更省资源，但部分页面可能因此报错，默认关闭）
+        """
+        self.blocked_resource_types = set(blocked_resource_types)
+        self.blocked_url_patterns = tuple(blocked_url_patterns)
+        if block_chart_scripts:
+            self.blocked_url_patterns += ("charting_library", "tradingview")
+        self.hidden_selectors = tuple(hidden_selectors)
+
+        self.blocked_count = 0
+        # 已启用本配置的页面：复用或重新连接时不重复注册路由和注入脚本
+        self._applied_pages: "weakref.WeakSet[Page]" = weakref.WeakSet()
+
+    @property
+    def css(self) -> str:
+        if not self.hidden_selectors:
+            return ""
+        return ",\n".join(self.hidden_selectors) + " { display: none !important; }"
+
+    async def _handle_route(self, route: Route):
+        request = route.request
+        if request.resource_type in self.blocked_resource_types or \
+                any(pattern in request.url for pattern in self.blocked_url_patterns):
+            self.blocked_count += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def apply(self, page: Page):
+        """
+        在导航前为页面启用资源拦截和 CSS 注入（已加载的页面也会立即注入样式）；
+        同一页面只启用一次，页面中已有本配置注入的样式时不再重复注入
+        """
+        if page in self._applied_pages:
+            return
+        self._applied_pages.add(page)
+        await page.route("**/*", self._handle_route)
+
+        css = self.css
+        if css:
+            await page.add_init_script(self._inject_script(css))
+            if page.url and page.url != "about:blank":
+                await page.evaluate('''(css) => {
+                    if (document.querySelector('style[data-render-profile]')) return;
+                    const style = document.createElement('style');
+                    style.setAttribute('data-render-profile', '1');
+                    style.textContent = css;
+                    (document.head || document.documentElement).appendChild(style);
+                }''', css)
+
+    @staticmethod
+    def _inject_script(css: str) -> str:
+        """注入隐藏样式的脚本（页面中已有 data-render-profile 样式时跳过）"""
+        return f'''
+                (() => {{
+                    const inject = () => {{
+                        if (document.querySelector('style[data-render-profile]')) return;
+                        const style = document.createElement('style');
+                        style.setAttribute('data-render-profile', '1');
+                        style.textContent = {json.dumps(css)};
+                        (document.head || document.documentElement).appendChild(style);
+                    }};
+                    if (document.readyState === 'loading') {{
+                        document.addEventListener('DOMContentLoaded', inject);
+                    }} else {{
+                        inject();
+                    }}
+                }})();
+            '''
+
+
+_open_window_lock = asyncio.Lock()
+
+
+async def open_window(context: BrowserContext) -> Page:
+    """
+    在独立窗口中打开一个新页面，使其始终处于前台、不被当作后台标签页降频
+    （通过 CDP Target.createTarget，失败时退回普通标签页）
+    """
+    if not context.pages:
+        return await context.new_page()
+
+    cdp = await context.new_cdp_session(context.pages[0])
+    try:
+        # 串行创建，避免并发时两个调用等到同一个新页面
+        async with _open_window_lock:
+            async with context.expect_page() as page_info:
+                await cdp.send("Target.createTarget", {"url": "about:blank", "newWindow": True})
+            return await page_info.value
+    except Exception as e:
+        print(f"⚠️ 打开独立窗口失败，改用标签页: {e}")
+        return await context.new_page()
+    finally:
+        await cdp.detach()
+
+
+# ==================== 页面性能测量 ====================
+
+async def install_update_probe(page: Page, selector: str) -> bool:
+    """在页面中安装 MutationObserver，记录报价区域每次 DOM 更新的时间"""
+    return await page.evaluate(_UPDATE_PROBE_SCRIPT, selector)
+
+
+async def read_update_stats(page: Page) -> Dict[str, float]:
+    """
+    读取并清空安装探针以来的 DOM 更新记录
+
+    Returns:
+        dict: {updates, mean_interval_ms, p50_interval_ms, p95_interval_ms, max_interval_ms}
+    """
+    updates = await page.evaluate(_READ_UPDATES_SCRIPT)
+    intervals = sorted(b - a for a, b in zip(updates, updates[1:]))
+    if not intervals:
+        return {'updates': len(updates), 'mean_interval_ms': 0.0, 'p50_interval_ms': 0.0,
+                'p95_interval_ms': 0.0, 'max_interval_ms': 0.0}
+    return {
+        'updates': len(updates),
+        'mean_interval_ms': sum(intervals) / len(intervals),
+        'p50_interval_ms': intervals[len(intervals) // 2],
+        'p95_interval_ms': intervals[min(len(intervals) - 1, int(len(intervals) * 0.95))],
+        'max_interval_ms': intervals[-1],
+    }
+
+
+async def measure_page(page: Page, selector: str, duration: float = 30) -> Dict[str, float]:
+    """
+    测量页面在 duration 秒内的 CPU 占用、JS 堆内存、DOM 节点数和报价刷新间隔
+
+    Returns:
+        dict: 测量结果
+    """
+    cdp = await page.context.new_cdp_session(page)
+    await cdp.send("Performance.enable")
+
+    def metrics_of(result):
+        return {item['name']: item['value'] for item in result['metrics']}
+
+    await install_update_probe(page, selector)
+    start_metrics = metrics_of(await cdp.send("Performance.getMetrics"))
+    start = time.perf_counter()
+
+    await asyncio.sleep(duration)
+
+    end_metrics = metrics_of(await cdp.send("Performance.getMetrics"))
+    elapsed = time.perf_counter() - start
+    update_stats = await read_update_stats(page)
+    await cdp.detach()
+
+    task_seconds = end_metrics.get('TaskDuration', 0) - start_metrics.get('TaskDuration', 0)
+    result = {
+        'cpu_percent': task_seconds / elapsed * 100,
+        'js_heap_mb': end_metrics.get('JSHeapUsedSize', 0) / 1024 / 1024,
+        'dom_nodes': end_metrics.get('Nodes', 0),
+    }
+    result.update(update_stats)
+    return result
+
+
+async def compare_update_cadence(pages: Dict[str, Tuple[Page, str]], duration: float = 30) -> Dict[str, Dict[str, float]]:
+    """
+    同时测量多个页面的报价 DOM 刷新间隔，用来发现被后台降频的页面
+
+    Args:
+        pages: {名称: (页面, 报价选择器)}
+        duration: 测量时长（秒）
+
+    Returns:
+        dict: {名称: read_update_stats 的结果}
+    """
+    await asyncio.gather(*(install_update_probe(page, selector) for page, selector in pages.values()))
+    await asyncio.sleep(duration)
+    stats = await asyncio.gather(*(read_update_stats(page) for page, _ in pages.values()))
+    results = dict(zip(pages, stats))
+
+    print(f"\n📊 报价刷新间隔（{duration:.0f} 秒）")
+    print(f"  {'页面':<20}{'更新次数':>10}{'平均 (ms)':>12}{'P95 (ms)':>12}{'最大 (ms)':>12}")
+    for name, result in results.items():
+        print(f"  {name:<20}{result['updates']:>10}{result['mean_interval_ms']:>12.0f}"
+              f"{result['p95_interval_ms']:>12.0f}{result['max_interval_ms']:>12.0f}")
+
+    return results
+
+
+async def benchmark_render_profile(context, url: str, selector: str, duration: float = 30,
+                                   profile: Optional[RenderProfile] = None) -> Dict[str, Dict[str, float]]:
+    """
+    对同一个交易页面分别在不启用/启用渲染优化时测量，并打印对比
+
+    Args:
+        context: 浏览器上下文
+        url: 交易页面地址
+        selector: 订单簿报价选择器（见 QUOTE_SELECTORS）
+        duration: 每种配置的测量时长（秒）
+        profile: 渲染优化配置，None 时使用默认配置
+
+    Returns:
+        dict: {"baseline": 结果, "profile": 结果}
+    """
+    profile = profile or RenderProfile()
+    results = {}
+
+    for name in ("baseline", "profile"):
+        page = await context.new_page()
+        try:
+            if name == "profile":
+                await profile.apply(page)
+            await page.goto(url)
+            await page.wait_for_selector(selector, state="visible", timeout=60000)
+            await asyncio.sleep(3)
+            results[name] = await measure_page(page, selector, duration)
+        finally:
+            await page.close()
+
+    print("\n" + "=" * 60)
+    print(f"📊 渲染优化基准: {url}（每项 {duration:.0f} 秒）")
+    print("=" * 60)
+    print(f"  {'指标':<18}{'未优化':>12}{'优化后':>12}")
+    for key, label in (('cpu_percent', 'CPU (%)'), ('js_heap_mb', 'JS 堆 (MB)'), ('dom_nodes', 'DOM 节点'),
+                       ('updates', '报价更新次数'), ('mean_interval_ms', '平均间隔 (ms)'),
+                       ('p95_interval_ms', 'P95 间隔 (ms)')):
+        print(f"  {label:<18}{results['baseline'][key]:>12.1f}{results['profile'][key]:>12.1f}")
+    print(f"  拦截请求数: {profile.blocked_count}")
+    print("=" * 60 + "\n")
+
+    return results
+
+
+async def _run_benchmark(duration: float):
+    import tempfile
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as playwright:
+        with tempfile.TemporaryDirectory() as user_data_dir:
+            context = await playwright.chromium.launch_persistent_context(user_data_dir, headless=False)
+            try:
+                await benchmark_render_profile(context, "https://grvt.io/exchange/perpetual/BTC-USDT",
+                                               QUOTE_SELECTORS["grvt"], duration)
+                await benchmark_render_profile(context, "https://app.paradex.trade/trade/BTC-USD-PERP",
+                                               QUOTE_SELECTORS["paradex"], duration)
+            finally:
+                await context.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    asyncio.run(_run_benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 30))
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+对冲净收益模型
+把 GRVT 与 Paradex 的原始价差换算成一个周期的预期净盈亏：
+扣除两边开平仓手续费（GRVT post-only 挂单 / Paradex 市价吃单）、
+按订单簿深度估算的 Paradex 滑点，以及预期持仓期间两边的资金费
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+Level = Tuple[float, float]
+
+
+class EdgeModel:
+    """价差 -> 预期净盈亏，每个 tick 计算一次（只遍历几档深度）"""
+
+    def __init__(
+            self,
+            grvt_fee_rate: float = 0.0,
+            paradex_fee_rate: float = 0.0003,
+            grvt_funding_rate: float = 0.0,
+            paradex_funding_rate: float = 0.0,
+            expected_hold_seconds: float = 900,
+            min_net_edge: float = 0.0,
+    ):
+        """
+        Args:
+            grvt_fee_rate: GRVT 挂单手续费率（负数表示返佣）
+            paradex_fee_rate: Paradex 吃单手续费率
+            grvt_funding_rate / paradex_funding_rate: 每小时资金费率（正数表示多头付给空头）
+            expected_hold_seconds: 预期持仓时间（秒）
+            min_net_edge: 开仓要求的最小预期净盈亏（美元）
+        """
+        self.grvt_fee_rate = grvt_fee_rate
+        self.paradex_fee_rate = paradex_fee_rate
+        self.grvt_funding_rate = grvt_funding_rate
+        self.paradex_funding_rate = paradex_funding_rate
+        self.expected_hold_seconds = expected_hold_seconds
+        self.min_net_edge = min_net_edge
+
+    def update_funding(self, grvt_rate: Optional[float] = None, paradex_rate: Optional[float] = None):
+        """更新每小时资金费率"""
+        if grvt_rate is not None:
+            self.grvt_funding_rate = grvt_rate
+        if paradex_rate is not None:
+            self.paradex_funding_rate = paradex_rate
+
+    @staticmethod
+    def market_slippage(levels: List[Level], size: float, reference: float) -> Optional[float]:
+        """
+        市价单吃掉 size 数量相对参考价的滑点（美元，总额，恒为非负）
+
+        Args:
+            levels: 对手盘深度 [(价格, 数量)]，按从优到劣排序
+            size: 下单数量
+            reference: 参考价（中间价）
+
+        Returns:
+            float: 滑点成本，深度不足以成交 size 时返回 None
+        """
+        remaining = size
+        cost = 0.0
+        for price, quantity in levels:
+            take = min(remaining, quantity)
+            cost += take * abs(price - reference)
+            remaining -= take
+            if remaining <= 1e-12:
+                return cost
+        return None
+
+    def evaluate(
+            self,
+            price_diff: float,
+            grvt_price: float,
+            paradex_price: float,
+            size: float,
+            paradex_depth: Optional[Tuple[List[Level], List[Level]]] = None,
+            exit_spread: float = 0.0,
+    ) -> Dict[str, Optional[float]]:
+        """
+        估算按当前价差开一个对冲周期的预期净盈亏
+
+        Args:
+            price_diff: 价差（GRVT - Paradex，中间价）
+            grvt_price / paradex_price: 两边中间价
+            size: 每条腿的数量
+            paradex_depth: Paradex 订单簿 (bids, asks)，None 时不计滑点
+            exit_spread: 预期平仓时剩余的价差（绝对值，与 price_diff 同单位，例如自适应阈值的价差带外沿）
+
+        Returns:
+            dict: {gross, fees, slippage, funding, net}，深度不足时 slippage 和 net 为 None
+        """
+        # 价差 > 0：GRVT 空 + Paradex 多（Paradex 吃卖盘开仓、吃买盘平仓），反之亦然
+        grvt_short = price_diff > 0
+        gross = (abs(price_diff) - abs(exit_spread)) * size
+
+        grvt_notional = grvt_price * size
+        paradex_notional = paradex_price * size
+        fees = 2 * grvt_notional * self.grvt_fee_rate + 2 * paradex_notional * self.paradex_fee_rate
+
+        slippage = 0.0
+        if paradex_depth is not None:
+            bids, asks = paradex_depth
+            open_side, close_side = (asks, bids) if grvt_short else (bids, asks)
+            open_cost = self.market_slippage(open_side, size, paradex_price)
+            close_cost = self.market_slippage(close_side, size, paradex_price)
+            if open_cost is None or close_cost is None:
+                return {'gross': gross, 'fees': fees, 'slippage': None, 'funding': None, 'net': None}
+            slippage = open_cost + close_cost
+
+        # 多头付资金费、空头收取：GRVT 空时收 GRVT 资金费、付 Paradex 资金费
+        hours = self.expected_hold_seconds / 3600
+        rate_diff = self.grvt_funding_rate - self.paradex_funding_rate
+        funding = (1 if grvt_short else -1) * rate_diff * (grvt_notional + paradex_notional) / 2 * hours
+
+        return {
+            'gross': gross,
+            'fees': fees,
+            'slippage': slippage,
+            'funding': funding,
+            'net': gross - fees - slippage + funding,
+        }
+
+    def is_worth_it(self, edge: Dict[str, Optional[float]]) -> bool:
+        """预期净盈亏是否达到 min_net_edge"""
+        return edge['net'] is not None and edge['net'] >= self.min_net_edge
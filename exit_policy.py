@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+对冲周期平仓策略
+每个价差样本上判断持仓是否应该平仓：价差向公允价差收敛到目标比例、组合盈亏从峰值回撤（移动止盈），
+或达到最长持仓时间；持仓越久要求的收敛比例越低（时间衰减），收益兑现后立即释放资金
+"""
+
+import time
+from typing import Dict, Optional
+
+CONVERGED = "converged"
+TRAILING_STOP = "trailing_stop"
+MAX_HOLD = "max_hold"
+
+EXIT_REASONS = {
+    CONVERGED: "价差已收敛",
+    TRAILING_STOP: "移动止盈",
+    MAX_HOLD: "达到最长持仓时间",
+}
+
+
+class ExitPolicy:
+    """
+    平仓策略参数；每个持仓周期的状态由 open 返回，evaluate 逐个样本更新
+
+    收敛比例 = 已回归的价差 / (开仓价差 - 公允价差)，公允价差默认为 0（统计就绪后可传入 EWMA 均值）。
+    持仓 decay_start 秒内要求 target_ratio，之后线性降到 max_hold 时的 min_ratio
+    """
+
+    def __init__(
+            self,
+            target_ratio: float = 0.8,
+            min_ratio: float = 0.2,
+            decay_start: float = 120,
+            max_hold: float = 1200,
+            trail_activate: Optional[float] = None,
+            trail_giveback: float = 0.5,
+    ):
+        """
+        Args:
+            target_ratio: 初始要求的收敛比例
+            min_ratio: 到达 max_hold 时要求的收敛比例
+            decay_start: 开始时间衰减前的持仓时间（秒）
+            max_hold: 最长持仓时间（秒），到期无论价差如何都平仓
+            trail_activate: 组合盈亏（美元，已扣除开仓时估算的成本）达到该值后启动移动止盈，None 表示不启用
+            trail_giveback: 移动止盈允许从峰值回撤的盈亏（美元）
+        """
+        self.target_ratio = target_ratio
+        self.min_ratio = min_ratio
+        self.decay_start = decay_start
+        self.max_hold = max_hold
+        self.trail_activate = trail_activate
+        self.trail_giveback = trail_giveback
+
+    def open(self, entry_spread: float, size: float, fair: float = 0.0,
+             cost: float = 0.0, opened_at: Optional[float] = None) -> Dict:
+        """
+        开仓后创建一个周期的状态
+
+        Args:
+            entry_spread: 开仓价差（GRVT - Paradex）
+            size: 每条腿的数量
+            fair: 收敛目标（公允价差）
+            cost: 估算的开平仓总成本（手续费 + 滑点，美元），从组合盈亏中扣除
+            opened_at: 开仓时间戳，None 时取当前时间
+        """
+        # 价差 > 0 时 GRVT 空 + Paradex 多，价差下降获利；反之价差上升获利
+        sign = 1 if entry_spread > 0 else -1
+        move = sign * (entry_spread - fair)
+        if move <= 0:
+            # 开仓价差没有偏离公允价差（统计滞后），退回以 0 为目标
+            move = abs(entry_spread)
+        return {
+            'entry_spread': entry_spread,
+            'size': size,
+            'sign': sign,
+            'move': move,
+            'cost': cost,
+            'opened_at': time.time() if opened_at is None else opened_at,
+            'pnl': -cost,
+            'peak_pnl': None,
+        }
+
+    def required_ratio(self, elapsed: float) -> float:
+        """持仓 elapsed 秒时要求的收敛比例"""
+        if elapsed <= self.decay_start or self.max_hold <= self.decay_start:
+            return self.target_ratio
+        progress = min(1.0, (elapsed - self.decay_start) / (self.max_hold - self.decay_start))
+        return self.target_ratio + (self.min_ratio - self.target_ratio) * progress
+
+    def evaluate(self, state: Dict, price_diff: float, now: Optional[float] = None) -> Optional[str]:
+        """
+        用最新价差更新周期状态并判断是否平仓
+
+        Args:
+            state: open 返回的周期状态
+            price_diff: 最新价差（GRVT - Paradex）
+            now: 样本时间戳，None 时取当前时间
+
+        Returns:
+            str: 平仓原因（CONVERGED / TRAILING_STOP / MAX_HOLD），继续持有返回 None
+        """
+        now = time.time() if now is None else now
+        elapsed = now - state['opened_at']
+
+        captured = state['sign'] * (state['entry_spread'] - price_diff)
+        state['pnl'] = captured * state['size'] - state['cost']
+        state['ratio'] = captured / state['move'] if state['move'] else 0.0
+
+        if self.trail_activate is not None:
+            if state['peak_pnl'] is None:
+                if state['pnl'] >= self.trail_activate:
+                    state['peak_pnl'] = state['pnl']
+            else:
+                state['peak_pnl'] = max(state['peak_pnl'], state['pnl'])
+                if state['pnl'] <= state['peak_pnl'] - self.trail_giveback:
+                    return TRAILING_STOP
+
+        if state['ratio'] >= self.required_ratio(elapsed):
+            return CONVERGED
+
+        if elapsed >= self.max_hold:
+            return MAX_HOLD
+
+        return None
+
+    def describe(self, state: Dict, now: Optional[float] = None) -> str:
+        """周期状态的简短描述，用于日志"""
+        now = time.time() if now is None else now
+        elapsed = now - state['opened_at']
+        text = (f"收敛 {state.get('ratio', 0.0):.0%}/{self.required_ratio(elapsed):.0%}，"
+                f"盈亏 ${state['pnl']:+.4f}，已持仓 {elapsed:.0f}/{self.max_hold:.0f} 秒")
+        if state['peak_pnl'] is not None:
+            text += f"，峰值 ${state['peak_pnl']:+.4f}"
+        return text
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+GRVT post-only 挂单成交估算模型
+按记录的盘口快照（以及有成交记录时的逐笔成交）回放，估算在某个价格挂单、max_wait 秒内成交的比例和等待时间：
+卖单在买一涨到挂单价时视为成交（对手方已吃穿该价位），买单在卖一跌到挂单价时视为成交；
+通过 record_trade 提供逐笔成交时，成交价达到或穿过挂单价也视为成交。
+只有盘口快照时，这只是“盘口是否吃穿该价位”的近似（看不到在该价位直接吃单的成交，也不考虑排队位置），
+不是真实的成交概率；再用机器人自己挂单的实际结果（成交/超时）按挂单位置分桶校准，用于选择挂单价格和等待时间
+"""
+
+import bisect
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+class FillModel:
+    """
+    挂单位置用相对中间价的偏移 offset 表示（正数为比中间价更保守，即卖单更高、买单更低），
+    对每个候选偏移估算成交概率与成交时间分布，选择满足目标成交概率的最保守价格
+    """
+
+    def __init__(
+            self,
+            window: float = 1800,
+            max_starts: int = 200,
+            min_samples: int = 60,
+            candidates: Tuple[float, ...] = (-0.8, -0.5, 0.0, 0.5, 1.0),
+            target_prob: float = 0.7,
+            wait_quantile: float = 0.9,
+            min_wait: float = 5,
+            max_wait: float = 30,
+            bucket: float = 0.25,
+            prior_weight: float = 10,
+    ):
+        """
+        Args:
+            window: 保留的盘口历史（秒）
+            max_starts: 估算时最多使用的起点数（均匀抽样，控制计算量）
+            min_samples: 盘口样本少于该值时不给出建议
+            candidates: 候选挂单偏移，单位为半个价差（-1 为对手价，0 为中间价，1 为本方最优价）
+            target_prob: 要求的成交概率
+            wait_quantile: 等待时间取成交时间分布的该分位
+            min_wait / max_wait: 等待时间范围（秒），max_wait 同时是估算成交概率的时间窗口
+            bucket: 实际挂单结果分桶的宽度（半个价差的倍数）
+            prior_weight: 盘口估算相对实际挂单结果的权重（等价样本数）
+        """
+        self.window = window
+        self.max_starts = max_starts
+        self.min_samples = min_samples
+        self.candidates = candidates
+        self.target_prob = target_prob
+        self.wait_quantile = wait_quantile
+        self.min_wait = min_wait
+        self.max_wait = max_wait
+        self.bucket = bucket
+        self.prior_weight = prior_weight
+
+        # (时间戳, 买一, 卖一)
+        self.book: Deque[Tuple[float, float, float]] = deque()
+        # (时间戳, 成交价)，没有成交数据来源时为空，只按盘口回放
+        self.trades: Deque[Tuple[float, float]] = deque()
+        # {(方向, 偏移桶): [挂单次数, 成交次数]}
+        self.outcomes: Dict[Tuple[str, int], List[int]] = {}
+
+    def record_book(self, bid: Optional[float], ask: Optional[float], ts: Optional[float] = None):
+        """记录一条盘口快照"""
+        if not bid or not ask or ask <= bid:
+            return
+        ts = time.time() if ts is None else ts
+        self.book.append((ts, bid, ask))
+        while self.book and self.book[0][0] < ts - self.window:
+            self.book.popleft()
+
+    def record_trade(self, price: Optional[float], ts: Optional[float] = None):
+        """记录一笔逐笔成交（时间戳须递增）；有成交记录时回放同时按成交价判断是否成交"""
+        if not price:
+            return
+        ts = time.time() if ts is None else ts
+        self.trades.append((ts, price))
+        while self.trades and self.trades[0][0] < ts - self.window:
+            self.trades.popleft()
+
+    def _bucket(self, offset: float) -> int:
+        return int(round(offset / self.bucket))
+
+    def record_order(self, side: str, offset: float, filled: bool):
+        """
+        记录一次实际挂单结果
+
+        Args:
+            side: "BUY" 或 "SELL"
+            offset: 挂单偏移（半个价差的倍数）
+            filled: 是否在等待时间内成交
+        """
+        counts = self.outcomes.setdefault((side.upper(), self._bucket(offset)), [0, 0])
+        counts[0] += 1
+        counts[1] += 1 if filled else 0
+
+    @property
+    def is_ready(self) -> bool:
+        return len(self.book) >= self.min_samples
+
+    def fill_times(self, side: str, offset: float, horizon: Optional[float] = None) -> Tuple[int, List[float]]:
+        """
+        按盘口历史回放：从每个起点按该偏移挂单，horizon 秒内被吃穿（或有成交价达到挂单价）所需的时间
+
+        Returns:
+            (起点数, 成交时间列表)：成交时间只包含 horizon 内成交的起点
+        """
+        horizon = self.max_wait if horizon is None else horizon
+        book = list(self.book)
+        times = [sample[0] for sample in book]
+        last_start = bisect.bisect_right(times, times[-1] - horizon) if book else 0
+        if last_start == 0:
+            return 0, []
+
+        stride = max(1, last_start // self.max_starts)
+        sell = side.upper() == "SELL"
+        trades = list(self.trades)
+        trade_times = [trade[0] for trade in trades]
+        starts = 0
+        fills = []
+        for i in range(0, last_start, stride):
+            ts, bid, ask = book[i]
+            half = (ask - bid) / 2
+            mid = (ask + bid) / 2
+            price = mid + offset * half if sell else mid - offset * half
+            starts += 1
+            fill = None
+            for j in range(i + 1, len(book)):
+                later_ts, later_bid, later_ask = book[j]
+                if later_ts - ts > horizon:
+                    break
+                if (later_bid >= price) if sell else (later_ask <= price):
+                    fill = later_ts - ts
+                    break
+            for k in range(bisect.bisect_right(trade_times, ts), len(trades)):
+                trade_ts, trade_price = trades[k]
+                if trade_ts - ts > horizon or (fill is not None and trade_ts - ts >= fill):
+                    break
+                if (trade_price >= price) if sell else (trade_price <= price):
+                    fill = trade_ts - ts
+                    break
+            if fill is not None:
+                fills.append(fill)
+        return starts, fills
+
+    def estimate(self, side: str, offset: float) -> Optional[Dict[str, float]]:
+        """
+        估算按该偏移挂单在 max_wait 秒内的成交概率和等待时间
+
+        Returns:
+            dict: {prob, book_prob, wait}，盘口样本不足时返回 None；
+                  book_prob 为回放中被吃穿的比例，prob 为按实际挂单结果校准后的值
+        """
+        if not self.is_ready:
+            return None
+        starts, fills = self.fill_times(side, offset)
+        if starts == 0:
+            return None
+
+        book_prob = len(fills) / starts
+        placed, filled = self.outcomes.get((side.upper(), self._bucket(offset)), [0, 0])
+        prob = (book_prob * self.prior_weight + filled) / (self.prior_weight + placed)
+
+        if fills:
+            fills.sort()
+            wait = fills[min(len(fills) - 1, int(len(fills) * self.wait_quantile))]
+        else:
+            wait = self.max_wait
+        wait = max(self.min_wait, min(self.max_wait, wait))
+        return {'prob': prob, 'book_prob': book_prob, 'wait': wait}
+
+    def plan(self, side: str, bid: float, ask: float) -> Optional[Dict[str, float]]:
+        """
+        选择满足 target_prob 的最保守挂单价格；都不满足时选成交概率最高的
+
+        Args:
+            side: "BUY" 或 "SELL"
+            bid / ask: 当前买一卖一
+
+        Returns:
+            dict: {price, offset, prob, wait}，样本不足或盘口无效时返回 None
+        """
+        if not bid or not ask or ask <= bid:
+            return None
+
+        estimates = []
+        for offset in self.candidates:
+            estimate = self.estimate(side, offset)
+            if estimate is not None:
+                estimates.append((offset, estimate))
+        if not estimates:
+            return None
+
+        qualified = [item for item in estimates if item[1]['prob'] >= self.target_prob]
+        if qualified:
+            offset, estimate = max(qualified, key=lambda item: item[0])
+        else:
+            offset, estimate = max(estimates, key=lambda item: (item[1]['prob'], -item[0]))
+
+        half = (ask - bid) / 2
+        mid = (ask + bid) / 2
+        price = mid + offset * half if side.upper() == "SELL" else mid - offset * half
+        return {'price': price, 'offset': offset, 'prob': estimate['prob'], 'wait': estimate['wait']}
@@ -9,11 +9,33 @@ import asyncio
 from playwright.async_api import async_playwright, Page as AsyncPage
 from grvt import GrvtTradingBot
 from paradex_trader import ParadexTrader
-from typing import Optional, Tuple
+from hedge_risk import ExposureReconciler, LiquidationMonitor, AccountRiskManager, base_asset
+from hedge_ledger import HedgeLedger
+from page_pool import PagePool
+from quote_bus import QuoteBus, QuotePublisher, quote_channel
+from position_manager import PositionManager
+from hedge_lots import HedgeLot, LotBook
+from venues import VenueRouter, best_pair, benchmark_venues
+from fill_model import FillModel
+from hedge_pipeline import HedgePipeline
+from spread_stats import SpreadStats, AdaptiveThresholds
+from edge_model import EdgeModel
+from exit_policy import ExitPolicy, EXIT_REASONS, CONVERGED, TRAILING_STOP
+from browser_profile import (RenderProfile, ANTI_THROTTLING_ARGS, QUOTE_SELECTORS,
+                             open_window, compare_update_cadence)
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import random
 from datetime import datetime, timedelta
 import time
+import json
+import multiprocessing
+import queue
+import subprocess
+import sys
+import argparse
+import os
+import signal
 
 
 class HedgeTradingBot:
@@ -23,30 +45,182 @@ class HedgeTradingBot:
             self,
             grvt_page: AsyncPage,
             paradex_page: AsyncPage,
+            grvt_symbol: str = "BTC-USDT",
+            paradex_symbol: str = "BTC-USD-PERP",
+            account_risk: Optional[AccountRiskManager] = None,
             price_diff_threshold: float = 10.0,
             order_size: float = 0.002,
             check_interval: int = 5,
             max_close_price_diff : Optional[float] = 1,
+            exposure_tolerance: float = 0.0005,
+            reconcile_interval: int = 15,
+            auto_flatten: bool = False,
+            liquidation_threshold: float = 0.05,
+            tp_roi: Optional[float] = None,
+            sl_roi: Optional[float] = None,
+            leverage: Optional[int] = None,
+            margin_mode: Optional[str] = None,
+            grvt_fee_rate: float = 0.0,
+            paradex_fee_rate: float = 0.0003,
+            ledger_path: Optional[str] = None,
+            quote_bus: Optional[QuoteBus] = None,
+            quote_max_age: float = 2.0,
+            hold_range: Tuple[int, int] = (600, 1200),
+            cooldown_range: Tuple[int, int] = (180, 300),
+            max_close_retries: int = 500,
+            spread_window: int = 600,
+            spread_halflife: float = 100,
+            adaptive_thresholds: Optional[dict] = None,
+            edge_model: Optional[dict] = None,
+            exit_policy: Optional[dict] = None,
+            max_lots: int = 1,
+            ladder_step: float = 5.0,
+            extra_venues: Optional[Dict[str, object]] = None,
+            paradex_maker_timeout: Optional[float] = None,
+            fill_model: Optional[dict] = None,
     ):
         self.grvt_bot = GrvtTradingBot(grvt_page)
         self.paradex_trader = ParadexTrader(paradex_page)
 
+        # 本机器人负责的交易品种，持仓查询和平仓只处理该基础资产
+        self.grvt_symbol = grvt_symbol
+        self.paradex_symbol = paradex_symbol
+        self.asset = base_asset(grvt_symbol)
+        # 多品种共享的账户级风控（单品种运行时为 None）
+        self.account_risk = account_risk
+
         self.price_diff_threshold = price_diff_threshold
         self.order_size = order_size
         self.check_interval = check_interval
         self.max_close_price_diff = max_close_price_diff
-
+        # 开仓后为 GRVT 持仓批量设置的止盈止损 ROI%（均为 None 时不设置）
+        self.tp_roi = tp_roi
+        self.sl_roi = sl_roi
+        # 期望的 GRVT 杠杆和保证金模式（None 表示不校验）
+        self.leverage = leverage
+        self.margin_mode = margin_mode
+
+        # 下单/平仓流程进行中时为 True，后台任务此时不操作页面
+        self.is_trading = False
+
+        self.exposure_reconciler = ExposureReconciler(
+            self.grvt_bot,
+            self.paradex_trader,
+            tolerance=exposure_tolerance,
+            interval=reconcile_interval,
+            auto_flatten=auto_flatten,
+            is_busy=lambda: self.is_trading,
+            set_busy=lambda busy: setattr(self, 'is_trading', busy),
+            assets={self.asset},
+        )
+
+        self.liquidation_monitor = LiquidationMonitor(
+            self.grvt_bot,
+            threshold=liquidation_threshold,
+            on_breach=self.on_liquidation_breach,
+            assets={self.asset},
+        )
+        # 强平风控触发的强制市价平仓（后台任务，不阻塞监控）
+        self.force_close_task: Optional[asyncio.Task] = None
+
+        # 对冲周期账本，停止时导出到 ledger_path（CSV）
+        self.ledger = HedgeLedger(grvt_fee_rate=grvt_fee_rate, paradex_fee_rate=paradex_fee_rate)
+        self.ledger_path = ledger_path
+
+        # 最近一次读取的盘口 (bid, ask)，用于估算成交价
+        self.last_grvt_quote: Tuple[Optional[float], Optional[float]] = (None, None)
+        self.last_paradex_quote: Tuple[Optional[float], Optional[float]] = (None, None)
+        # 最近一次平仓的价格与盈亏信息
+        self.last_close_info: dict = {}
+
+        # 共享内存报价总线：设置后优先从总线读取盘口，报价过期（quote_max_age 秒）时退回抓取页面
+        self.quote_bus = quote_bus
+        self.quote_max_age = quote_max_age
+
+        # 每个价差样本都计入滚动统计（EWMA、z-score、窗口最小/最大值和分位数）
+        self.spread_stats = SpreadStats(window=spread_window, halflife=spread_halflife)
+
+        # 自适应阈值（AdaptiveThresholds 的参数字典，None 表示使用固定阈值）：
+        # 统计量就绪后按波动率调整 price_diff_threshold 和平仓价差带；价差回到均值 ± 价差带以内时
+        # 平仓不再等待盈亏条件（max_close_price_diff 仍是按组合盈亏判断的独立条件）
+        self.adaptive_thresholds = None
+        if adaptive_thresholds is not None:
+            self.adaptive_thresholds = AdaptiveThresholds(**{'entry': price_diff_threshold, **adaptive_thresholds})
+
+        # 净收益模型（EdgeModel 的参数字典，None 表示只按价差阈值开仓）：
+        # 扣除手续费、Paradex 深度滑点和持仓期资金费后预期净盈亏达标才开仓
+        self.edge_model = None
+        if edge_model is not None:
+            self.edge_model = EdgeModel(**{
+                'grvt_fee_rate': grvt_fee_rate,
+                'paradex_fee_rate': paradex_fee_rate,
+                'expected_hold_seconds': sum(hold_range) / 2,
+                **edge_model,
+            })
+        self.last_paradex_depth = None
+        self.last_edge: Optional[dict] = None
+
+        # 平仓策略（ExitPolicy 的参数字典，None 表示在 hold_range 内随机持仓）：
+        # 每个价差样本上判断收敛、移动止盈和时间衰减，满足条件立即平仓，max_hold 代替随机持仓时间
+        self.exit_policy = ExitPolicy(**exit_policy) if exit_policy is not None else None
+
+        # 交易所适配器（venues.VenueAdapter）：除 GRVT/Paradex 外还可以传入其他交易所只做价差监控，
+        # 每个 tick 在全部交易所两两组合中找出可成交价差最大的一对
+        self.router = VenueRouter({'grvt': self.grvt_bot, 'paradex': self.paradex_trader, **(extra_venues or {})})
+        self.last_route: Optional[dict] = None
+
+        # 报价生产 -> 信号判断 -> 执行 流水线（start_monitoring 中运行）
+        self.pipeline = HedgePipeline(self)
+
+        # 同时持有的对冲仓位（max_lots 笔，价差每再扩大 ladder_step 美元加一笔），
+        # 每笔的持仓计时、平仓重试和冷却在后台进行，监控循环不被阻塞
+        self.hold_range = hold_range
+        self.cooldown_range = cooldown_range
+        self.max_close_retries = max_close_retries
+        self.lots = LotBook(self._make_lot_manager, max_lots=max_lots, ladder_step=ladder_step,
+                            force_close=self.start_force_close)
+
+        # 双边挂单模式：设置后 Paradex 腿也按中间价挂限价单，GRVT 成交后 Paradex 超过该秒数未成交则撤单并市价补齐；
+        # None 表示 Paradex 腿直接市价成交
+        self.paradex_maker_timeout = paradex_maker_timeout
+        # 最近一次开仓 Paradex 腿的成交价（挂单模式下记录，None 时按对手价估算）
+        self.last_paradex_fill: Optional[float] = None
+        self.maker_fills = 0
+        self.taker_fallbacks = 0
+
+        # GRVT post-only 成交概率模型（FillModel 的参数字典，None 表示按中间价挂单、固定等待 30 秒）：
+        # 记录每个 tick 的 GRVT 盘口和每次挂单结果，开仓时据此选择挂单价格和等待时间
+        self.fill_model = FillModel(**fill_model) if fill_model is not None else None
+        # 最近一次开仓 GRVT 挂单的实际价格（成交价）
+        self.last_grvt_order_price: Optional[float] = None
+        # 最近一次开仓 GRVT 挂单超时撤单前的部分成交数量，None 表示按 order_size 全部成交
+        self.last_grvt_fill_size: Optional[float] = None
 
         self.is_running = False
         self.total_trades = 0
         self.successful_trades = 0
         self.failed_trades = 0
 
+    def _bus_quote(self, venue: str, symbol: str) -> Optional[dict]:
+        """从报价总线读取最新报价，没有总线或报价过期时返回 None"""
+        if self.quote_bus is None:
+            return None
+        channel = quote_channel(venue, symbol)
+        if channel not in self.quote_bus.channels:
+            return None
+        return self.quote_bus.latest(channel, max_age=self.quote_max_age)
+
     async def get_grvt_mid_price(self) -> Optional[float]:
         """获取GRVT的中间价"""
         try:
-            bid, ask = await self.grvt_bot.get_orderbook_prices()
+            quote = self._bus_quote("grvt", self.grvt_symbol)
+            bid, ask = (quote['bid'], quote['ask']) if quote else (None, None)
+            if not (bid and ask):
+                bid, ask = await self.grvt_bot.get_orderbook_prices()
             if bid and ask:
+                self.last_grvt_quote = (bid, ask)
+                if self.fill_model is not None:
+                    self.fill_model.record_book(bid, ask)
                 return (bid + ask) / 2
             return None
         except Exception as e:
@@ -56,10 +230,22 @@ class HedgeTradingBot:
     async def get_paradex_mid_price(self) -> Optional[float]:
         """获取Paradex的中间价"""
         try:
-            bid = await self.paradex_trader.get_highest_bid_price()
-            ask = await self.paradex_trader.get_lowest_ask_price()
+            quote = self._bus_quote("paradex", self.paradex_symbol)
+            bid, ask = (quote['bid'], quote['ask']) if quote else (None, None)
+            if bid and ask:
+                self.last_paradex_depth = (quote['bids'], quote['asks'])
+            elif self.edge_model is not None:
+                # 净收益模型需要深度估算滑点，一次读取深度同时得到买一卖一
+                depth = await self.paradex_trader.get_orderbook_depth()
+                if depth and depth[0] and depth[1]:
+                    self.last_paradex_depth = depth
+                    bid, ask = depth[0][0][0], depth[1][0][0]
+            if not (bid and ask):
+                bid = await self.paradex_trader.get_highest_bid_price()
+                ask = await self.paradex_trader.get_lowest_ask_price()
 
             if bid and ask:
+                self.last_paradex_quote = (bid, ask)
                 return (bid + ask) / 2
             return None
         except Exception as e:
@@ -70,7 +256,7 @@ class HedgeTradingBot:
         """获取两个平台的价格差异"""
         try:
             print("\n" + "-" * 60)
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] 获取价格信息...")
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] [{self.asset}] 获取价格信息...")
 
             # 并行获取两个价格
             grvt_price, paradex_price = await asyncio.gather(
@@ -85,12 +271,26 @@ class HedgeTradingBot:
 
             price_diff = grvt_price - paradex_price
             diff_pct = (price_diff / paradex_price) * 100
+            self.spread_stats.update(price_diff)
+            if self.adaptive_thresholds and self.adaptive_thresholds.update(self.spread_stats):
+                self.price_diff_threshold = self.adaptive_thresholds.entry
+                print(f"🎚️  阈值已调整: 开仓 ${self.price_diff_threshold:.2f}，"
+                      f"平仓价差带 均值 ± ${self.adaptive_thresholds.exit:.2f}")
 
             print(f"  GRVT 价格:    ${grvt_price:,.5f}")
             print(f"  Paradex 价格: ${paradex_price:,.5f}")
             print(f"  价差:         ${price_diff:+,.5f} ({diff_pct:+.5f}%)")
+            if self.spread_stats.is_ready:
+                stats = self.spread_stats
+                zscore = stats.zscore()
+                print(f"  价差统计:     均值 ${stats.mean:+,.3f}  σ ${stats.std:,.3f}  "
+                      f"z {zscore if zscore is None else f'{zscore:+.2f}'}  "
+                      f"区间 [${stats.min:+,.3f}, ${stats.max:+,.3f}]")
+            await self.route_venues()
             print("-" * 60)
 
+            self.check_exit(price_diff)
+
             return grvt_price, paradex_price, price_diff
 
         except Exception as e:
@@ -100,6 +300,153 @@ class HedgeTradingBot:
 
 
 
+    async def route_venues(self) -> Optional[dict]:
+        """
+        找出可成交价差最大的交易所对：只有 GRVT/Paradex 时直接使用本 tick 已读取的盘口，
+        配置了其他交易所时并行读取全部交易所
+
+        Returns:
+            dict: {sell_venue, buy_venue, sell_price, buy_price, spread}，报价不足时返回 None
+        """
+        if len(self.router.venues) > 2:
+            route = await self.router.scan()
+        else:
+            route = best_pair({'grvt': self.last_grvt_quote, 'paradex': self.last_paradex_quote})
+        self.last_route = route
+
+        if route is not None:
+            executable = {route['sell_venue'], route['buy_venue']} == {'grvt', 'paradex'}
+            print(f"  最优交易所对: {route['sell_venue']} 卖 ${route['sell_price']:,.5f} / "
+                  f"{route['buy_venue']} 买 ${route['buy_price']:,.5f}，可成交价差 ${route['spread']:+,.5f}"
+                  f"{'' if executable else '（仅监控，无对冲下单流程）'}")
+        return route
+
+    @staticmethod
+    def route_direction(route: Optional[dict]) -> Optional[str]:
+        """
+        交易所对对应的对冲方向
+
+        Returns:
+            str: 在 GRVT 卖出、Paradex 买入为 "GRVT_SHORT"，反之为 "GRVT_LONG"；
+                 没有路由或最优交易所对不是 GRVT/Paradex 时返回 None
+        """
+        if route is None:
+            return None
+        legs = (route['sell_venue'], route['buy_venue'])
+        if legs == ('grvt', 'paradex'):
+            return "GRVT_SHORT"
+        if legs == ('paradex', 'grvt'):
+            return "GRVT_LONG"
+        return None
+
+    def check_exit(self, price_diff: float):
+        """
+        持仓期间每个价差样本调用：平仓策略判断某笔仓位应该平仓时让它的持仓管理器立即平仓
+
+        Args:
+            price_diff: 最新价差（GRVT - Paradex）
+        """
+        if self.exit_policy is None:
+            return
+
+        for lot, reason, detail in self.lots.check_exit(self.exit_policy, price_diff):
+            print(f"🎯 #{lot.lot_id} {EXIT_REASONS[reason]}（{detail}），开始平仓")
+
+        for lot in self.lots.holding:
+            if lot.exit_state is not None:
+                print(f"  平仓策略 #{lot.lot_id}:  {self.exit_policy.describe(lot.exit_state)}")
+
+    def is_own_symbol(self, symbol: str) -> bool:
+        """持仓是否属于本机器人负责的基础资产"""
+        return base_asset(symbol) == self.asset
+
+    async def count_grvt_positions(self) -> int:
+        """本品种的 GRVT 持仓数量，读取失败返回 -1"""
+        snapshot = await self.grvt_bot.get_positions_snapshot()
+        if snapshot is None:
+            return -1
+        return len([pos for pos in snapshot if self.is_own_symbol(pos['product'])])
+
+    async def grvt_position_size(self) -> Optional[float]:
+        """本品种的 GRVT 净持仓（带符号），读取失败返回 None"""
+        positions = await self.grvt_bot.get_net_positions()
+        if positions is None:
+            return None
+        return sum(size for product, size in positions.items() if self.is_own_symbol(product))
+
+    async def paradex_position_size(self) -> Optional[float]:
+        """本品种的 Paradex 净持仓（带符号），读取失败返回 None"""
+        positions = await self.paradex_trader.get_net_positions()
+        if positions is None:
+            return None
+        return sum(size for market, size in positions.items() if self.is_own_symbol(market))
+
+    def plan_grvt_order(self, side: str, grvt_price: float) -> Tuple[float, int, Optional[float]]:
+        """
+        GRVT post-only 挂单的价格和最长等待时间
+
+        Args:
+            side: "BUY" 或 "SELL"
+            grvt_price: 信号对应的 GRVT 中间价
+
+        Returns:
+            (挂单价, 最长等待秒数, 挂单偏移)：没有成交概率模型或样本不足时为 (中间价, 30, None)
+        """
+        self.last_grvt_order_price = grvt_price
+        if self.fill_model is None:
+            return grvt_price, 30, None
+
+        bid, ask = self.last_grvt_quote
+        plan = self.fill_model.plan(side, bid, ask)
+        if plan is None:
+            return grvt_price, 30, None
+
+        price = round(plan['price'], 5)
+        max_wait = int(round(plan['wait']))
+        print(f"📐 GRVT 挂单 ${price:,.5f}（偏移 {plan['offset']:+.1f} 个半价差，"
+              f"预计成交概率 {plan['prob']:.0%}，最多等待 {max_wait} 秒）")
+        self.last_grvt_order_price = price
+        return price, max_wait, plan['offset']
+
+    def record_grvt_order(self, side: str, offset: Optional[float], filled: bool):
+        """把一次挂单结果计入成交概率模型"""
+        if self.fill_model is not None and offset is not None:
+            self.fill_model.record_order(side, offset, filled)
+
+    async def grvt_order_filled(self, baseline: Optional[float]) -> bool:
+        """
+        GRVT 开仓单是否已成交
+
+        Args:
+            baseline: 下单前的净持仓；None 表示下单前没有持仓，出现持仓即视为成交
+        """
+        if baseline is None:
+            return await self.count_grvt_positions() > 0
+        size = await self.grvt_position_size()
+        return size is not None and abs(size - baseline) > 1e-12
+
+    async def grvt_timeout_fill(self, baseline: Optional[float]) -> Optional[float]:
+        """
+        GRVT 限价单（开仓或逐笔平仓）等待超时：先撤掉挂单，再按净持仓相对下单前的变化确认实际成交数量
+        （成交可能发生在撤单之前的瞬间，不能以撤单结果判断）
+
+        Args:
+            baseline: 下单前的净持仓；None 表示下单前没有持仓
+
+        Returns:
+            float: 已成交数量（0 表示未成交）；读取持仓失败返回 None
+        """
+        if not await self.grvt_bot.cancel_orders(self.grvt_symbol):
+            print("⚠️ GRVT 撤单失败或已没有挂单，按持仓确认成交")
+        size = await self.grvt_position_size()
+        if size is None:
+            print("❌ 读取 GRVT 持仓失败，无法确认成交数量")
+            return None
+        filled = round(abs(size - (baseline or 0.0)), 10)
+        if filled > 0:
+            print(f"⚠️ GRVT 撤单前已成交 {filled}，按成交数量对冲")
+        return filled
+
     async def execute_hedge_grvt_short_paradex_long(self, grvt_price: float) -> bool:
         """
         执行对冲：GRVT开空 + Paradex开多
@@ -111,7 +458,15 @@ class HedgeTradingBot:
 
             # 第一步：在GRVT限价开空
             print("\n[1/3] GRVT 限价开空...")
-            if not await self.grvt_bot.limit_sell_short(price=grvt_price, quantity=self.order_size):
+            # 已有仓位时（加仓）按净持仓的变化判断成交
+            baseline = None
+            if self.lots.active:
+                baseline = await self.grvt_position_size()
+                if baseline is None:
+                    print("❌ 读取 GRVT 持仓失败，不加仓")
+                    return False
+            grvt_price, max_wait, offset = self.plan_grvt_order("SELL", grvt_price)
+            if not await self.grvt_bot.place_limit_order("SELL", self.order_size, grvt_price):
                 print("❌ GRVT开空失败")
                 return False
 
@@ -119,35 +474,33 @@ class HedgeTradingBot:
 
             # 第二步：等待成交
             print("\n[2/3] 等待GRVT订单成交...")
-            max_wait = 30
             for i in range(max_wait):
-                position_count = await self.grvt_bot.check_positions(show_details=False)
-
-                if position_count > 0:
+                await asyncio.sleep(1)
+                if await self.grvt_order_filled(baseline):
                     print(f"✅ GRVT订单已成交（等待{i + 1}秒）")
+                    self.record_grvt_order("SELL", offset, True)
                     break
 
                 if i % 5 == 4:
                     print(f"  等待中... ({i + 1}/{max_wait}秒)")
             else:
-                print("⚠️ GRVT订单超时未成交，检查挂单...")
-                fix  = await self.grvt_bot.cancel_order(row_index=0)
-                if fix != 1:
+                print("⚠️ GRVT订单超时未成交，撤单并检查持仓...")
+                self.record_grvt_order("SELL", offset, False)
+                filled = await self.grvt_timeout_fill(baseline)
+                if not filled:
                     return False
-                # await self.grvt_bot.check_open_orders(show_details=True)
-
+                self.last_grvt_fill_size = filled
 
             # 第三步：在Paradex市价开多
             print("\n[3/3] Paradex 市价开多...")
-            if not await self.paradex_trader.execute_market_order(side="BUY", order_size=self.order_size, verify=True):
+            hedge_size = self.last_grvt_fill_size or self.order_size
+            if not await self.paradex_trader.place_market_order("BUY", hedge_size):
                 print("❌ Paradex开多失败")
                 print("⚠️ 注意：GRVT已有空头持仓，需要手动处理！")
                 return False
 
             print("✅ Paradex市价单已成交")
 
-            print("✅ GRVT TP SL 设置成功")
-
             print("\n" + "🎊" * 30)
             print("对冲成功：GRVT空头 + Paradex多头")
             print("🎊" * 30 + "\n")
@@ -171,7 +524,15 @@ class HedgeTradingBot:
 
             # 第一步：在GRVT限价开多
             print("\n[1/3] GRVT 限价开多...")
-            if not await self.grvt_bot.limit_buy_long(price=grvt_price, quantity=self.order_size):
+            # 已有仓位时（加仓）按净持仓的变化判断成交
+            baseline = None
+            if self.lots.active:
+                baseline = await self.grvt_position_size()
+                if baseline is None:
+                    print("❌ 读取 GRVT 持仓失败，不加仓")
+                    return False
+            grvt_price, max_wait, offset = self.plan_grvt_order("BUY", grvt_price)
+            if not await self.grvt_bot.place_limit_order("BUY", self.order_size, grvt_price):
                 print("❌ GRVT开多失败")
                 return False
 
@@ -179,27 +540,26 @@ class HedgeTradingBot:
 
             # 第二步：等待成交
             print("\n[2/3] 等待GRVT订单成交...")
-            max_wait = 30
             for i in range(max_wait):
                 await asyncio.sleep(1)
-                position_count = await self.grvt_bot.check_positions(show_details=False)
-
-
-                if position_count > 0:
+                if await self.grvt_order_filled(baseline):
                     print(f"✅ GRVT订单已成交（等待{i + 1}秒）")
+                    self.record_grvt_order("BUY", offset, True)
                     break
 
                 print(f"  等待中... ({i + 1}/{max_wait}秒)")
             else:
-                print("⚠️ GRVT订单超时未成交，检查挂单...")
-                # await self.grvt_bot.check_open_orders(show_details=True)
-                fix = await self.grvt_bot.cancel_order(row_index=0)
-                if fix != 1:
+                print("⚠️ GRVT订单超时未成交，撤单并检查持仓...")
+                self.record_grvt_order("BUY", offset, False)
+                filled = await self.grvt_timeout_fill(baseline)
+                if not filled:
                     return False
+                self.last_grvt_fill_size = filled
 
             # 第三步：在Paradex市价开空
             print("\n[3/3] Paradex 市价开空...")
-            if not await self.paradex_trader.execute_market_order(side="SELL", order_size=self.order_size):
+            hedge_size = self.last_grvt_fill_size or self.order_size
+            if not await self.paradex_trader.place_market_order("SELL", hedge_size):
                 print("❌ Paradex开空失败")
                 print("⚠️ 注意：GRVT已有多头持仓，需要手动处理！")
                 return False
@@ -219,13 +579,171 @@ class HedgeTradingBot:
             traceback.print_exc()
             return False
 
-    async def close_existing_positions(self, max_price_diff: float = 0.5) -> bool:
+    async def execute_hedge_maker_maker(self, direction: str, grvt_price: float, paradex_price: float) -> bool:
+        """
+        双边挂单对冲：GRVT post-only 限价单与 Paradex 中间价限价单同时挂出
+        （Paradex 页面没有 post-only 选项，中间价挂单通常作为 maker 成交，但不保证）；
+        GRVT 成交后等待 Paradex 成交，超过 paradex_maker_timeout 秒撤单并市价补齐剩余数量，
+        GRVT 超时时撤掉两边挂单，按撤单后的实际成交数量补齐或平掉 Paradex 一侧
+
+        Args:
+            direction: "GRVT_SHORT"（GRVT 空 + Paradex 多）或 "GRVT_LONG"
+            grvt_price / paradex_price: 两边限价（中间价）
+        """
+        grvt_short = direction == "GRVT_SHORT"
+        grvt_side, paradex_side = ("SELL", "BUY") if grvt_short else ("BUY", "SELL")
+        paradex_unwind_side = "SELL" if paradex_side == "BUY" else "BUY"
+        self.last_paradex_fill = None
+
+        try:
+            print("\n" + "🔥" * 30)
+            print(f"执行双边挂单对冲：GRVT{'做空' if grvt_short else '做多'} + Paradex{'做多' if grvt_short else '做空'}")
+            print("🔥" * 30)
+
+            grvt_baseline = None
+            if self.lots.active:
+                grvt_baseline = await self.grvt_position_size()
+                if grvt_baseline is None:
+                    print("❌ 读取 GRVT 持仓失败，不加仓")
+                    return False
+            paradex_baseline = await self.paradex_position_size()
+            if paradex_baseline is None:
+                print("❌ 读取 Paradex 持仓失败")
+                return False
+
+            async def paradex_filled() -> Optional[float]:
+                size = await self.paradex_position_size()
+                return None if size is None else abs(size - paradex_baseline)
+
+            grvt_price, max_wait, offset = self.plan_grvt_order(grvt_side, grvt_price)
+
+            # 第一步：两边同时挂单（两个平台在各自的页面上操作）
+            print(f"\n[1/3] GRVT 挂单 ${grvt_price:,.5f}，Paradex 挂单 ${paradex_price:,.5f}...")
+            grvt_ok, paradex_ok = await asyncio.gather(
+                self.grvt_bot.place_limit_order(grvt_side, self.order_size, grvt_price),
+                self.paradex_trader.place_limit_order(paradex_side, self.order_size, paradex_price),
+            )
+
+            if not grvt_ok:
+                print("❌ GRVT 挂单失败，撤掉 Paradex 挂单")
+                if paradex_ok:
+                    await self.paradex_trader.cancel_orders()
+                    filled = await paradex_filled()
+                    if filled:
+                        print(f"⚠️ Paradex 已成交 {filled}，市价平掉")
+                        await self.paradex_trader.place_market_order(paradex_unwind_side, filled)
+                return False
+
+            # 第二步：等待 GRVT 成交
+            print("\n[2/3] 等待 GRVT 订单成交...")
+            for i in range(max_wait):
+                await asyncio.sleep(1)
+                if await self.grvt_order_filled(grvt_baseline):
+                    print(f"✅ GRVT 订单已成交（等待{i + 1}秒）")
+                    self.record_grvt_order(grvt_side, offset, True)
+                    break
+                if i % 5 == 4:
+                    print(f"  等待中... ({i + 1}/{max_wait}秒)")
+            else:
+                print("⚠️ GRVT 订单超时未成交，撤掉两边挂单")
+                self.record_grvt_order(grvt_side, offset, False)
+                # 成交可能发生在撤单前的瞬间，撤单后按持仓确认 GRVT 实际成交数量
+                grvt_filled = await self.grvt_timeout_fill(grvt_baseline)
+                paradex_done = 0.0
+                if paradex_ok:
+                    await self.paradex_trader.cancel_orders()
+                    paradex_done = await paradex_filled()
+                    if paradex_done is None:
+                        print("❌ 读取 Paradex 持仓失败，交由净敞口对账处理")
+                        return False
+                if grvt_filled is None:
+                    print("❌ 无法确认 GRVT 成交数量，交由净敞口对账处理")
+                    return False
+
+                if not grvt_filled:
+                    if paradex_done:
+                        print(f"⚠️ Paradex 已成交 {paradex_done}，市价平掉")
+                        await self.paradex_trader.place_market_order(paradex_unwind_side, paradex_done)
+                    return False
+
+                # GRVT 部分成交：Paradex 一侧按 GRVT 成交数量补齐或平掉多出的部分
+                self.last_grvt_fill_size = grvt_filled
+                delta = round(grvt_filled - paradex_done, 10)
+                if delta > 0:
+                    self.taker_fallbacks += 1
+                    print(f"  Paradex 市价{'买入' if paradex_side == 'BUY' else '卖出'} {delta} 对冲 GRVT 已成交部分...")
+                    if not await self.paradex_trader.place_market_order(paradex_side, delta):
+                        print("❌ Paradex 市价对冲失败")
+                        print("⚠️ 注意：GRVT 已有持仓，需要手动处理！")
+                        return False
+                elif delta < 0:
+                    print(f"⚠️ Paradex 多成交 {-delta}，市价平掉")
+                    if not await self.paradex_trader.place_market_order(paradex_unwind_side, -delta):
+                        print("❌ Paradex 平掉多余成交失败")
+                        return False
+
+                print(f"✅ 按 GRVT 成交数量 {grvt_filled} 完成对冲")
+                return True
+
+            # 第三步：等待 Paradex 挂单成交，超时市价补齐
+            print(f"\n[3/3] 等待 Paradex 挂单成交（最多 {self.paradex_maker_timeout} 秒）...")
+            filled = 0.0
+            if paradex_ok:
+                deadline = time.time() + self.paradex_maker_timeout
+                while time.time() < deadline:
+                    filled = await paradex_filled() or 0.0
+                    if filled >= self.order_size * (1 - 1e-6):
+                        self.maker_fills += 1
+                        self.last_paradex_fill = paradex_price
+                        print("✅ Paradex 挂单已成交")
+                        print("\n" + "🎊" * 30)
+                        print("双边挂单对冲成功")
+                        print("🎊" * 30 + "\n")
+                        return True
+                    await asyncio.sleep(1)
+
+                print("⚠️ Paradex 挂单超时，撤单后市价补齐")
+                await self.paradex_trader.cancel_orders()
+                filled = await paradex_filled() or 0.0
+
+            remaining = round(self.order_size - filled, 10)
+            if remaining > 0:
+                self.taker_fallbacks += 1
+                print(f"  Paradex 市价{'买入' if paradex_side == 'BUY' else '卖出'}剩余 {remaining}...")
+                if not await self.paradex_trader.place_market_order(paradex_side, remaining):
+                    print("❌ Paradex 市价补齐失败")
+                    print("⚠️ 注意：GRVT 已有持仓，需要手动处理！")
+                    return False
+
+            print("\n" + "🎊" * 30)
+            print("对冲成功（Paradex 市价补齐）")
+            print("🎊" * 30 + "\n")
+            return True
+
+        except Exception as e:
+            print(f"❌ 双边挂单对冲失败: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+    def spread_back_in_band(self) -> bool:
+        """最新价差是否已回到滚动均值的平仓价差带以内（未启用自适应阈值时为 False）"""
+        return self.adaptive_thresholds is not None and self.adaptive_thresholds.within_exit_band(self.spread_stats)
+
+    async def sleep_unless_forced(self, seconds: float):
+        """等待指定秒数，期间强平风控发起强制平仓时提前返回"""
+        deadline = time.time() + seconds
+        while time.time() < deadline and not self.force_closing:
+            await asyncio.sleep(min(1.0, deadline - time.time()))
+
+    async def close_existing_positions(self, max_price_diff: float = 0.5, accept_profit: bool = False) -> bool:
         """
         关闭现有的 GRVT 和 Paradex 持仓
         在平仓前会检查价差，如果价差过大会等待
 
         Args:
             max_price_diff: 允许的最大价差（绝对值），默认为0.5美元
+            accept_profit: 为 True 时总盈亏为正也直接平仓（平仓策略兑现收益时使用）
 
         GRVT: 通过开相反方向的仓位来平仓（多单->开空，空单->开多）
         Paradex: 市价平仓
@@ -241,14 +759,19 @@ class HedgeTradingBot:
             check_count = 0
             while True:
                 check_count += 1
+                if self.force_closing:
+                    print("⚠️ 强平风控正在强制平仓，放弃本次平仓")
+                    return False
 
                 try:
                     # 获取 GRVT 的 P&L
                     print(1)
-                    grvt_positions = await self.grvt_bot.get_simple_pnl_async()
+                    grvt_positions = [pos for pos in await self.grvt_bot.get_simple_pnl_async()
+                                      if self.is_own_symbol(pos['product'])]
 
                     # 获取 Paradex 的 P&L
-                    paradex_positions = await self.paradex_trader.get_total_upnl_async()
+                    paradex_positions = [pos for pos in await self.paradex_trader.get_total_upnl_async()
+                                         if self.is_own_symbol(pos['market'])]
 
                     # 解析 GRVT P&L
                     grvt_pnl_total = 0.0
@@ -282,23 +805,43 @@ class HedgeTradingBot:
                     print(f"  盈亏绝对值:  ${abs_total_pnl:>10.2f}")
 
                     # 检查盈亏绝对值是否在阈值内
-                    if abs_total_pnl <= max_price_diff:
+                    if abs_total_pnl <= max_price_diff or (accept_profit and total_pnl > 0):
                         print(f"✅ 盈亏在合理范围内（${abs_total_pnl:.2f} <= ${max_price_diff}），可以执行平仓")
+                        self.last_close_info = {'realized_pnl': total_pnl}
+                        break
+                    # 价差已回到滚动均值附近：回归已完成，不再等待盈亏条件
+                    elif self.spread_back_in_band():
+                        print(f"✅ 价差 ${self.spread_stats.last:+.2f} 已回到均值 ${self.spread_stats.mean:+.2f} "
+                              f"± ${self.adaptive_thresholds.exit:.2f} 以内，可以执行平仓")
+                        self.last_close_info = {'realized_pnl': total_pnl}
                         break
                     else:
                         print(f"⚠️ 盈亏差距过大（${abs_total_pnl:.2f} > ${max_price_diff}）")
                         print(f"   等待20秒后重新检查...")
-                        await asyncio.sleep(20)
+                        await self.sleep_unless_forced(20)
                     print(3)
                 except Exception as e:
                     print(f"❌ 获取盈亏信息失败（第{check_count}次检查）: {e}")
                     print(f"   等待20秒后重试...")
-                    await asyncio.sleep(20)
+                    await self.sleep_unless_forced(20)
                     continue
 
 
             # ==================== 第一步：检查并平仓 GRVT 持仓 ====================
-            grvt_positions = await self.grvt_bot.get_position_list()
+            grvt_positions = [pos for pos in await self.grvt_bot.get_position_list()
+                              if self.is_own_symbol(pos['product'])]
+
+            # 记录平仓时的盘口，GRVT 按中间价挂单，Paradex 市价单按对手价估算成交价
+            grvt_close_price = None
+            if len(grvt_positions) > 0:
+                grvt_mid = await self.get_grvt_mid_price()
+                grvt_close_price = round(grvt_mid, 5) if grvt_mid else None
+            paradex_mid = await self.get_paradex_mid_price()
+            self.last_close_info.update({
+                'grvt_price': grvt_close_price,
+                'paradex_price': paradex_mid,
+                'paradex_quote': self.last_paradex_quote,
+            })
 
             if len(grvt_positions) > 0:
                 print(f"\n[1/2] 发现 {len(grvt_positions)} 个 GRVT 持仓，准备平仓...")
@@ -325,13 +868,13 @@ class HedgeTradingBot:
                         if is_long:
                             print(f"  持仓方向: 多单 → 开空单平仓")
                             # 获取当前卖价，用于限价开空
-                            if not await self.grvt_bot.limit_sell_short(price=None, quantity=quantity):
+                            if not await self.grvt_bot.place_limit_order("SELL", quantity, grvt_close_price):
                                 print(f"❌ GRVT 持仓 {i + 1} 平仓失败")
                                 return False
                         else:
                             print(f"  持仓方向: 空单 → 开多单平仓")
                             # 获取当前买价，用于限价开多
-                            if not await self.grvt_bot.limit_buy_long(price=None, quantity=quantity):
+                            if not await self.grvt_bot.place_limit_order("BUY", quantity, grvt_close_price):
                                 print(f"❌ GRVT 持仓 {i + 1} 平仓失败")
                                 return False
 
@@ -348,7 +891,7 @@ class HedgeTradingBot:
 
                 for i in range(max_wait):
                     await asyncio.sleep(1)
-                    remaining_positions = await self.grvt_bot.check_positions(show_details=False)
+                    remaining_positions = await self.count_grvt_positions()
 
                     if remaining_positions == 0:
                         print(f"✅ GRVT 所有持仓已平仓（等待 {i + 1} 秒）")
@@ -360,20 +903,21 @@ class HedgeTradingBot:
                     # 超时未完全成交
                     print("⚠️ GRVT 平仓订单超时未完全成交")
                     print("  尝试取消所有挂单...")
-                    await self.grvt_bot.cancel_all_orders(row_index=0)
+                    await self.grvt_bot.cancel_orders(self.grvt_symbol)
                     return False
 
             else:
                 print("\n[1/2] ✅ GRVT 无持仓需要关闭")
 
             # ==================== 第二步：检查并关闭 Paradex 持仓 ====================
-            paradex_positions = await self.paradex_trader.get_current_positions()
+            paradex_positions = [pos for pos in await self.paradex_trader.get_current_positions()
+                                 if self.is_own_symbol(pos['market'])]
 
             if len(paradex_positions) > 0:
                 print(f"\n[2/2] 发现 {len(paradex_positions)} 个 Paradex 持仓，准备市价平仓...")
 
-                # 市价平仓所有 Paradex 持仓
-                if not await self.paradex_trader.close_all_positions_market():
+                # 市价平仓本品种的 Paradex 持仓
+                if not await self.paradex_trader.close_position_market(market=self.paradex_symbol):
                     print("❌ Paradex 市价平仓失败")
                     return False
 
@@ -395,81 +939,487 @@ class HedgeTradingBot:
 
             return False
 
+    async def attach_page_pool(self, pool: PagePool):
+        """
+        把两个交易页面交给热备页面池监控，页面崩溃/卡死/掉登录时自动换成备用页面
+
+        Args:
+            pool: 热备页面池
+        """
+        grvt_key = f"grvt:{self.grvt_symbol}"
+        paradex_key = f"paradex:{self.paradex_symbol}"
+
+        pool.register(
+            grvt_key,
+            self.grvt_bot.page.url,
+            lambda page, timeout: GrvtTradingBot(page).wait_for_page_ready(timeout=timeout, quiet=True),
+        )
+        pool.register(
+            paradex_key,
+            self.paradex_trader.page.url,
+            lambda page, timeout: ParadexTrader(page).wait_for_page_ready(timeout=timeout, settle_delay=0, quiet=True),
+        )
+
+        await asyncio.gather(pool.fill(grvt_key), pool.fill(paradex_key))
+
+        pool.watch(grvt_key, lambda: self.grvt_bot.page,
+                   lambda page: setattr(self.grvt_bot, 'page', page), is_busy=lambda: self.is_trading)
+        pool.watch(paradex_key, lambda: self.paradex_trader.page,
+                   lambda page: setattr(self.paradex_trader, 'page', page), is_busy=lambda: self.is_trading)
+
+    async def open_panel_pages(self, context) -> bool:
+        """
+        为两个平台各打开独立的持仓页面和委托页面，持仓/委托的读取和平仓/撤单都在这些页面上进行，
+        交易页面始终停留在下单表单，不再来回切换标签，读写可以并行
+
+        Args:
+            context: 浏览器上下文
+
+        Returns:
+            bool: 是否全部打开成功（失败时保持与交易页面共用）
+        """
+        opened = []
+        try:
+            urls = [self.grvt_bot.page.url] * 2 + [self.paradex_trader.page.url] * 2
+            started = time.perf_counter()
+
+            # 连接已运行的浏览器时复用上次留下的面板页面，避免每次重启多开标签
+            leftovers = [page for page in context.pages if await is_panel_page(page)]
+            pages = []
+            for url in urls:
+                page = next((page for page in leftovers if same_page_url(page, url)), None)
+                if page is not None:
+                    leftovers.remove(page)
+                    if RENDER_PROFILE is not None:
+                        await RENDER_PROFILE.apply(page)
+                pages.append(page)
+
+            missing = [i for i, page in enumerate(pages) if page is None]
+            if len(missing) < len(urls):
+                print(f"✓ 复用 {len(urls) - len(missing)} 个已打开的面板页面")
+            for i, (page, _) in zip(missing, await asyncio.gather(
+                *(get_trading_page(context, urls[i], reuse=False, panel=True) for i in missing)
+            )):
+                pages[i] = page
+                opened.append(page)
+            grvt_positions, grvt_orders, paradex_positions, paradex_orders = pages
+
+            await asyncio.gather(
+                wait_trading_pages_ready(grvt_positions, paradex_positions, started=started, label="持仓页面 "),
+                wait_trading_pages_ready(grvt_orders, paradex_orders, started=started, label="委托页面 "),
+            )
+
+            self.grvt_bot.positions_page = grvt_positions
+            self.grvt_bot.orders_page = grvt_orders
+            self.paradex_trader.positions_page = paradex_positions
+            self.paradex_trader.orders_page = paradex_orders
+
+            # 每个面板页面只切换一次标签，之后一直停留在该标签
+            await asyncio.gather(
+                self.grvt_bot.get_positions_snapshot(),
+                self.grvt_bot.check_open_orders(show_details=False),
+                self.paradex_trader.get_positions_snapshot(),
+                self.paradex_trader.check_open_orders_exist(),
+            )
+
+            print("✓ 已打开独立的持仓/委托页面")
+            return True
+
+        except Exception as e:
+            print(f"❌ 打开持仓/委托页面失败，继续使用交易页面: {e}")
+            for trader in (self.grvt_bot, self.paradex_trader):
+                trader.positions_page = None
+                trader.orders_page = None
+            for page in opened:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            return False
+
+    @property
+    def force_closing(self) -> bool:
+        """是否正在执行风控强制平仓"""
+        return self.force_close_task is not None and not self.force_close_task.done()
+
+    def start_force_close(self) -> asyncio.Task:
+        """启动风控强制平仓；已在进行中时返回同一个任务"""
+        if not self.force_closing:
+            self.force_close_task = asyncio.create_task(self.force_close_positions())
+        return self.force_close_task
+
+    async def force_close_positions(self) -> bool:
+        """
+        风控强制平仓：不检查盈亏，市价平掉两边本品种的全部持仓
+
+        Returns:
+            bool: 两边是否都已没有本品种持仓
+        """
+        # 等待正在进行的下单流程结束，避免同时操作页面（条件平仓看到强制平仓后会立即退出）
+        while self.is_trading:
+            await asyncio.sleep(0.2)
+
+        self.is_trading = True
+        try:
+            grvt_bid, grvt_ask = self.last_grvt_quote
+            paradex_bid, paradex_ask = self.last_paradex_quote
+            self.last_close_info = {
+                'realized_pnl': None,
+                'grvt_price': (grvt_bid + grvt_ask) / 2 if grvt_bid and grvt_ask else None,
+                'paradex_price': (paradex_bid + paradex_ask) / 2 if paradex_bid and paradex_ask else None,
+                'paradex_quote': self.last_paradex_quote,
+            }
+
+            grvt_positions = await self.grvt_bot.get_position_list()
+            for i in range(len(grvt_positions) - 1, -1, -1):
+                if self.is_own_symbol(grvt_positions[i]['product']):
+                    await self.grvt_bot.market_close_position(i)
+            # 读取失败（None）时也尝试平仓
+            if await self.paradex_position_size() != 0:
+                await self.paradex_trader.close_position_market(market=self.paradex_symbol)
+
+            grvt_size, paradex_size = await self.grvt_position_size(), await self.paradex_position_size()
+        except Exception as e:
+            print(f"❌ 强制平仓出错: {e}")
+            return False
+        finally:
+            self.is_trading = False
+
+        if grvt_size == 0 and paradex_size == 0:
+            print("✅ 强制平仓完成")
+            return True
+        print(f"❌ 强制平仓未完全成功（GRVT {grvt_size}，Paradex {paradex_size}），请手动检查持仓")
+        return False
+
+    async def on_liquidation_breach(self, position: dict, distance: float):
+        """
+        强平距离低于阈值时提前平掉两边本品种的持仓：在后台市价强制平仓，不等待盈亏条件，也不阻塞强平监控
+
+        Args:
+            position: 触发的 GRVT 持仓快照
+            distance: 当前强平距离（比例）
+        """
+        print(f"\n🚨 {position['product']} 强平距离 {distance:.2%}，提前平仓")
+
+        # 持仓中和平仓中的仓位改为强制平仓，由各自的持仓管理器等待结果并记账
+        self.lots.force_close_all()
+        self.start_force_close()
+
+    async def verify_account_settings(self) -> bool:
+        """启动时校验一次 GRVT 账户设置，结果缓存供下单前检查"""
+        if self.leverage is None and self.margin_mode is None:
+            return True
+        return await self.grvt_bot.verify_account_settings(self.leverage, self.margin_mode)
+
     async def check_and_execute_hedge(self) -> bool:
         """检查价格并执行对冲"""
         try:
             # 获取价格并执行对冲
             grvt_price, paradex_price, price_diff = await self.get_price_difference()
 
-            if grvt_price is None or paradex_price is None or price_diff is None:
+            if not self.should_open(grvt_price, paradex_price, price_diff, route=self.last_route):
                 return False
 
-            abs_diff = abs(price_diff)
+            return await self.execute_opportunity(grvt_price, paradex_price, price_diff, route=self.last_route)
+
+        except Exception as e:
+            print(f"❌ 检查和执行对冲失败: {e}")
+            return False
+
+    def should_open(self, grvt_price: Optional[float], paradex_price: Optional[float],
+                    price_diff: Optional[float], route: Optional[dict] = None) -> bool:
+        """
+        开仓信号与风控检查（不占用账户级风控额度）
+
+        Args:
+            route: 该报价对应的最优交易所对（route_venues 的结果），开仓方向以它为准
+
+        Returns:
+            bool: 是否应该开仓
+        """
+        if grvt_price is None or paradex_price is None or price_diff is None:
+            return False
+
+        if self.force_closing:
+            print("ℹ️  强平风控正在强制平仓，暂停开仓")
+            return False
+
+        direction = self.route_direction(route)
+        if direction is None:
+            print("ℹ️  最优交易所对不是 GRVT/Paradex（或盘口不完整），仅监控价差")
+            return False
+        if (direction == "GRVT_SHORT") != (price_diff > 0):
+            print("ℹ️  可成交价差方向与中间价价差方向不一致，不交易")
+            return False
+        required = self.lots.required_spread(direction, self.price_diff_threshold)
+        if required is None:
+            print(f"ℹ️  {self.lots.status()}，仅监控价差")
+            return False
+
+        abs_diff = abs(price_diff)
 
-            if abs_diff < self.price_diff_threshold:
+        if abs_diff < required:
+            if required > self.price_diff_threshold:
+                print(f"ℹ️  价差 ${abs_diff:.2f} 小于加仓阈值 ${required:.2f}（{self.lots.status()}）")
+            else:
                 print(f"ℹ️  价差 ${abs_diff:.2f} 小于阈值 ${self.price_diff_threshold:.2f}，不交易")
+            return False
+
+        if (self.leverage is not None or self.margin_mode is not None) and \
+                not self.grvt_bot.check_account_settings(self.leverage, self.margin_mode):
+            print("⚠️ GRVT 账户设置未校验或与期望不一致，不交易")
+            return False
+
+        if not self.exposure_reconciler.is_balanced:
+            print(f"⚠️ 净敞口未对齐 {self.exposure_reconciler.net_exposure}，暂停开新仓")
+            return False
+
+        if self.edge_model is not None:
+            edge = self.edge_model.evaluate(
+                price_diff, grvt_price, paradex_price, self.order_size,
+                paradex_depth=self.last_paradex_depth,
+                exit_spread=self.adaptive_thresholds.exit_spread(self.spread_stats) if self.adaptive_thresholds else 0.0,
+            )
+            self.last_edge = edge
+            if not self.edge_model.is_worth_it(edge):
+                if edge['net'] is None:
+                    print("ℹ️  Paradex 深度不足以成交订单数量，不交易")
+                else:
+                    print(f"ℹ️  预期净收益 ${edge['net']:.4f} 不足（毛 ${edge['gross']:.4f} - 手续费 ${edge['fees']:.4f} "
+                          f"- 滑点 ${edge['slippage']:.4f} + 资金费 ${edge['funding']:.4f}），不交易")
+                return False
+
+        return True
+
+    async def execute_opportunity(
+            self,
+            grvt_price: float,
+            paradex_price: float,
+            price_diff: float,
+            paradex_quote: Optional[Tuple[Optional[float], Optional[float]]] = None,
+            route: Optional[dict] = None,
+    ) -> bool:
+        """
+        占用账户级风控额度并执行开仓，成功后登记为一笔仓位，由它的持仓管理器计时平仓
+
+        Args:
+            grvt_price / paradex_price / price_diff: 信号对应的价格和价差
+            paradex_quote: 信号对应的 Paradex (bid, ask)，用于估算成交价；None 时使用最近一次读取的盘口
+            route: 信号对应的最优交易所对，决定两条腿的买卖方向；None 时按价差符号
+
+        Returns:
+            bool: 是否开仓成功
+        """
+        try:
+            abs_diff = abs(price_diff)
+            notional = grvt_price * self.order_size
+            direction = self.route_direction(route) or ("GRVT_SHORT" if price_diff > 0 else "GRVT_LONG")
+
+            if self.account_risk and not self.account_risk.try_acquire(
+                    self.asset, notional, scale_in=bool(self.lots.active)):
                 return False
 
             self.total_trades += 1
 
+            # 等待正在进行的平仓流程结束（多笔仓位时开仓与平仓可能同时触发），避免同时操作页面
+            while self.is_trading:
+                await asyncio.sleep(0.2)
+
             # 执行开仓
-            if price_diff > 0:
-                print(f"\n💰 发现套利机会：GRVT价格高 ${abs_diff:.2f}")
-                success = await self.execute_hedge_grvt_short_paradex_long(grvt_price)
-            else:
-                print(f"\n💰 发现套利机会：GRVT价格低 ${abs_diff:.2f}")
-                success = await self.execute_hedge_grvt_long_paradex_short(grvt_price)
+            self.is_trading = True
+            try:
+                self.last_paradex_fill = None
+                self.last_grvt_order_price = None
+                self.last_grvt_fill_size = None
+                print(f"\n💰 发现套利机会：GRVT价格{'高' if direction == 'GRVT_SHORT' else '低'} ${abs_diff:.2f}")
+                if self.paradex_maker_timeout is not None:
+                    success = await self.execute_hedge_maker_maker(direction, grvt_price, paradex_price)
+                elif direction == "GRVT_SHORT":
+                    success = await self.execute_hedge_grvt_short_paradex_long(grvt_price)
+                else:
+                    success = await self.execute_hedge_grvt_long_paradex_short(grvt_price)
+
+                # 开仓后立即为所有 GRVT 持仓设置保护性止盈止损
+                if success and (self.tp_roi is not None or self.sl_roi is not None):
+                    if not await self.grvt_bot.set_all_positions_tpsl(self.tp_roi, self.sl_roi):
+                        print("⚠️ GRVT 止盈止损未全部设置成功")
+            finally:
+                self.is_trading = False
 
             if not success:
                 self.failed_trades += 1
+                # 开仓失败可能留下单腿持仓，立即对账
+                await self.exposure_reconciler.reconcile_once()
+                if self.account_risk:
+                    self.account_risk.release(self.asset, notional)
                 return False
 
             self.successful_trades += 1
+            size = self.last_grvt_fill_size or self.order_size
+
+            # GRVT 为 post-only 限价单，按限价成交；Paradex 市价单按开仓前的对手价估算
+            paradex_bid, paradex_ask = paradex_quote or self.last_paradex_quote
+            cycle = self.ledger.open_cycle(
+                direction=direction,
+                size=size,
+                entry_spread=price_diff,
+                grvt_intended=grvt_price,
+                paradex_intended=paradex_price,
+                grvt_fill=self.last_grvt_order_price or grvt_price,
+                paradex_fill=self.last_paradex_fill or (paradex_ask if direction == "GRVT_SHORT" else paradex_bid),
+            )
 
-            wait_time = random.randint(600, 1200)  # 600-1200 秒 = 10-20 分钟
-            expire_time = datetime.now() + timedelta(seconds=wait_time)
+            exit_state = None
+            hold_seconds = None
+            if self.exit_policy is not None:
+                # 开仓成本（手续费 + 滑点）从组合盈亏中扣除，收敛目标为当前价差均值
+                edge = self.last_edge or {}
+                cost = (edge.get('fees') or 0.0) + (edge.get('slippage') or 0.0)
+                fair = self.spread_stats.mean if self.spread_stats.is_ready else 0.0
+                exit_state = self.exit_policy.open(price_diff, size, fair=fair, cost=cost)
+                hold_seconds = int(self.exit_policy.max_hold)
 
-            print(f"\n⏳ 随机等待 {wait_time} 秒 ({wait_time / 60:.1f} 分钟) 后关仓易...")
-            print("┌────────────────────────────────────────────")
-            print(f"│ 当前时间   : \033[96m{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\033[0m")
-            print(f"│ 到期时间   : \033[93m{expire_time.strftime('%Y-%m-%d %H:%M:%S')}\033[0m")
-            print(f"│ 剩余时间   : \033[92m{wait_time // 60:02d}分 {wait_time % 60:02d}秒\033[0m")
-            print("└────────────────────────────────────────────")
+            lot = self.lots.open(direction, size, price_diff, cycle, notional,
+                                 hold_seconds=hold_seconds, exit_state=exit_state)
+            print(f"📦 新增仓位 {lot.describe()}，当前共 {len(self.lots.active)} 笔")
 
-            await asyncio.sleep(wait_time)
+            return True
 
-            # 开仓成功后，关闭持仓
-            print("\n" + "=" * 60)
-            print("步骤 2: 关闭持仓")
-            print("=" * 60)
+        except Exception as e:
+            print(f"❌ 执行开仓失败: {e}")
+            return False
+
+    def _make_lot_manager(self, lot: HedgeLot) -> PositionManager:
+        """为一笔仓位创建持仓管理器，平仓和记账回调绑定该仓位"""
+        return PositionManager(
+            close=lambda: self._close_lot_attempt(lot),
+            on_closed=lambda cycle: self._on_lot_closed(lot, cycle),
+            hold_range=self.hold_range,
+            cooldown_range=self.cooldown_range,
+            max_close_retries=self.max_close_retries,
+        )
+
+    async def _close_lot_attempt(self, lot: HedgeLot) -> bool:
+        """
+        持仓管理器的一次平仓尝试：只剩这一笔仓位时平掉本品种全部持仓，否则只平这一笔
+        （强制平仓的仓位由 LotBook 转去等待风控强制平仓，不会调用这里）
+        """
+        # 等待正在进行的下单流程结束，避免同时操作页面
+        while self.is_trading:
+            await asyncio.sleep(0.2)
 
-            max_retries = 500
-            retry_interval = 3  # 秒
+        self.is_trading = True
+        try:
+            if not lot.grvt_closed_size and self.lots.active == [lot] and not self.lots.stuck:
+                return await self.close_existing_positions(
+                    self.max_close_price_diff,
+                    accept_profit=lot.exit_reason in (CONVERGED, TRAILING_STOP),
+                )
+            return await self.close_lot_positions(lot)
+        finally:
+            self.is_trading = False
 
-            for attempt in range(1, max_retries + 1):
-                if await self.close_existing_positions(self.max_close_price_diff):
-                    print(f"✅ 关闭持仓成功 (第{attempt}次尝试)")
-                    break
+    async def close_lot_positions(self, lot: HedgeLot) -> bool:
+        """
+        逐笔平仓：GRVT 按中间价挂剩余数量的反向限价单，Paradex 按 GRVT 实际平掉的数量市价反向，
+        其余仓位保持不动
+
+        Args:
+            lot: 要平掉的仓位
+
+        Returns:
+            bool: 是否平仓成功（GRVT 平仓单超时只部分成交时，先平掉 Paradex 对应数量，重试只平剩余部分）
+        """
+        try:
+            print(f"\n🔄 逐笔平仓 {lot.describe()}")
+
+            grvt_mid, paradex_mid = await asyncio.gather(self.get_grvt_mid_price(), self.get_paradex_mid_price())
+            grvt_close_price = round(grvt_mid, 5) if grvt_mid else None
+            if not lot.grvt_closed_size:
+                self.last_close_info = {
+                    'realized_pnl': None,
+                    'grvt_price': grvt_close_price,
+                }
+            self.last_close_info.update({
+                'paradex_price': paradex_mid,
+                'paradex_quote': self.last_paradex_quote,
+            })
+
+            grvt_short = lot.direction == "GRVT_SHORT"
+
+            grvt_done = True
+            remaining = lot.grvt_remaining
+            if remaining > 0:
+                if grvt_close_price is None:
+                    print("❌ 无法获取 GRVT 价格")
+                    return False
+
+                baseline = await self.grvt_position_size()
+                if baseline is None:
+                    print("❌ 读取 GRVT 持仓失败")
+                    return False
+
+                print(f"\n[1/2] GRVT {'开多' if grvt_short else '开空'} {remaining} 平掉该笔仓位...")
+                if not await self.grvt_bot.place_limit_order("BUY" if grvt_short else "SELL", remaining, grvt_close_price):
+                    print("❌ GRVT 平仓订单提交失败")
+                    return False
+
+                max_wait = 10
+                for i in range(max_wait):
+                    await asyncio.sleep(1)
+                    size = await self.grvt_position_size()
+                    if size is not None and abs(abs(size - baseline) - remaining) <= lot.size * 1e-6:
+                        print(f"✅ GRVT 平仓订单已成交（等待 {i + 1} 秒）")
+                        lot.grvt_closed_size = lot.size
+                        break
                 else:
-                    if attempt < max_retries:
-                        print(f"❌ 关闭持仓失败 (第{attempt}/{max_retries}次)，{retry_interval}秒后重试...")
-                        await asyncio.sleep(retry_interval)
-                    else:
-                        print(f"❌ 已达到最大重试次数({max_retries})，关闭持仓失败")
+                    print("⚠️ GRVT 平仓订单超时未完全成交，撤单后按实际成交数量平 Paradex")
+                    filled = await self.grvt_timeout_fill(baseline)
+                    if filled is None:
                         return False
+                    lot.grvt_closed_size += min(filled, remaining)
+                    grvt_done = False
+
+            # Paradex 只平 GRVT 已经平掉的数量，两腿始终保持对冲
+            paradex_amount = round(lot.grvt_closed_size - lot.paradex_closed_size, 10)
+            if paradex_amount > 0:
+                print(f"\n[2/2] Paradex 市价{'卖出' if grvt_short else '买入'} {paradex_amount}...")
+                side = "SELL" if grvt_short else "BUY"
+                if not await self.paradex_trader.place_market_order(side, paradex_amount):
+                    print("❌ Paradex 平仓失败")
+                    return False
+                lot.paradex_closed_size = lot.grvt_closed_size
 
+            if not grvt_done or lot.grvt_remaining > 0:
+                print(f"⚠️ 仓位 #{lot.lot_id} 已平 {lot.grvt_closed_size}/{lot.size}，剩余部分重试")
+                return False
 
-            # 随机等待 3-5 分钟后继续下一次
-            wait_time = random.randint(180, 300)  # 180-300 秒 = 3-5 分钟
-            print(f"\n⏳ 随机等待 {wait_time} 秒 ({wait_time / 60:.1f} 分钟) 后继续下一次交易...")
-            await asyncio.sleep(wait_time)
-
+            print(f"✅ 仓位 #{lot.lot_id} 已平仓")
             return True
 
         except Exception as e:
-            print(f"❌ 检查和执行对冲失败: {e}")
+            print(f"❌ 逐笔平仓失败: {e}")
             return False
 
+    def _on_lot_closed(self, lot: HedgeLot, cycle: Optional[dict]):
+        """一笔仓位平仓成功：记账并释放该笔的账户级风控额度"""
+        if cycle is not None:
+            exit_bid, exit_ask = self.last_close_info.get('paradex_quote', (None, None))
+            cycle = self.ledger.close_cycle(
+                cycle,
+                grvt_intended=self.last_close_info.get('grvt_price'),
+                paradex_intended=self.last_close_info.get('paradex_price'),
+                grvt_fill=self.last_close_info.get('grvt_price'),
+                paradex_fill=exit_bid if cycle['direction'] == "GRVT_SHORT" else exit_ask,
+                realized_pnl=self.last_close_info.get('realized_pnl'),
+                exit_reason=lot.exit_reason,
+            )
+            print(f"📒 周期 #{cycle['cycle_id']}: 毛盈亏 ${cycle['gross_pnl']:.4f}，"
+                  f"手续费 ${cycle['fees']:.4f}，净盈亏 ${cycle['net_pnl']:.4f}")
+        lot.exit_state = None
+        if self.account_risk:
+            self.account_risk.release(self.asset, lot.notional)
+
     async def start_monitoring(self):
         """开始监控价格并自动执行对冲"""
         try:
@@ -478,29 +1428,35 @@ class HedgeTradingBot:
             print("\n" + "=" * 60)
             print("🤖 对冲交易机器人已启动")
             print("=" * 60)
+            print(f"  交易品种: GRVT {self.grvt_symbol} ↔ Paradex {self.paradex_symbol}")
             print(f"  价差阈值: ${self.price_diff_threshold:.2f}")
             print(f"  订单大小: {self.order_size}")
             print(f"  检查间隔: {self.check_interval}秒")
             print("=" * 60)
 
+            if not await self.verify_account_settings():
+                print("❌ 账户设置校验失败，停止监控")
+                return
+
             print("\n按 Ctrl+C 停止监控\n")
 
-            while self.is_running:
-                try:
-                    await self.check_and_execute_hedge()
-                    print(f"\n⏳ 等待 {self.check_interval} 秒后继续监控...\n")
-                    await asyncio.sleep(self.check_interval)
+            self.exposure_reconciler.start()
+            self.liquidation_monitor.start()
 
-                except KeyboardInterrupt:
-                    raise
-                except Exception as e:
-                    print(f"❌ 循环中发生错误: {e}")
-                    await asyncio.sleep(self.check_interval)
+            # 报价、信号和执行各自运行，执行一笔下单时报价和信号照常更新
+            await self.pipeline.start()
 
         except KeyboardInterrupt:
             print("\n\n收到停止信号...")
             self.is_running = False
         finally:
+            await self.pipeline.stop()
+            await self.lots.stop()
+            await self.exposure_reconciler.stop()
+            await self.liquidation_monitor.stop()
+            if self.force_closing:
+                # 不取消进行中的强制平仓，等它完成
+                await self.force_close_task
             self.print_statistics()
 
     def print_statistics(self):
@@ -514,39 +1470,901 @@ class HedgeTradingBot:
         if self.total_trades > 0:
             success_rate = (self.successful_trades / self.total_trades) * 100
             print(f"  成功率: {success_rate:.1f}%")
+        stats = self.pipeline.stats()
+        print(f"  报价/信号/执行: {stats['quotes']}/{stats['signals']}/{stats['executed']}"
+              f"（覆盖报价 {stats['dropped_quotes']}，覆盖信号 {stats['dropped_signals']}，过期信号 {stats['stale_signals']}）")
+        if self.paradex_maker_timeout is not None:
+            print(f"  Paradex 挂单成交/市价补齐: {self.maker_fills}/{self.taker_fallbacks}")
+        print("-" * 60)
+        self.ledger.print_summary()
+        if self.ledger_path and self.ledger.cycles:
+            self.ledger.export_csv(self.ledger_path)
         print("=" * 60 + "\n")
 
 
-# ==================== 浏览器配置 ====================
+# ==================== 多品种配置 ====================
+
+# GRVT 产品 ↔ Paradex 市场
+SYMBOL_MAP = {
+    "BTC-USDT": "BTC-USD-PERP",
+    "ETH-USDT": "ETH-USD-PERP",
+    "SOL-USDT": "SOL-USD-PERP",
+}
+
+GRVT_TRADE_URL = "https://grvt.io/exchange/perpetual/{symbol}"
+PARADEX_TRADE_URL = "https://app.paradex.trade/trade/{symbol}"
+
+# 交易页面的资源拦截与 K 线图隐藏配置，设为 None 则按原样加载页面
+RENDER_PROFILE: Optional[RenderProfile] = RenderProfile()
+
+# 每个交易页面使用独立窗口，避免处于后台的标签页被 Chromium 降频导致报价滞后
+SEPARATE_WINDOWS = True
+
+
+async def new_trading_page(context, new_window: Optional[bool] = None):
+    """
+    打开一个新的交易页面，并按 RENDER_PROFILE 降低渲染开销
+
+    Args:
+        new_window: 是否在独立窗口中打开，None 时使用 SEPARATE_WINDOWS
+    """
+    if new_window is None:
+        new_window = SEPARATE_WINDOWS
+    page = await open_window(context) if new_window else await context.new_page()
+    if RENDER_PROFILE is not None:
+        await RENDER_PROFILE.apply(page)
+    return page
+
+
+# 持仓/委托面板页面的 window.name 标记：连接已运行的浏览器时，面板页面只复用为面板，不会被当作交易页面
+PANEL_PAGE_NAME = "hedge-panel"
+
+
+def same_page_url(page, url: str) -> bool:
+    """页面是否停留在该地址（忽略查询参数和末尾斜杠）"""
+    return page.url.split('?')[0].rstrip('/') == url.rstrip('/')
+
+
+async def is_panel_page(page) -> bool:
+    """页面是否是带标记的持仓/委托面板页面"""
+    try:
+        return await page.evaluate("() => window.name") == PANEL_PAGE_NAME
+    except Exception:
+        return False
 
-async def create_browser_context(playwright):
-    """创建浏览器上下文"""
-    workid = 44
-    proxy = "127.0.0.1:7890" if workid == 44 else f"127.0.0.1:400{workid}"
-    user_data = r"D:\1lumao\Workers\\"
 
+async def get_trading_page(context, url: str, reuse: bool = True, panel: bool = False) -> Tuple[AsyncPage, bool]:
+    """
+    获取交易页面：优先复用上下文中已打开同一地址的页面（连接已运行的浏览器时），否则新开并导航
+
+    Args:
+        panel: 是否为面板页面；面板页面新开后打上标记，复用时只匹配同类页面
+
+    Returns:
+        (page, reused): 页面，以及是否复用了已加载的页面
+    """
+    if reuse:
+        for page in context.pages:
+            if same_page_url(page, url) and await is_panel_page(page) == panel:
+                if RENDER_PROFILE is not None:
+                    await RENDER_PROFILE.apply(page)
+                print(f"✓ 复用已打开的页面: {url}")
+                return page, True
+
+    page = await new_trading_page(context)
+    await page.goto(url)
+    if panel:
+        # window.name 在同一标签页内跨导航保留
+        await page.evaluate(f"() => {{ window.name = '{PANEL_PAGE_NAME}'; }}")
+    return page, False
+
+
+async def wait_trading_pages_ready(
+        grvt_page: AsyncPage,
+        paradex_page: AsyncPage,
+        timeout: int = 30000,
+        started: Optional[float] = None,
+        label: str = "",
+) -> Dict[str, Optional[float]]:
+    """
+    并发等待 GRVT 和 Paradex 页面就绪（订单簿、下单表单均已渲染），并打印每个页面的就绪耗时
+
+    Args:
+        timeout: 每个页面的超时时间（毫秒）
+        started: 计时起点 time.perf_counter()，通常为开始导航的时间；None 时从现在开始
+        label: 日志前缀（例如品种名）
+
+    Returns:
+        dict: {"grvt": 就绪耗时（秒）, "paradex": 就绪耗时（秒）}，未就绪的页面为 None
+    """
+    started = time.perf_counter() if started is None else started
+
+    async def timed(probe) -> Optional[float]:
+        return time.perf_counter() - started if await probe else None
+
+    grvt_seconds, paradex_seconds = await asyncio.gather(
+        timed(GrvtTradingBot(grvt_page).wait_for_page_ready(timeout=timeout, quiet=True)),
+        timed(ParadexTrader(paradex_page).wait_for_page_ready(timeout=timeout, settle_delay=0, quiet=True)),
+    )
+
+    ready_times = {"grvt": grvt_seconds, "paradex": paradex_seconds}
+    for name, seconds in (("GRVT", grvt_seconds), ("Paradex", paradex_seconds)):
+        if seconds is None:
+            print(f"❌ {label}{name} 页面未在 {timeout / 1000:.0f} 秒内就绪")
+        else:
+            print(f"✓ {label}{name} 页面就绪，耗时 {seconds:.2f} 秒")
+    return ready_times
+
+
+async def open_symbol_bots(
+        context,
+        grvt_symbols,
+        account_risk: AccountRiskManager,
+        order_sizes: Optional[Dict[str, float]] = None,
+        **bot_kwargs
+) -> List[HedgeTradingBot]:
+    """
+    每个品种打开一对 GRVT/Paradex 页面并创建对冲机器人，共享账户级风控
+
+    Args:
+        context: 浏览器上下文
+        grvt_symbols: 要对冲的 GRVT 产品列表（需在 SYMBOL_MAP 中）
+        account_risk: 共享的账户级风控
+        order_sizes: 每个品种的订单大小 {GRVT 产品: 数量}，未指定的品种使用 bot_kwargs 中的 order_size
+        bot_kwargs: 传给每个 HedgeTradingBot 的其他参数
+    """
+    print(f"正在并发打开 {len(grvt_symbols)} 个品种的交易页面...")
+    started = time.perf_counter()
+
+    # 所有品种的页面同时导航
+    urls = []
+    for grvt_symbol in grvt_symbols:
+        urls.append(GRVT_TRADE_URL.format(symbol=grvt_symbol))
+        urls.append(PARADEX_TRADE_URL.format(symbol=SYMBOL_MAP[grvt_symbol]))
+    pages = [page for page, _ in await asyncio.gather(*(get_trading_page(context, url) for url in urls))]
+
+    bots = []
+    for i, grvt_symbol in enumerate(grvt_symbols):
+        paradex_symbol = SYMBOL_MAP[grvt_symbol]
+        grvt_page, paradex_page = pages[2 * i], pages[2 * i + 1]
+
+        symbol_kwargs = dict(bot_kwargs)
+        if order_sizes and grvt_symbol in order_sizes:
+            symbol_kwargs['order_size'] = order_sizes[grvt_symbol]
+
+        bots.append(HedgeTradingBot(
+            grvt_page=grvt_page,
+            paradex_page=paradex_page,
+            grvt_symbol=grvt_symbol,
+            paradex_symbol=paradex_symbol,
+            account_risk=account_risk,
+            **symbol_kwargs
+        ))
+
+    # 只有两个页面都就绪的品种参与交易
+    ready_times = await asyncio.gather(*(
+        wait_trading_pages_ready(bot.grvt_bot.page, bot.paradex_trader.page, started=started,
+                                 label=f"{bot.grvt_symbol} ")
+        for bot in bots
+    ))
+    ready_bots = [bot for bot, times in zip(bots, ready_times) if None not in times.values()]
+    if len(ready_bots) < len(bots):
+        skipped = [bot.grvt_symbol for bot in bots if bot not in ready_bots]
+        print(f"⚠️ 以下品种页面未就绪，不参与交易: {skipped}")
+    return ready_bots
+
+
+async def run_multi_symbol(context, grvt_symbols, account_risk: AccountRiskManager, **bot_kwargs):
+    """每个品种运行一个监控协程，共享账户级风控"""
+    bots = await open_symbol_bots(context, grvt_symbols, account_risk, **bot_kwargs)
+    await asyncio.gather(*(bot.start_monitoring() for bot in bots))
+
+
+# ==================== 浏览器配置 ====================
+
+DEFAULT_USER_DATA_ROOT = r"D:\1lumao\Workers\\"
+DEFAULT_EXECUTABLE_PATH = r"C:\Users\中\AppData\Local\VirtualBrowser\Application\VirtualBrowser.exe"
+
+
+def quote_reader_profile(workid: int) -> str:
+    """报价总线读取方的默认用户数据目录，与发布方（默认目录）分开，避免两个进程同时打开同一个持久化配置"""
+    return DEFAULT_USER_DATA_ROOT + f"{workid}_quote_reader"
+
+
+def _default_proxy_and_profile(workid: int, proxy: Optional[str], user_data_dir: Optional[str]) -> Tuple[str, str]:
+    if proxy is None:
+        proxy = "127.0.0.1:7890" if workid == 44 else f"127.0.0.1:400{workid}"
+    if user_data_dir is None:
+        user_data_dir = DEFAULT_USER_DATA_ROOT + str(workid)
+    return proxy, user_data_dir
+
+
+def _browser_args(workid: int, remote_debugging_port: Optional[int], disable_background_throttling: bool) -> List[str]:
+    args = [
+        f'--worker-id={workid}',
+        '--disable-blink-features=AutomationControlled',
+        '--start-maximized',
+    ]
+    if remote_debugging_port:
+        args.append(f'--remote-debugging-port={remote_debugging_port}')
+    if disable_background_throttling:
+        args.extend(ANTI_THROTTLING_ARGS)
+    return args
+
+
+async def create_browser_context(
+        playwright,
+        workid: int = 44,
+        user_data_dir: Optional[str] = None,
+        proxy: Optional[str] = None,
+        executable_path: Optional[str] = DEFAULT_EXECUTABLE_PATH,
+        headless: bool = False,
+        remote_debugging_port: Optional[int] = 9222,
+        disable_background_throttling: bool = True,
+):
+    """
+    创建浏览器上下文
+
+    Args:
+        workid: 工作 ID，决定默认的用户数据目录和代理端口
+        user_data_dir: 浏览器用户数据目录，None 时为 DEFAULT_USER_DATA_ROOT + workid
+        proxy: 代理地址，None 时按 workid 推算
+        executable_path: 浏览器可执行文件路径
+        headless: 是否无头模式
+        remote_debugging_port: 远程调试端口，多个浏览器同时运行时需各不相同；None 表示不开启
+        disable_background_throttling: 是否关闭 Chromium 对后台标签页/被遮挡窗口的降频
+    """
+    proxy, user_data_dir = _default_proxy_and_profile(workid, proxy, user_data_dir)
+    args = _browser_args(workid, remote_debugging_port, disable_background_throttling)
 
     browser = await playwright.chromium.launch_persistent_context(
-        user_data_dir=user_data + str(workid),
-        executable_path=r"C:\Users\中\AppData\Local\VirtualBrowser\Application\VirtualBrowser.exe",
+        user_data_dir=user_data_dir,
+        executable_path=executable_path,
         accept_downloads=False,
-        headless=False,
+        headless=headless,
         bypass_csp=True,
         slow_mo=10,
         channel="chrome",
-        proxy={"server": proxy},
+        proxy={"server": proxy} if proxy else None,
         viewport={'width': 1560, 'height': 960},
-        args=[
-            f'--worker-id={workid}',
-            '--disable-blink-features=AutomationControlled',
-            '--remote-debugging-port=9222',
-
-            '--start-maximized',
-        ]
+        args=args
     )
     return browser
 
 
+def launch_detached_browser(
+        workid: int = 44,
+        user_data_dir: Optional[str] = None,
+        proxy: Optional[str] = None,
+        executable_path: Optional[str] = DEFAULT_EXECUTABLE_PATH,
+        remote_debugging_port: int = 9222,
+        disable_background_throttling: bool = True,
+) -> bool:
+    """
+    以独立进程启动浏览器（不随 Python 进程退出），之后可通过 attach_browser_context 反复连接
+
+    Returns:
+        bool: 是否成功启动
+    """
+    proxy, user_data_dir = _default_proxy_and_profile(workid, proxy, user_data_dir)
+    cmd = [executable_path, f'--user-data-dir={user_data_dir}']
+    cmd += _browser_args(workid, remote_debugging_port, disable_background_throttling)
+    if proxy:
+        cmd.append(f'--proxy-server={proxy}')
+
+    try:
+        if sys.platform == 'win32':
+            flags = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+            subprocess.Popen(cmd, creationflags=flags, close_fds=True)
+        else:
+            subprocess.Popen(cmd, start_new_session=True, close_fds=True,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        print(f"✓ 已在后台启动浏览器（调试端口 {remote_debugging_port}）")
+        return True
+    except Exception as e:
+        print(f"❌ 启动浏览器失败: {e}")
+        return False
+
+
+async def attach_browser_context(
+        playwright,
+        remote_debugging_port: int = 9222,
+        launch_if_missing: bool = True,
+        launch_timeout: float = 30,
+        **launch_kwargs
+):
+    """
+    通过 CDP 连接已运行的浏览器，复用其中已登录、已加载的页面；
+    连接不上且 launch_if_missing 为 True 时先以独立进程启动浏览器再连接
+
+    Args:
+        remote_debugging_port: 浏览器的远程调试端口
+        launch_if_missing: 浏览器未运行时是否自动启动
+        launch_timeout: 启动后等待调试端口可用的最长时间（秒）
+        launch_kwargs: 传给 launch_detached_browser 的参数
+
+    Returns:
+        BrowserContext: 浏览器的默认上下文，失败返回 None
+    """
+    endpoint = f"http://127.0.0.1:{remote_debugging_port}"
+    try:
+        browser = await playwright.chromium.connect_over_cdp(endpoint)
+    except Exception:
+        if not launch_if_missing or not launch_detached_browser(
+                remote_debugging_port=remote_debugging_port, **launch_kwargs):
+            print(f"❌ 无法连接浏览器: {endpoint}")
+            return None
+
+        browser = None
+        deadline = time.time() + launch_timeout
+        while browser is None and time.time() < deadline:
+            await asyncio.sleep(0.5)
+            try:
+                browser = await playwright.chromium.connect_over_cdp(endpoint)
+            except Exception:
+                pass
+        if browser is None:
+            print(f"❌ 浏览器启动后仍无法连接: {endpoint}")
+            return None
+
+    context = browser.contexts[0] if browser.contexts else await browser.new_context()
+    print(f"✓ 已连接浏览器 {endpoint}（{len(context.pages)} 个页面）")
+    return context
+
+
+async def release_browser_context(context, attached: bool):
+    """结束时释放浏览器：连接模式只断开连接、保留浏览器和页面，启动模式关闭浏览器"""
+    try:
+        if attached:
+            await context.browser.close()
+        else:
+            await context.close()
+    except Exception as e:
+        print(f"⚠️ 关闭浏览器出错: {e}")
+
+
+# ==================== 多账号集群 ====================
+
+def load_fleet_workers(path: str) -> List[dict]:
+    """
+    从 JSON 文件读取集群工作者定义，格式示例：
+
+    [
+        {
+            "name": "w44",
+            "workid": 44,
+            "user_data_dir": "D:\\1lumao\\Workers\\44",
+            "proxy": "127.0.0.1:7890",
+            "remote_debugging_port": 9244,
+            "symbols": {"BTC-USDT": 0.002, "ETH-USDT": 0.05},
+            "max_open_hedges": 2,
+            "bot": {"price_diff_threshold": 10, "check_interval": 5}
+        }
+    ]
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        workers = json.load(f)
+
+    for i, worker in enumerate(workers):
+        worker.setdefault('name', f"worker-{i + 1}")
+        worker.setdefault('workid', 44)
+        worker.setdefault('symbols', {"BTC-USDT": 0.002})
+        unknown = [sym for sym in worker['symbols'] if sym not in SYMBOL_MAP]
+        if unknown:
+            raise ValueError(f"{worker['name']} 含未配置的品种: {unknown}")
+
+    return workers
+
+
+def collect_bot_stats(bots: List[HedgeTradingBot]) -> dict:
+    """汇总一个工作者内所有机器人的交易统计"""
+    return {
+        'total_trades': sum(bot.total_trades for bot in bots),
+        'successful_trades': sum(bot.successful_trades for bot in bots),
+        'failed_trades': sum(bot.failed_trades for bot in bots),
+        'net_pnl': sum(bot.ledger.total_net_pnl for bot in bots),
+    }
+
+
+async def run_fleet_worker(worker: dict, stats_queue, stats_interval: int = 30):
+    """在当前进程中运行一个工作者：独立的 Playwright、浏览器配置和品种"""
+    async with async_playwright() as playwright:
+        context = await create_browser_context(
+            playwright,
+            workid=worker['workid'],
+            user_data_dir=worker.get('user_data_dir'),
+            proxy=worker.get('proxy'),
+            executable_path=worker.get('executable_path', DEFAULT_EXECUTABLE_PATH),
+            headless=worker.get('headless', False),
+            remote_debugging_port=worker.get('remote_debugging_port'),
+        )
+
+        try:
+            symbols = worker['symbols']
+            bots = await open_symbol_bots(
+                context,
+                list(symbols),
+                AccountRiskManager(max_open_hedges=worker.get('max_open_hedges', len(symbols))),
+                order_sizes=symbols,
+                **worker.get('bot', {})
+            )
+            if not bots:
+                # 非零退出码交给监督者按 restart_delay / max_restarts 重启
+                raise RuntimeError(f"工作者 {worker['name']} 没有任何品种的页面就绪")
+
+            async def report_stats():
+                while True:
+                    stats_queue.put((worker['name'], collect_bot_stats(bots)))
+                    await asyncio.sleep(stats_interval)
+
+            reporter = asyncio.create_task(report_stats())
+            try:
+                await asyncio.gather(*(bot.start_monitoring() for bot in bots))
+            finally:
+                reporter.cancel()
+                stats_queue.put((worker['name'], collect_bot_stats(bots)))
+        finally:
+            await context.close()
+
+
+def fleet_worker_entry(worker: dict, stats_queue):
+    """工作者子进程入口"""
+    try:
+        asyncio.run(run_fleet_worker(worker, stats_queue))
+    except KeyboardInterrupt:
+        pass
+
+
+class FleetSupervisor:
+    """集群监督者：每个工作者一个进程，崩溃自动重启，并汇总统计"""
+
+    def __init__(self, workers: List[dict], max_restarts: int = 5, restart_delay: float = 10,
+                 check_interval: float = 5, report_interval: float = 60):
+        """
+        Args:
+            workers: 工作者定义列表（见 load_fleet_workers）
+            max_restarts: 每个工作者的最大重启次数
+            restart_delay: 崩溃后重启前的等待时间（秒）
+            check_interval: 进程存活检查间隔（秒）
+            report_interval: 汇总统计打印间隔（秒）
+        """
+        self.workers = {worker['name']: worker for worker in workers}
+        self.max_restarts = max_restarts
+        self.restart_delay = restart_delay
+        self.check_interval = check_interval
+        self.report_interval = report_interval
+
+        # spawn 方式启动，子进程不继承父进程的事件循环和 Playwright 状态
+        self.mp = multiprocessing.get_context("spawn")
+        self.stats_queue = self.mp.Queue()
+
+        self.processes: Dict[str, multiprocessing.Process] = {}
+        self.restarts: Dict[str, int] = {name: 0 for name in self.workers}
+        self.crashed_at: Dict[str, float] = {}
+        self.worker_stats: Dict[str, dict] = {}
+
+    def start_worker(self, name: str):
+        """启动一个工作者进程"""
+        process = self.mp.Process(
+            target=fleet_worker_entry,
+            args=(self.workers[name], self.stats_queue),
+            name=f"fleet-{name}",
+            daemon=False,
+        )
+        process.start()
+        self.processes[name] = process
+        print(f"🚀 工作者 {name} 已启动 (pid={process.pid})")
+
+    def drain_stats(self):
+        """读取子进程上报的统计"""
+        while True:
+            try:
+                name, stats = self.stats_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.worker_stats[name] = stats
+
+    def check_workers(self):
+        """检查进程状态，崩溃的工作者在等待 restart_delay 后重启"""
+        now = time.time()
+        for name, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+
+            if process.exitcode == 0:
+                print(f"ℹ️ 工作者 {name} 已正常退出")
+                self.processes.pop(name)
+                continue
+
+            if name not in self.crashed_at:
+                self.crashed_at[name] = now
+                print(f"❌ 工作者 {name} 崩溃 (exitcode={process.exitcode})")
+
+            if self.restarts[name] >= self.max_restarts:
+                print(f"⛔ 工作者 {name} 重启次数已达上限 {self.max_restarts}，不再重启")
+                self.processes.pop(name)
+                continue
+
+            if now - self.crashed_at[name] >= self.restart_delay:
+                self.restarts[name] += 1
+                self.crashed_at.pop(name)
+                print(f"🔁 重启工作者 {name}（第{self.restarts[name]}次）")
+                self.start_worker(name)
+
+    def aggregate_stats(self) -> dict:
+        """汇总所有工作者的统计"""
+        total = {'total_trades': 0, 'successful_trades': 0, 'failed_trades': 0, 'net_pnl': 0.0}
+        for stats in self.worker_stats.values():
+            for key in total:
+                total[key] += stats.get(key, 0)
+        return total
+
+    def print_stats(self):
+        """打印集群统计"""
+        total = self.aggregate_stats()
+        alive = sum(1 for process in self.processes.values() if process.is_alive())
+        print("\n" + "=" * 60)
+        print(f"📊 集群统计（存活 {alive}/{len(self.workers)}）")
+        print("=" * 60)
+        for name, stats in sorted(self.worker_stats.items()):
+            print(f"  {name:<12} 交易 {stats['total_trades']:>4} | 成功 {stats['successful_trades']:>4} | "
+                  f"失败 {stats['failed_trades']:>4} | 净盈亏 ${stats['net_pnl']:.4f} | 重启 {self.restarts[name]}")
+        print("-" * 60)
+        print(f"  合计         交易 {total['total_trades']:>4} | 成功 {total['successful_trades']:>4} | "
+              f"失败 {total['failed_trades']:>4} | 净盈亏 ${total['net_pnl']:.4f}")
+        print("=" * 60 + "\n")
+
+    def stop(self):
+        """终止所有工作者进程"""
+        for name, process in self.processes.items():
+            if process.is_alive():
+                print(f"⏹️ 停止工作者 {name}")
+                process.terminate()
+        for process in self.processes.values():
+            process.join(timeout=10)
+
+    def run(self):
+        """启动所有工作者并持续监督，Ctrl+C 停止"""
+        for name in self.workers:
+            self.start_worker(name)
+
+        last_report = time.time()
+        try:
+            while self.processes:
+                time.sleep(self.check_interval)
+                self.drain_stats()
+                self.check_workers()
+
+                if time.time() - last_report >= self.report_interval:
+                    self.print_stats()
+                    last_report = time.time()
+        except KeyboardInterrupt:
+            print("\n收到停止信号，正在停止所有工作者...")
+        finally:
+            self.stop()
+            self.drain_stats()
+            self.print_stats()
+
+
+# ==================== 服务模式（无交互） ====================
+
+SERVICE_MODES = ('hedge', 'monitor', 'watch')
+
+# 服务模式配置的默认值；bot 中的参数原样传给 HedgeTradingBot
+SERVICE_DEFAULTS = {
+    'mode': 'monitor',
+    'grvt_symbol': 'BTC-USDT',
+    'workid': 44,
+    'user_data_dir': None,
+    'proxy': None,
+    'executable_path': DEFAULT_EXECUTABLE_PATH,
+    'headless': False,
+    'remote_debugging_port': 9222,
+    'attach': False,
+    'page_pool': False,
+    'panel_pages': False,
+    'watch_interval': 5,
+    'shutdown_grace': 60,
+    # 共享内存报价总线名称；publish_quotes 为 True 时本进程创建总线并发布报价，否则连接已有总线读取
+    'quote_bus': None,
+    'publish_quotes': False,
+    'bot': {},
+}
+
+# 环境变量前缀：HEDGE_MODE=watch、HEDGE_HEADLESS=true、HEDGE_BOT_ORDER_SIZE=0.003
+SERVICE_ENV_PREFIX = "HEDGE_"
+
+
+def _parse_value(text: str):
+    """把环境变量/命令行中的字符串按 JSON 解析（数字、true/false、null），解析失败保留字符串"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def load_service_config(argv: Optional[List[str]] = None, environ: Optional[Dict[str, str]] = None) -> dict:
+    """
+    读取服务模式配置，优先级：命令行 > 环境变量 > 配置文件 > 默认值
+
+    Args:
+        argv: 命令行参数（不含程序名）
+        environ: 环境变量，None 时使用 os.environ
+
+    Returns:
+        dict: 配置
+    """
+    parser = argparse.ArgumentParser(description="GRVT vs Paradex 对冲机器人（服务模式）")
+    parser.add_argument('--config', help="JSON 配置文件路径")
+    parser.add_argument('--mode', choices=SERVICE_MODES, help="hedge: 单次对冲 / monitor: 自动监控 / watch: 仅看价格")
+    parser.add_argument('--symbol', dest='grvt_symbol', help=f"GRVT 品种（{', '.join(SYMBOL_MAP)}）")
+    parser.add_argument('--workid', type=int)
+    parser.add_argument('--user-data-dir', dest='user_data_dir')
+    parser.add_argument('--proxy')
+    parser.add_argument('--port', dest='remote_debugging_port', type=int, help="远程调试端口")
+    parser.add_argument('--headless', action='store_true', default=None, help="无头模式")
+    parser.add_argument('--attach', action='store_true', default=None, help="通过 CDP 连接已运行的浏览器")
+    parser.add_argument('--page-pool', dest='page_pool', action='store_true', default=None, help="启用热备页面池")
+    parser.add_argument('--panel-pages', dest='panel_pages', action='store_true', default=None,
+                        help="持仓/委托使用独立页面")
+    parser.add_argument('--quote-bus', dest='quote_bus', help="共享内存报价总线名称")
+    parser.add_argument('--publish-quotes', dest='publish_quotes', action='store_true', default=None,
+                        help="创建报价总线并发布本进程抓取的报价")
+    parser.add_argument('--set', dest='bot_overrides', action='append', default=[], metavar="KEY=VALUE",
+                        help="机器人参数，例如 --set order_size=0.003，可重复")
+    args = parser.parse_args(argv)
+
+    config = dict(SERVICE_DEFAULTS)
+    config['bot'] = {}
+
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            file_config = json.load(f)
+        config['bot'].update(file_config.pop('bot', {}))
+        config.update(file_config)
+
+    environ = os.environ if environ is None else environ
+    for key, text in environ.items():
+        if not key.startswith(SERVICE_ENV_PREFIX):
+            continue
+        name = key[len(SERVICE_ENV_PREFIX):].lower()
+        if name.startswith('bot_'):
+            config['bot'][name[len('bot_'):]] = _parse_value(text)
+        elif name in SERVICE_DEFAULTS:
+            config[name] = _parse_value(text)
+
+    for name, value in vars(args).items():
+        if name not in ('config', 'bot_overrides') and value is not None:
+            config[name] = value
+    for item in args.bot_overrides:
+        key, _, text = item.partition('=')
+        config['bot'][key.strip()] = _parse_value(text)
+
+    if config['mode'] not in SERVICE_MODES:
+        raise ValueError(f"未知模式: {config['mode']}（可选 {', '.join(SERVICE_MODES)}）")
+    if config['grvt_symbol'] not in SYMBOL_MAP:
+        raise ValueError(f"未配置的品种: {config['grvt_symbol']}")
+    return config
+
+
+def install_shutdown_handlers(stop_event: asyncio.Event):
+    """SIGINT/SIGTERM 到来时设置 stop_event，由主流程按顺序收尾"""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows 事件循环不支持 add_signal_handler
+            signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop_event.set))
+
+
+async def stop_bot_gracefully(bot: HedgeTradingBot, task: asyncio.Task, grace: float = 60):
+    """
+    停止监控任务：先让主循环自然退出，下单/平仓流程进行中时最多等待 grace 秒，再取消任务
+
+    Args:
+        bot: 对冲机器人
+        task: 运行 start_monitoring 的任务
+        grace: 等待下单流程结束的最长时间（秒）
+    """
+    bot.is_running = False
+
+    deadline = time.time() + grace
+    while bot.is_trading and not task.done() and time.time() < deadline:
+        await asyncio.sleep(0.5)
+    if bot.is_trading:
+        print("⚠️ 下单流程未在宽限时间内结束，强制停止，请检查两边持仓")
+
+    if not task.done():
+        task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def watch_quote_bus(bus_name: str, grvt_symbol: str, paradex_symbol: str,
+                          stop_event: asyncio.Event, interval: float = 5) -> int:
+    """
+    仅看价格的报价总线读取方：直接从共享内存读取两边报价并打印价差，不启动浏览器
+
+    Returns:
+        int: 进程退出码，0 表示正常结束
+    """
+    try:
+        quote_bus = QuoteBus.attach(bus_name)
+    except FileNotFoundError:
+        print(f"❌ 报价总线 {bus_name} 不存在，请先启动发布方（--publish-quotes）")
+        return 1
+    print(f"✓ 已连接报价总线 {bus_name}（仅看价格，不启动浏览器）")
+
+    channels = quote_channel("grvt", grvt_symbol), quote_channel("paradex", paradex_symbol)
+    try:
+        while not stop_event.is_set():
+            mids = []
+            for channel in channels:
+                quote = quote_bus.latest(channel) if channel in quote_bus.channels else None
+                if quote and quote['bid'] and quote['ask']:
+                    mids.append((quote['bid'] + quote['ask']) / 2)
+            print(f"\n[{datetime.now().strftime('%H:%M:%S')}] [{grvt_symbol}]")
+            if len(mids) == 2:
+                grvt_price, paradex_price = mids
+                print(f"  GRVT 价格:    ${grvt_price:,.5f}")
+                print(f"  Paradex 价格: ${paradex_price:,.5f}")
+                print(f"  价差:         ${grvt_price - paradex_price:+,.5f}")
+            else:
+                print("❌ 报价总线上没有完整报价")
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+        return 0
+    finally:
+        quote_bus.close()
+
+
+async def run_service(config: dict) -> int:
+    """
+    按配置无交互运行（单次对冲 / 自动监控 / 仅看价格），收到 SIGINT/SIGTERM 时有序退出
+
+    报价总线读取方（quote_bus 且未 publish_quotes）：仅看价格时不启动浏览器；需要下单时未指定
+    user_data_dir 则使用独立的 quote_reader_profile，不与发布方共用默认的持久化配置
+
+    Returns:
+        int: 进程退出码，0 表示正常结束
+    """
+    stop_event = asyncio.Event()
+    install_shutdown_handlers(stop_event)
+
+    grvt_symbol = config['grvt_symbol']
+    paradex_symbol = SYMBOL_MAP[grvt_symbol]
+    attached = config['attach']
+
+    quote_reader = bool(config['quote_bus']) and not config['publish_quotes']
+    if quote_reader and config['mode'] == 'watch':
+        return await watch_quote_bus(config['quote_bus'], grvt_symbol, paradex_symbol,
+                                     stop_event, config['watch_interval'])
+
+    user_data_dir = config['user_data_dir']
+    if quote_reader and user_data_dir is None and not attached:
+        user_data_dir = quote_reader_profile(config['workid'])
+        print(f"ℹ️ 报价总线读取方使用独立的浏览器配置: {user_data_dir}（首次使用需登录两边账户）")
+
+    async with async_playwright() as playwright:
+        browser_kwargs = dict(
+            workid=config['workid'],
+            user_data_dir=user_data_dir,
+            proxy=config['proxy'],
+            executable_path=config['executable_path'],
+        )
+        if attached:
+            context = await attach_browser_context(
+                playwright, remote_debugging_port=config['remote_debugging_port'], **browser_kwargs)
+            if context is None:
+                return 1
+        else:
+            context = await create_browser_context(
+                playwright, headless=config['headless'],
+                remote_debugging_port=config['remote_debugging_port'], **browser_kwargs)
+
+        page_pool = None
+        quote_bus = None
+        publisher = None
+        try:
+            started = time.perf_counter()
+            (grvt_page, _), (paradex_page, _) = await asyncio.gather(
+                get_trading_page(context, GRVT_TRADE_URL.format(symbol=grvt_symbol)),
+                get_trading_page(context, PARADEX_TRADE_URL.format(symbol=paradex_symbol)),
+            )
+            ready_times = await wait_trading_pages_ready(grvt_page, paradex_page, started=started)
+            if None in ready_times.values():
+                print("❌ 交易页面未就绪，退出")
+                return 1
+
+            if config['quote_bus']:
+                grvt_channel = quote_channel("grvt", grvt_symbol)
+                paradex_channel = quote_channel("paradex", paradex_symbol)
+                if config['publish_quotes']:
+                    quote_bus = QuoteBus.create(config['quote_bus'], [grvt_channel, paradex_channel])
+                    print(f"✓ 报价总线 {config['quote_bus']} 已创建")
+                else:
+                    quote_bus = QuoteBus.attach(config['quote_bus'])
+                    print(f"✓ 已连接报价总线 {config['quote_bus']}")
+
+            bot = HedgeTradingBot(
+                grvt_page=grvt_page,
+                paradex_page=paradex_page,
+                grvt_symbol=grvt_symbol,
+                paradex_symbol=paradex_symbol,
+                quote_bus=quote_bus,
+                **config['bot']
+            )
+
+            if quote_bus is not None and config['publish_quotes']:
+                # 使用机器人自己的页面对象，热备页面池换页后发布方自动跟随
+                publisher = QuotePublisher(quote_bus, {
+                    quote_channel("grvt", grvt_symbol): bot.grvt_bot,
+                    quote_channel("paradex", paradex_symbol): bot.paradex_trader,
+                })
+                publisher.start()
+
+            if config['panel_pages']:
+                await bot.open_panel_pages(context)
+
+            if config['mode'] == 'hedge':
+                if not await bot.verify_account_settings():
+                    return 1
+                if not await bot.check_and_execute_hedge():
+                    return 1
+                # 持仓计时和平仓在后台进行，等待本周期平仓后退出
+                flat_task = asyncio.create_task(bot.lots.wait_flat())
+                stop_task = asyncio.create_task(stop_event.wait())
+                await asyncio.wait({flat_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+                flat_task.cancel()
+                stop_task.cancel()
+                await bot.lots.stop()
+                return 0
+
+            if config['mode'] == 'watch':
+                while not stop_event.is_set():
+                    await bot.get_price_difference()
+                    try:
+                        await asyncio.wait_for(stop_event.wait(), timeout=config['watch_interval'])
+                    except asyncio.TimeoutError:
+                        pass
+                return 0
+
+            if config['page_pool']:
+                page_pool = PagePool(
+                    context,
+                    page_setup=RENDER_PROFILE.apply if RENDER_PROFILE is not None else None,
+                    new_window=SEPARATE_WINDOWS,
+                )
+                await bot.attach_page_pool(page_pool)
+
+            monitor_task = asyncio.create_task(bot.start_monitoring())
+            stop_task = asyncio.create_task(stop_event.wait())
+            await asyncio.wait({monitor_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+            stop_task.cancel()
+
+            if stop_event.is_set():
+                print("\n收到停止信号，正在关闭...")
+                await stop_bot_gracefully(bot, monitor_task, config['shutdown_grace'])
+                return 0
+            return 0 if monitor_task.exception() is None else 1
+
+        except Exception as e:
+            print(f"\n❌ 发生错误: {e}")
+            import traceback
+            traceback.print_exc()
+            return 1
+        finally:
+            if publisher:
+                await publisher.stop()
+            if quote_bus:
+                quote_bus.close()
+            if page_pool:
+                await page_pool.close()
+            await release_browser_context(context, attached)
+
+
 # ==================== 主程序 ====================
 
 async def main():
@@ -557,39 +2375,73 @@ async def main():
     print("1. 单次对冲交易（手动）")
     print("2. 自动监控并对冲")
     print("3. 仅查看价格差异")
+    print("4. 多品种并发对冲")
+    print("5. 多账号集群（每个账号一个进程）")
     print("=" * 60)
 
-    choice = input("\n请选择模式 (1-3): ").strip()
+    choice = input("\n请选择模式 (1-5): ").strip()
+
+    if choice == '5':
+        fleet_path = input("请输入集群配置文件路径（默认 fleet.json）: ").strip() or "fleet.json"
+        FleetSupervisor(load_fleet_workers(fleet_path)).run()
+        return
+
+    attached = input("是否连接已运行的浏览器（调试端口 9222，未运行时后台启动）（y/N）: ").strip().lower() == 'y'
 
     # 创建浏览器（只创建一个）
     async with async_playwright() as playwright:
-        print("\n正在启动浏览器...")
+        if attached:
+            print("\n正在连接浏览器...")
+            context = await attach_browser_context(playwright)
+            if context is None:
+                return
+        else:
+            print("\n正在启动浏览器...")
+            # 创建一个浏览器上下文
+            context = await create_browser_context(playwright)
+
+        if choice == '4':
+            try:
+                symbols_text = input(f"请输入 GRVT 品种，逗号分隔（可选 {', '.join(SYMBOL_MAP)}，默认 BTC-USDT）: ").strip()
+                grvt_symbols = [sym.strip().upper() for sym in (symbols_text or "BTC-USDT").split(',') if sym.strip()]
+                unknown = [sym for sym in grvt_symbols if sym not in SYMBOL_MAP]
+                if unknown:
+                    print(f"❌ 未配置的品种: {unknown}")
+                    return
 
-        # 创建一个浏览器上下文
-        context = await create_browser_context(playwright)
+                price_diff_threshold = float(input("请输入价差阈值（美元，默认10）: ").strip() or "10")
+                order_size = float(input("请输入订单大小（默认0.002）: ").strip() or "0.002")
+                max_open_hedges = int(input(f"请输入同时对冲的品种数上限（默认{len(grvt_symbols)}）: ").strip() or len(grvt_symbols))
 
-        # 创建两个标签页
-        grvt_page = await context.new_page()
-        paradex_page = await context.new_page()
+                await run_multi_symbol(
+                    context,
+                    grvt_symbols,
+                    AccountRiskManager(max_open_hedges=max_open_hedges),
+                    price_diff_threshold=price_diff_threshold,
+                    order_size=order_size,
+                )
+            except KeyboardInterrupt:
+                print("\n收到中断信号，正在关闭...")
+            finally:
+                await release_browser_context(context, attached)
+            return
 
         try:
-            # 打开两个交易页面
-            print("正在打开GRVT交易页面...")
+            # 同时打开两个交易页面
+            print("正在打开GRVT和Paradex交易页面...")
             # await grvt_page.goto("https://testnet.grvt.io/exchange/perpetual/BTC-USDT")
-            # # await grvt_page.wait_for_load_state("networkidle")
-            #
-            # print("正在打开Paradex交易页面...")
             # await paradex_page.goto("https://app.testnet.paradex.trade/trade/BTC-USD-PERP")
+            started = time.perf_counter()
+            (grvt_page, _), (paradex_page, _) = await asyncio.gather(
+                get_trading_page(context, GRVT_TRADE_URL.format(symbol="BTC-USDT")),
+                get_trading_page(context, PARADEX_TRADE_URL.format(symbol="BTC-USD-PERP")),
+            )
 
-            await grvt_page.goto("https://grvt.io/exchange/perpetual/BTC-USDT")
-            # await grvt_page.wait_for_load_state("networkidle")
-
-            print("正在打开Paradex交易页面...")
-            await paradex_page.goto("https://app.paradex.trade/trade/BTC-USD-PERP")
-            # await paradex_page.wait_for_load_state("networkidle")
-
-            # await paradex_page.pause()
-            await asyncio.sleep(3)
+            # 订单簿和下单表单都渲染完成后才开始交易
+            ready_times = await wait_trading_pages_ready(grvt_page, paradex_page, started=started)
+            if None in ready_times.values():
+                print("❌ 交易页面未就绪，退出")
+                return
 
             # 创建对冲机器人
             if choice == '1':
@@ -605,7 +2457,10 @@ async def main():
                     order_size=order_size
                 )
 
-                await bot.check_and_execute_hedge()
+                if await bot.verify_account_settings() and await bot.check_and_execute_hedge():
+                    # 持仓计时和平仓在后台进行，等待本周期平仓
+                    await bot.lots.wait_flat()
+                    await bot.lots.stop()
 
             elif choice == '2':
                 # 自动监控
@@ -613,16 +2468,50 @@ async def main():
                 order_size = float(input("请输入订单大小（默认0.002）: ").strip() or "0.002")
                 check_interval = int(input("请输入检查间隔（秒，默认5）: ").strip() or "5")
                 max_close_price_diff = float(input("请输入平仓时允许的最大价差（美元，默认1）: ").strip() or "1")
+                auto_flatten = input("净敞口超出容差时是否自动平衡（y/N）: ").strip().lower() == 'y'
+                leverage_text = input("请输入 GRVT 杠杆倍数（留空不校验）: ").strip()
+                ledger_path = input("请输入账本导出路径（CSV，留空不导出）: ").strip() or None
+                use_page_pool = input("是否启用热备页面池（y/N）: ").strip().lower() == 'y'
+                use_panel_pages = input("是否为持仓/委托使用独立页面（y/N）: ").strip().lower() == 'y'
+                entry_k_text = input("自适应开仓阈值的 σ 倍数（留空使用固定阈值）: ").strip()
+                maker_timeout_text = input("Paradex 挂单等待秒数（双边挂单模式，留空为市价）: ").strip()
+                max_lots = int(input("同时持有的最大仓位数（默认1）: ").strip() or "1")
+                ladder_step = 5.0
+                if max_lots > 1:
+                    ladder_step = float(input("加仓阶梯：价差每再扩大多少美元加一笔（默认5）: ").strip() or "5")
                 bot = HedgeTradingBot(
                     grvt_page=grvt_page,
                     paradex_page=paradex_page,
                     price_diff_threshold=price_diff_threshold,
                     order_size=order_size,
                     check_interval=check_interval,
-                    max_close_price_diff = max_close_price_diff
+                    max_close_price_diff = max_close_price_diff,
+                    auto_flatten=auto_flatten,
+                    leverage=int(leverage_text) if leverage_text else None,
+                    ledger_path=ledger_path,
+                    adaptive_thresholds={'entry_k': float(entry_k_text)} if entry_k_text else None,
+                    max_lots=max_lots,
+                    ladder_step=ladder_step,
+                    paradex_maker_timeout=float(maker_timeout_text) if maker_timeout_text else None,
                 )
 
-                await bot.start_monitoring()
+                if use_panel_pages:
+                    await bot.open_panel_pages(context)
+
+                page_pool = None
+                if use_page_pool:
+                    page_pool = PagePool(
+                        context,
+                        page_setup=RENDER_PROFILE.apply if RENDER_PROFILE is not None else None,
+                        new_window=SEPARATE_WINDOWS,
+                    )
+                    await bot.attach_page_pool(page_pool)
+
+                try:
+                    await bot.start_monitoring()
+                finally:
+                    if page_pool:
+                        await page_pool.close()
 
             elif choice == '3':
                 # 仅查看价格
@@ -633,6 +2522,13 @@ async def main():
 
                 print("\n监控价格中，按 Ctrl+C 停止...\n")
                 try:
+                    # 先对比两个页面的报价刷新节奏，确认没有页面被后台降频
+                    await compare_update_cadence({
+                        "GRVT": (grvt_page, QUOTE_SELECTORS["grvt"]),
+                        "Paradex": (paradex_page, QUOTE_SELECTORS["paradex"]),
+                    }, duration=15)
+                    # 各交易所热路径（报价、深度、持仓读取）的耗时
+                    await benchmark_venues(bot.router.venues, rounds=10)
                     while True:
                         await bot.get_price_difference()
                         await asyncio.sleep(5)
@@ -642,9 +2538,11 @@ async def main():
             else:
                 print("无效的选择")
 
-            # 保持浏览器打开
+            # 保持浏览器打开，直到收到 Ctrl+C / SIGTERM
             print("\n浏览器将保持打开，按 Ctrl+C 关闭...")
-            await asyncio.sleep(3600)
+            stop_event = asyncio.Event()
+            install_shutdown_handlers(stop_event)
+            await stop_event.wait()
 
         except KeyboardInterrupt:
             print("\n收到中断信号，正在关闭...")
@@ -653,8 +2551,11 @@ async def main():
             import traceback
             traceback.print_exc()
         finally:
-            await context.close()
+            await release_browser_context(context, attached)
 
 
 if __name__ == "__main__":
+    # 带命令行参数时以服务模式运行（无交互），否则进入交互菜单
+    if len(sys.argv) > 1:
+        sys.exit(asyncio.run(run_service(load_service_config(sys.argv[1:]))))
     asyncio.run(main())
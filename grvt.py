@@ -4,16 +4,71 @@ GRVT 交易机器人核心功能类
 """
 
 import asyncio
+import time
 from typing import Optional,Tuple
 from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError, expect
 from typing import List, Dict
 
+from hedge_risk import base_asset
+
 
 class GrvtTradingBot:
     def __init__(self, page: Page):
         self.page = page
         self.timeout = 10000  # 10秒超时
 
+        # 最近一次批量设置 TP/SL 时每个持仓的耗时（秒）
+        self.last_tpsl_timings: List[float] = []
+
+        # 每个交易品种的账户设置缓存 {symbol: {leverage, margin_mode}}
+        self.account_settings: Dict[str, Dict] = {}
+
+        # 独立的持仓/委托面板页面；为 None 时与交易页面共用，需要在同一页面上切换标签
+        self.positions_page: Optional[Page] = None
+        self.orders_page: Optional[Page] = None
+
+    @property
+    def positions_view(self) -> Page:
+        """读取/操作持仓表格使用的页面"""
+        return self.positions_page or self.page
+
+    @property
+    def orders_view(self) -> Page:
+        """读取/操作委托表格使用的页面"""
+        return self.orders_page or self.page
+
+    # ==================== 页面状态 ====================
+
+    async def wait_for_page_ready(self, timeout: int = 30000, quiet: bool = False) -> bool:
+        """
+        等待交易页面关键元素加载完成（订单簿、下单类型标签、数量输入框、下单按钮）
+        未登录时下单按钮不会出现，因此也可用于检测登录状态
+
+        Args:
+            timeout: 超时时间（毫秒）
+            quiet: 是否不打印日志
+
+        Returns:
+            bool: 是否加载成功
+        """
+        try:
+            if not quiet:
+                print("等待 GRVT 页面加载...")
+
+            await self.page.wait_for_selector('.txt-feature-green', state="visible", timeout=timeout)
+            await self.page.wait_for_selector('[data-sentry-component="TypeTabs"]', state="visible", timeout=timeout)
+            await self.page.wait_for_selector('input[placeholder="Quantity"]', state="visible", timeout=timeout)
+            await self.page.wait_for_selector('button:has-text("Buy / Long")', state="visible", timeout=timeout)
+
+            if not quiet:
+                print("✓ GRVT 页面加载完成")
+            return True
+
+        except Exception as e:
+            if not quiet:
+                print(f"✗ GRVT 页面加载超时: {e}")
+            return False
+
     # ==================== 价格获取相关 ====================
 
     async def get_orderbook_bid_price(self, max_attempts: int = 3) -> Optional[float]:
@@ -117,6 +172,52 @@ class GrvtTradingBot:
         print(f"✗ 获取卖价失败")
         return None
 
+    async def get_orderbook_depth(self, levels: int = 10) -> Optional[Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]]:
+        """
+        一次 evaluate 批量读取订单簿多档深度（不打印日志，适合高频调用）
+
+        Args:
+            levels: 每边读取的档数
+
+        Returns:
+            (bids, asks): 买盘按价格从高到低、卖盘从低到高，每档为 (价格, 数量)；失败返回 None
+        """
+        try:
+            raw_rows = await self.page.locator('div.style_row__q_Oum:not(.d-none)').evaluate_all('''
+                (rows) => rows.map((row) => {
+                    const price = row.querySelector('.txt-feature-green, .txt-feature-red');
+                    if (!price) return null;
+                    return {
+                        side: price.classList.contains('txt-feature-green') ? 'bid' : 'ask',
+                        price: (price.innerText || '').trim(),
+                        cells: Array.from(row.children).map((cell) => (cell.innerText || '').trim()),
+                    };
+                }).filter((row) => row !== null)
+            ''')
+
+            bids, asks = [], []
+            for raw in raw_rows:
+                price = self._parse_number(raw['price'])
+                if price is None or price <= 0:
+                    continue
+                # 价格后面的第一个数字单元格为该档数量
+                size = None
+                cells = raw['cells']
+                start = cells.index(raw['price']) + 1 if raw['price'] in cells else 1
+                for cell in cells[start:]:
+                    size = self._parse_number(cell)
+                    if size is not None:
+                        break
+                (bids if raw['side'] == 'bid' else asks).append((price, size or 0.0))
+
+            bids.sort(key=lambda level: -level[0])
+            asks.sort(key=lambda level: level[0])
+            return bids[:levels], asks[:levels]
+
+        except Exception as e:
+            print(f"✗ 读取 GRVT 订单簿深度失败: {e}")
+            return None
+
     async def get_orderbook_prices(self, max_attempts: int = 3) -> Tuple[Optional[float], Optional[float]]:
         """
         从订单簿获取最高买价和最低卖价
@@ -235,6 +336,7 @@ class GrvtTradingBot:
             # 提取数字，例如 "10x" -> 10
             leverage = int(leverage_text.replace('x', '').strip())
             print(f"当前杠杆: {leverage}x")
+            self.account_settings.setdefault(self.current_symbol(), {})['leverage'] = leverage
             return leverage
         except Exception as e:
             print(f"❌ 获取当前杠杆失败: {e}")
@@ -283,7 +385,8 @@ class GrvtTradingBot:
             print("✓ 已确认杠杆设置")
             await asyncio.sleep(0.5)
 
-            # 4. 验证是否设置成功
+            # 4. 验证是否设置成功（同时刷新缓存）
+            self.account_settings.pop(self.current_symbol(), None)
             current_leverage = await self.get_current_leverage()
             if current_leverage == leverage:
                 print(f"✅ 杠杆已成功设置为 {leverage}x")
@@ -298,6 +401,72 @@ class GrvtTradingBot:
             traceback.print_exc()
             return False
 
+    # ==================== 账户设置缓存 ====================
+
+    def current_symbol(self) -> str:
+        """从页面 URL 中获取当前交易品种，例如 BTC-USDT"""
+        return self.page.url.rstrip('/').split('/')[-1]
+
+    async def get_current_margin_mode(self) -> Optional[str]:
+        """获取当前保证金模式（Cross / Isolated）"""
+        try:
+            mode_label = self.page.locator('span:text-is("Cross"), span:text-is("Isolated")').first
+            if await mode_label.count() == 0:
+                return None
+            margin_mode = (await mode_label.text_content()).strip()
+            self.account_settings.setdefault(self.current_symbol(), {})['margin_mode'] = margin_mode
+            return margin_mode
+        except Exception as e:
+            print(f"❌ 获取保证金模式失败: {e}")
+            return None
+
+    async def verify_account_settings(self, leverage: Optional[int] = None,
+                                      margin_mode: Optional[str] = None) -> bool:
+        """
+        启动时为当前品种校验一次杠杆和保证金模式，不一致时修正杠杆，并写入缓存
+
+        Args:
+            leverage: 期望杠杆倍数，None 表示不校验
+            margin_mode: 期望保证金模式（Cross / Isolated），None 表示不校验
+
+        Returns:
+            bool: 账户设置是否符合预期
+        """
+        symbol = self.current_symbol()
+        print(f"\n校验 {symbol} 账户设置...")
+
+        current_leverage = await self.get_current_leverage()
+        current_mode = await self.get_current_margin_mode()
+
+        if leverage is not None and current_leverage != leverage:
+            print(f"⚠️ 杠杆为 {current_leverage}x，期望 {leverage}x，尝试修正")
+            if not await self.set_leverage(leverage):
+                return False
+
+        if margin_mode is not None and (current_mode or '').lower() != margin_mode.lower():
+            print(f"❌ 保证金模式为 {current_mode}，期望 {margin_mode}，请手动调整")
+            return False
+
+        print(f"✅ {symbol} 账户设置: {self.account_settings.get(symbol)}")
+        return True
+
+    def check_account_settings(self, leverage: Optional[int] = None,
+                               margin_mode: Optional[str] = None) -> bool:
+        """
+        下单前检查缓存中的账户设置（不访问页面）
+
+        Returns:
+            bool: 缓存存在且与期望一致返回 True
+        """
+        cached = self.account_settings.get(self.current_symbol())
+        if cached is None:
+            return False
+        if leverage is not None and cached.get('leverage') != leverage:
+            return False
+        if margin_mode is not None and (cached.get('margin_mode') or '').lower() != margin_mode.lower():
+            return False
+        return True
+
     # ==================== 订单类型切换 ====================
 
     async def switch_to_limit_order(self):
@@ -612,13 +781,13 @@ class GrvtTradingBot:
                 print("检查持仓状态...")
 
             # 点击 Positions 标签
-            positions_tab = self.page.locator('.style_tabItem__eQp4d:has-text("Positions")').first
+            positions_tab = self.positions_view.locator('.style_tabItem__eQp4d:has-text("Positions")').first
             await positions_tab.wait_for(state="visible", timeout=self.timeout)
             await positions_tab.click()
             await asyncio.sleep(0.3)
 
             # 检查是否显示 "No results"
-            no_results = self.page.locator('div:has-text("No results")')
+            no_results = self.positions_view.locator('div:has-text("No results")')
 
             if await no_results.count() > 0:
                 if show_details:
@@ -626,7 +795,7 @@ class GrvtTradingBot:
                 return 0
             else:
                 # 获取持仓行
-                position_rows = await self.page.locator(
+                position_rows = await self.positions_view.locator(
                     '[data-sentry-component="TablePositions"] .style_tableRow__gbjWO').all()
                 position_count = len(position_rows)
 
@@ -670,13 +839,13 @@ class GrvtTradingBot:
         """获取持仓列表（带详细信息）"""
         try:
             # 切换到 Positions 标签
-            positions_tab = self.page.locator('.style_tabItem__eQp4d:has-text("Positions")').first
-            # self.page.locator('.style_tabItem__eQp4d:has-text("Open orders")').first
+            positions_tab = self.positions_view.locator('.style_tabItem__eQp4d:has-text("Positions")').first
+            # self.positions_view.locator('.style_tabItem__eQp4d:has-text("Open orders")').first
             await positions_tab.click()
             await asyncio.sleep(0.5)
 
             # 获取持仓行
-            position_rows = await self.page.locator(
+            position_rows = await self.positions_view.locator(
                 '[data-sentry-component="TablePositions"] .style_tableRow__gbjWO').all()
 
             positions = []
@@ -713,14 +882,14 @@ class GrvtTradingBot:
             if position_row:
                 limit_button = position_row.locator('button:has-text("Limit")')
             else:
-                limit_button = self.page.locator('button:has-text("Limit")').first
+                limit_button = self.positions_view.locator('button:has-text("Limit")').first
 
             await limit_button.wait_for(state="visible", timeout=self.timeout)
             await limit_button.click()
             await asyncio.sleep(0.5)
 
             # 验证对话框是否打开
-            close_dialog = self.page.locator('.style_contentWrapper__JrKWn')
+            close_dialog = self.positions_view.locator('.style_contentWrapper__JrKWn')
             if await close_dialog.count() > 0:
                 print("✓ 平仓对话框已打开")
                 return True
@@ -738,14 +907,14 @@ class GrvtTradingBot:
             if position_row:
                 market_button = position_row.locator('button:has-text("Market")')
             else:
-                market_button = self.page.locator('button:has-text("Market")').first
+                market_button = self.positions_view.locator('button:has-text("Market")').first
 
             await market_button.wait_for(state="visible", timeout=self.timeout)
             await market_button.click()
             await asyncio.sleep(0.5)
 
             # 验证对话框是否打开
-            close_dialog = self.page.locator('.style_contentWrapper__JrKWn')
+            close_dialog = self.positions_view.locator('.style_contentWrapper__JrKWn')
             if await close_dialog.count() > 0:
                 print("✓ 市价平仓对话框已打开")
                 return True
@@ -766,7 +935,7 @@ class GrvtTradingBot:
             await asyncio.sleep(0.5)
 
             # 填写价格
-            order_price_input = self.page.locator('input[placeholder="Enter Order price"]')
+            order_price_input = self.positions_view.locator('input[placeholder="Enter Order price"]')
             if await order_price_input.count() > 0:
                 await order_price_input.click(click_count=3)
                 await order_price_input.press("Backspace")
@@ -787,7 +956,7 @@ class GrvtTradingBot:
         try:
             print("点击确认按钮...")
 
-            confirm_button = self.page.locator('button:has-text("Confirm"), button:has-text("确认")')
+            confirm_button = self.positions_view.locator('button:has-text("Confirm"), button:has-text("确认")')
             await confirm_button.wait_for(state="visible", timeout=self.timeout)
 
             await confirm_button.click()
@@ -894,13 +1063,13 @@ class GrvtTradingBot:
 
         # 点击 Close all positions 按钮
         try:
-            close_all_button = self.page.locator('button:has-text("Close all positions")')
+            close_all_button = self.positions_view.locator('button:has-text("Close all positions")')
             if await close_all_button.count() > 0:
                 await close_all_button.click()
                 await asyncio.sleep(0.5)
 
                 # 确认对话框
-                confirm_button = self.page.locator('button:has-text("Confirm")')
+                confirm_button = self.positions_view.locator('button:has-text("Confirm")')
                 if await confirm_button.count() > 0:
                     await confirm_button.click()
                     print("✅ 已提交平仓所有持仓的订单")
@@ -923,12 +1092,12 @@ class GrvtTradingBot:
                 print("检查挂单...")
 
             # 点击 Open orders 标签
-            open_orders_tab = self.page.locator('div:has-text("Open orders")').first
+            open_orders_tab = self.orders_view.locator('div:has-text("Open orders")').first
             await open_orders_tab.click()
             await asyncio.sleep(2)
 
             # 检查是否有挂单
-            no_results = self.page.locator('div:has-text("No results")')
+            no_results = self.orders_view.locator('div:has-text("No results")')
 
             if await no_results.count() > 0:
                 if show_details:
@@ -957,13 +1126,14 @@ class GrvtTradingBot:
             print(f"❌ 检查挂单时出错: {e}")
             return -1
 
-    async def cancel_order(self, order_id: str = None, row_index: int = None) -> int:
+    async def cancel_order(self, order_id: str = None, row_index: int = None, product: str = None) -> int:
         """
         取消单个订单
 
         Args:
             order_id: 订单ID（部分匹配即可）
             row_index: 订单在表格中的行索引（从0开始）
+            product: 只检查/取消该产品（如 BTC-USDT）的持仓和订单，None 表示不限
 
         Returns:
             bool: 操作是否成功
@@ -973,14 +1143,18 @@ class GrvtTradingBot:
             print(f"开始取消订单: {order_id if order_id else f'第{row_index + 1}行'}")
             print("=" * 60)
 
-            position_count = await self.check_positions(show_details=False)
+            if product:
+                snapshot = await self.get_positions_snapshot() or []
+                position_count = len([pos for pos in snapshot if base_asset(pos['product']) == base_asset(product)])
+            else:
+                position_count = await self.check_positions(show_details=False)
 
             if position_count > 0:
                 print(f"✅ GRVT订单已成交（等待 X 秒）")
                 return 1
 
             # 切换到未结订单标签
-            open_orders_tab = self.page.locator('.style_tabItem__eQp4d:has-text("Open orders")').first
+            open_orders_tab = self.orders_view.locator('.style_tabItem__eQp4d:has-text("Open orders")').first
 
             tab_count = await open_orders_tab.count()
             print(f"找到 {tab_count} 个 Open orders 标签")
@@ -1002,7 +1176,9 @@ class GrvtTradingBot:
             await asyncio.sleep(0.5)
 
             # 查找订单表格行
-            table_rows = self.page.locator('div.style_tableRow__gbjWO')
+            table_rows = self.orders_view.locator('div.style_tableRow__gbjWO')
+            if product:
+                table_rows = table_rows.filter(has_text=product.split('-')[0])
             row_count = await table_rows.count()
 
             if row_count == 0:
@@ -1070,7 +1246,7 @@ class GrvtTradingBot:
             await asyncio.sleep(0.5)
 
             # 验证订单是否已取消（检查行数是否减少）
-            new_row_count = await self.page.locator('div.style_tableRow__gbjWO').count()
+            new_row_count = await table_rows.count()
 
             if new_row_count < row_count:
                 print(f"✓ 订单已取消（剩余 {new_row_count} 个订单）")
@@ -1089,13 +1265,14 @@ class GrvtTradingBot:
             traceback.print_exc()
             return False
 
-    async def cancel_all_orders(self, order_id: str = None, row_index: int = None)  -> int:
+    async def cancel_all_orders(self, order_id: str = None, row_index: int = None, product: str = None)  -> int:
         """
                 取消单个订单
 
                 Args:
                     order_id: 订单ID（部分匹配即可）
                     row_index: 订单在表格中的行索引（从0开始）
+                    product: 只在该产品的订单中查找，None 表示不限
 
                 Returns:
                     bool: 操作是否成功
@@ -1106,7 +1283,7 @@ class GrvtTradingBot:
             print("=" * 60)
 
             # 切换到未结订单标签
-            open_orders_tab = self.page.locator('.style_tabItem__eQp4d:has-text("Open orders")').first
+            open_orders_tab = self.orders_view.locator('.style_tabItem__eQp4d:has-text("Open orders")').first
 
             tab_count = await open_orders_tab.count()
             print(f"找到 {tab_count} 个 Open orders 标签")
@@ -1128,7 +1305,9 @@ class GrvtTradingBot:
             await asyncio.sleep(0.5)
 
             # 查找订单表格行
-            table_rows = self.page.locator('div.style_tableRow__gbjWO')
+            table_rows = self.orders_view.locator('div.style_tableRow__gbjWO')
+            if product:
+                table_rows = table_rows.filter(has_text=product.split('-')[0])
             row_count = await table_rows.count()
 
             if row_count == 0:
@@ -1196,7 +1375,7 @@ class GrvtTradingBot:
             await asyncio.sleep(0.5)
 
             # 验证订单是否已取消（检查行数是否减少）
-            new_row_count = await self.page.locator('div.style_tableRow__gbjWO').count()
+            new_row_count = await table_rows.count()
 
             if new_row_count < row_count:
                 print(f"✓ 订单已取消（剩余 {new_row_count} 个订单）")
@@ -1226,7 +1405,7 @@ class GrvtTradingBot:
             print("\n获取未结订单...")
 
             # 切换到未结订单标签
-            open_orders_tab = self.page.locator(
+            open_orders_tab = self.orders_view.locator(
                 'button[role="tab"]:has-text("Open orders")'
             ).first
 
@@ -1239,7 +1418,7 @@ class GrvtTradingBot:
                 await asyncio.sleep(0.5)
 
             # 等待订单面板加载
-            orders_panel = self.page.locator(
+            orders_panel = self.orders_view.locator(
                 'div[role="tabpanel"][id*="open-orders"][data-state="active"]'
             ).first
 
@@ -1299,15 +1478,15 @@ class GrvtTradingBot:
         异步简化版本：只获取产品名称和 P&L
         """
 
-        positions_tab = self.page.locator('.style_tabItem__eQp4d:has-text("Positions")').first
+        positions_tab = self.positions_view.locator('.style_tabItem__eQp4d:has-text("Positions")').first
         await positions_tab.wait_for(state="visible", timeout=self.timeout)
         await positions_tab.click()
         await asyncio.sleep(0.3)
 
 
-        await self.page.wait_for_selector('.style_tableRow__gbjWO', timeout=10000)
+        await self.positions_view.wait_for_selector('.style_tableRow__gbjWO', timeout=10000)
 
-        rows = await self.page.locator('.style_tableRow__gbjWO').all()
+        rows = await self.positions_view.locator('.style_tableRow__gbjWO').all()
         results = []
 
         for row in rows:
@@ -1328,6 +1507,91 @@ class GrvtTradingBot:
 
         return results
 
+    # ==================== 批量持仓快照 ====================
+
+    @staticmethod
+    def _parse_number(text: Optional[str]) -> Optional[float]:
+        """
+        从单元格文本中解析第一个数字（支持负号、千分位、$ 符号）
+
+        Args:
+            text: 单元格文本，如 "-0.002 BTC"、"$95,123.4"
+
+        Returns:
+            float: 解析出的数字，无效返回 None
+        """
+        if not text:
+            return None
+        cleaned = text.replace(',', '').replace('$', '').replace('+', '').strip()
+        if not cleaned or cleaned == '-':
+            return None
+        try:
+            return float(cleaned.split()[0])
+        except ValueError:
+            return None
+
+    async def get_positions_snapshot(self, switch_tab: bool = True) -> Optional[List[Dict]]:
+        """
+        一次 evaluate 批量读取 Positions 表格（代替逐个单元格读取）
+
+        Args:
+            switch_tab: Positions 标签未激活时是否切换过去；
+                        为 False 时不抢占标签，直接返回 None
+
+        Returns:
+            list: 持仓列表，每个元素包含
+                  {product, quantity(带符号), entry_price, mark_price, liq_price, pnl}；
+                  标签未激活且不允许切换时返回 None
+        """
+        try:
+            positions_tab = self.positions_view.locator('.style_tabItem__eQp4d:has-text("Positions")').first
+            tab_class = await positions_tab.get_attribute('class') or ''
+
+            if 'style_active__ex4rC' not in tab_class:
+                if not switch_tab:
+                    return None
+                await positions_tab.click()
+                await self.positions_view.wait_for_selector(
+                    '[data-sentry-component="TablePositions"]',
+                    state="attached",
+                    timeout=self.timeout
+                )
+
+            rows = self.positions_view.locator('[data-sentry-component="TablePositions"] .style_tableRow__gbjWO')
+            raw_rows = await rows.evaluate_all('''
+                (rows) => rows.map((row) => {
+                    const cells = Array.from(row.querySelectorAll('[data-sentry-element="CellWrapper"]'))
+                        .map((cell) => (cell.textContent || '').trim());
+                    const link = row.querySelector('[data-sentry-component="InstrumentCellLink"]');
+                    return { product: link ? link.innerText.trim() : (cells[0] || ''), cells: cells };
+                })
+            ''')
+
+            positions = []
+            for raw in raw_rows:
+                cells = raw['cells']
+                if len(cells) < 5:
+                    continue
+
+                quantity = self._parse_number(cells[1])
+                if quantity is None:
+                    continue
+
+                positions.append({
+                    'product': raw['product'],
+                    'quantity': quantity,
+                    'entry_price': self._parse_number(cells[3]),
+                    'mark_price': self._parse_number(cells[4]),
+                    'liq_price': self._parse_number(cells[5]) if len(cells) > 5 else None,
+                    'pnl': self._parse_number(cells[10]) if len(cells) > 10 else None,
+                })
+
+            return positions
+
+        except Exception as e:
+            print(f"❌ 批量读取持仓失败: {e}")
+            return None
+
     # ==================== 止盈止损相关 ====================
 
     async def get_position_liquidation_price(self, position_index: int = 0) -> Optional[float]:
@@ -1344,12 +1608,12 @@ class GrvtTradingBot:
             print(f"\n获取持仓 {position_index} 的清算价格...")
 
             # 切换到 Positions 标签
-            positions_tab = self.page.locator('.style_tabItem__eQp4d:has-text("Positions")').first
+            positions_tab = self.positions_view.locator('.style_tabItem__eQp4d:has-text("Positions")').first
             await positions_tab.click()
             await asyncio.sleep(0.5)
 
             # 获取持仓行
-            position_rows = self.page.locator(
+            position_rows = self.positions_view.locator(
                 '[data-sentry-component="TablePositions"] .style_tableRow__gbjWO'
             )
 
@@ -1402,12 +1666,12 @@ class GrvtTradingBot:
             print(f"\n点击持仓 {position_index} 的编辑 TP/SL 按钮...")
 
             # 切换到 Positions 标签
-            positions_tab = self.page.locator('.style_tabItem__eQp4d:has-text("Positions")').first
+            positions_tab = self.positions_view.locator('.style_tabItem__eQp4d:has-text("Positions")').first
             await positions_tab.click()
             await asyncio.sleep(0.5)
 
             # 获取持仓行
-            position_rows = self.page.locator(
+            position_rows = self.positions_view.locator(
                 '[data-sentry-component="TablePositions"] .style_tableRow__gbjWO'
             )
 
@@ -1440,7 +1704,7 @@ class GrvtTradingBot:
             await asyncio.sleep(0.5)
 
             # 验证对话框是否打开
-            dialog = self.page.locator('.style_contentWrapper__JrKWn:has-text("Edit TP/SL")')
+            dialog = self.positions_view.locator('.style_contentWrapper__JrKWn:has-text("Edit TP/SL")')
 
             if await dialog.count() > 0:
                 print("✓ TP/SL 编辑对话框已打开")
@@ -1474,7 +1738,7 @@ class GrvtTradingBot:
                 print(f"  止损 ROI: {sl_roi}%")
 
             # 等待对话框加载
-            dialog = self.page.locator('.style_contentWrapper__JrKWn:has-text("Edit TP/SL")')
+            dialog = self.positions_view.locator('.style_contentWrapper__JrKWn:has-text("Edit TP/SL")')
             await expect(dialog).to_be_visible(timeout=5000)
             await asyncio.sleep(0.5)
 
@@ -1560,7 +1824,7 @@ class GrvtTradingBot:
             print("\n点击 Confirm 按钮...")
 
             # 在编辑对话框中查找 Confirm 按钮
-            dialog = self.page.locator('.style_contentWrapper__JrKWn:has-text("Edit TP/SL")')
+            dialog = self.positions_view.locator('.style_contentWrapper__JrKWn:has-text("Edit TP/SL")')
             confirm_button = dialog.locator('button:has-text("Confirm")').last
 
             if await confirm_button.count() == 0:
@@ -1595,7 +1859,7 @@ class GrvtTradingBot:
             print("\n最终确认 TP/SL...")
 
             # 等待确认对话框出现
-            confirm_dialog = self.page.locator(
+            confirm_dialog = self.positions_view.locator(
                 '.style_contentWrapper__JrKWn:has-text("Confirm Position TP/SL")'
             )
 
@@ -1684,28 +1948,102 @@ class GrvtTradingBot:
             traceback.print_exc()
             return False
 
+    async def _fill_tpsl_input(self, section, value: float):
+        """在 TP/SL 区域的 ROI% 输入框中填值（不使用固定等待）"""
+        roi_input = section.locator('.fx.gap-2').first.locator(
+            '.text-field_textFieldContainer__qoENI'
+        ).nth(1).locator('input').first
+
+        await expect(roi_input).to_be_editable(timeout=5000)
+        await roi_input.fill(str(value))
+
+    async def _set_row_tpsl_fast(self, row, tp_roi: float = None, sl_roi: float = None) -> bool:
+        """
+        为持仓表格中的一行设置止盈止损（编辑 → 填写 → 两次确认），
+        每一步等待对应元素状态变化，而不是固定 sleep
+
+        Args:
+            row: 持仓行 Locator
+            tp_roi: 止盈 ROI 百分比
+            sl_roi: 止损 ROI 百分比
+
+        Returns:
+            bool: 操作是否成功
+        """
+        edit_button = row.locator('span[data-sentry-element="IconEditLine"]').first
+        await edit_button.scroll_into_view_if_needed()
+        await edit_button.click()
+
+        dialog = self.positions_view.locator('.style_contentWrapper__JrKWn:has-text("Edit TP/SL")')
+        await expect(dialog).to_be_visible(timeout=5000)
+
+        if tp_roi is not None:
+            tp_section = dialog.locator('.fx-column.gap-3:has(div.heading-14:has-text("Take profit"))').first
+            await self._fill_tpsl_input(tp_section, abs(tp_roi))
+
+        if sl_roi is not None:
+            sl_section = dialog.locator('.fx-column.gap-3:has(div.heading-14:has-text("Stop loss"))').first
+            await self._fill_tpsl_input(sl_section, sl_roi)
+
+        confirm_button = dialog.locator('button:has-text("Confirm")').last
+        await expect(confirm_button).to_be_enabled(timeout=5000)
+        await confirm_button.click()
+
+        confirm_dialog = self.positions_view.locator(
+            '.style_contentWrapper__JrKWn:has-text("Confirm Position TP/SL")'
+        )
+        await expect(confirm_dialog).to_be_visible(timeout=5000)
+        await confirm_dialog.locator('button:has-text("Confirm")').last.click()
+        await expect(confirm_dialog).to_be_hidden(timeout=10000)
+
+        return True
+
     async def set_all_positions_tpsl(
             self,
             tp_roi: float = None,
             sl_roi: float = None
     ) -> bool:
         """
-        为所有持仓批量设置止盈止损
+        为所有持仓批量设置止盈止损（一次遍历持仓表格，逐行设置）
+
+        每个持仓的耗时记录在 self.last_tpsl_timings 中
 
         Args:
             tp_roi: 止盈 ROI 百分比（例如：50 表示 50%）
             sl_roi: 止损 ROI 百分比（例如：-50 表示 -50%）
 
         Returns:
-            bool: 操作是否成功
+            bool: 是否全部设置成功
         """
         print("\n" + "=" * 60)
         print("⚙️ 批量设置所有持仓的止盈止损")
         print("=" * 60)
 
+        self.last_tpsl_timings = []
+
+        if tp_roi is None and sl_roi is None:
+            print("✗ 未指定止盈或止损")
+            return False
+
         try:
-            # 获取持仓数量
-            position_count = await self.check_positions(show_details=False)
+            positions_tab = self.positions_view.locator('.style_tabItem__eQp4d:has-text("Positions")').first
+            if 'style_active__ex4rC' not in (await positions_tab.get_attribute('class') or ''):
+                await positions_tab.click()
+            await self.positions_view.wait_for_selector(
+                '[data-sentry-component="TablePositions"]',
+                state="attached",
+                timeout=self.timeout
+            )
+
+            position_rows = self.positions_view.locator(
+                '[data-sentry-component="TablePositions"] .style_tableRow__gbjWO'
+            )
+            # 刚开仓时持仓行可能还没渲染出来，等待第一行出现后再计数
+            try:
+                await position_rows.first.wait_for(state="attached", timeout=self.timeout)
+            except PlaywrightTimeoutError:
+                pass
+            position_count = await position_rows.count()
 
             if position_count <= 0:
                 print("✗ 没有持仓需要设置")
@@ -1714,22 +2052,28 @@ class GrvtTradingBot:
             print(f"  共有 {position_count} 个持仓")
 
             success_count = 0
+            batch_start = time.perf_counter()
 
-            # 为每个持仓设置止盈止损
             for i in range(position_count):
-                print(f"\n处理持仓 {i + 1}/{position_count}...")
+                start = time.perf_counter()
+                try:
+                    ok = await self._set_row_tpsl_fast(position_rows.nth(i), tp_roi, sl_roi)
+                except Exception as e:
+                    print(f"✗ 持仓 {i + 1} 设置失败: {e}")
+                    ok = False
 
-                # if await self.set_position_tpsl(i, tp_roi, sl_roi):
-                #     success_count += 1
-                #     print(f"✓ 持仓 {i + 1} 设置成功")
-                # else:
-                #     print(f"✗ 持仓 {i + 1} 设置失败")
+                elapsed = time.perf_counter() - start
+                self.last_tpsl_timings.append(elapsed)
 
-                # 等待一下再处理下一个
-                await asyncio.sleep(0.5)
+                if ok:
+                    success_count += 1
+                    print(f"✓ 持仓 {i + 1}/{position_count} 设置成功（{elapsed:.2f}秒）")
+
+            total_elapsed = time.perf_counter() - batch_start
 
             print("\n" + "=" * 60)
             print(f"✅ 批量设置完成: {success_count}/{position_count} 成功")
+            print(f"  总耗时: {total_elapsed:.2f}秒，平均 {total_elapsed / position_count:.2f}秒/持仓")
             print("=" * 60 + "\n")
 
             return success_count == position_count
@@ -1739,3 +2083,83 @@ class GrvtTradingBot:
             import traceback
             traceback.print_exc()
             return False
+
+    # ==================== 交易所适配器接口（venues.VenueAdapter） ====================
+
+    venue = "grvt"
+
+    async def get_quote(self) -> Tuple[Optional[float], Optional[float]]:
+        """最优 (买价, 卖价)：一次 evaluate 读取一档深度，失败时退回逐个读取"""
+        depth = await self.get_orderbook_depth(1)
+        if depth and depth[0] and depth[1]:
+            return depth[0][0][0], depth[1][0][0]
+        return await self.get_orderbook_prices()
+
+    async def place_limit_order(self, side: str, size: float, price: float) -> bool:
+        """post-only 限价单，side 为 "BUY" 或 "SELL" """
+        if side.upper() == "BUY":
+            return await self.limit_buy_long(price=price, quantity=size)
+        return await self.limit_sell_short(price=price, quantity=size)
+
+    async def place_market_order(self, side: str, size: float) -> bool:
+        """市价单，side 为 "BUY" 或 "SELL" """
+        if side.upper() == "BUY":
+            return await self.market_buy_long(quantity=size)
+        return await self.market_sell_short(quantity=size)
+
+    async def count_open_orders(self, product: Optional[str] = None) -> Optional[int]:
+        """未结订单数量（product 不为 None 时只统计同一基础资产），读取失败返回 None"""
+        try:
+            open_orders_tab = self.orders_view.locator('.style_tabItem__eQp4d:has-text("Open orders")').first
+            if await open_orders_tab.count() == 0:
+                return None
+            if 'style_active__ex4rC' not in (await open_orders_tab.get_attribute('class') or ''):
+                await open_orders_tab.click()
+                await asyncio.sleep(0.5)
+
+            table_rows = self.orders_view.locator('div.style_tableRow__gbjWO')
+            if product:
+                table_rows = table_rows.filter(has_text=product.split('-')[0])
+            return await table_rows.count()
+        except Exception as e:
+            print(f"✗ 读取未结订单失败: {e}")
+            return None
+
+    async def cancel_orders(self, symbol: Optional[str] = None, max_orders: int = 20) -> bool:
+        """
+        逐个取消该品种的全部未结订单，直到列表中没有该品种的订单
+
+        Args:
+            symbol: 交易品种，None 表示全部品种
+            max_orders: 最多取消的订单数，防止页面异常时无限循环
+
+        Returns:
+            bool: 是否取消了订单且已没有剩余；本来就没有挂单或撤单失败返回 False
+        """
+        cancelled = 0
+        for _ in range(max_orders):
+            remaining = await self.count_open_orders(symbol)
+            if remaining is None:
+                return False
+            if remaining == 0:
+                return cancelled > 0
+            if await self.cancel_all_orders(row_index=0, product=symbol) != 3:
+                return False
+            cancelled += 1
+        print(f"⚠️ 已取消 {cancelled} 个订单，仍有未结订单")
+        return False
+
+    async def get_net_positions(self) -> Optional[Dict[str, float]]:
+        """{产品: 带符号的持仓数量}，读取失败返回 None"""
+        snapshot = await self.get_positions_snapshot()
+        if snapshot is None:
+            return None
+        return {pos['product']: pos['quantity'] for pos in snapshot}
+
+    async def get_total_pnl(self, symbol: Optional[str] = None) -> Optional[float]:
+        """持仓未实现盈亏合计（symbol 不为 None 时只统计同一基础资产），读取失败返回 None"""
+        snapshot = await self.get_positions_snapshot()
+        if snapshot is None:
+            return None
+        return sum(pos['pnl'] or 0.0 for pos in snapshot
+                   if symbol is None or base_asset(pos['product']) == base_asset(symbol))
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+对冲周期账本
+记录每个对冲周期两条腿的意向价、成交价、手续费、已实现盈亏和持仓时间
+"""
+
+import csv
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class HedgeLedger:
+    """对冲周期盈亏与手续费账本"""
+
+    FIELDS = [
+        'cycle_id', 'direction', 'size',
+        'entry_spread',
+        'grvt_entry_intended', 'grvt_entry_fill',
+        'paradex_entry_intended', 'paradex_entry_fill',
+        'grvt_exit_intended', 'grvt_exit_fill',
+        'paradex_exit_intended', 'paradex_exit_fill',
+        'gross_pnl', 'fees', 'net_pnl',
+        'opened_at', 'closed_at', 'holding_seconds', 'exit_reason',
+    ]
+
+    def __init__(self, grvt_fee_rate: float = 0.0, paradex_fee_rate: float = 0.0003):
+        """
+        Args:
+            grvt_fee_rate: GRVT 手续费率（post-only 挂单，负数表示返佣）
+            paradex_fee_rate: Paradex 手续费率（市价吃单）
+        """
+        self.grvt_fee_rate = grvt_fee_rate
+        self.paradex_fee_rate = paradex_fee_rate
+
+        self.cycles: List[Dict] = []
+
+        # 累计值，每个周期结束时 O(1) 更新
+        self.closed_count = 0
+        self.win_count = 0
+        self.total_gross_pnl = 0.0
+        self.total_fees = 0.0
+        self.total_net_pnl = 0.0
+        self.total_holding_seconds = 0.0
+        self.total_entry_spread = 0.0
+
+    def open_cycle(
+            self,
+            direction: str,
+            size: float,
+            entry_spread: float,
+            grvt_intended: float,
+            paradex_intended: float,
+            grvt_fill: Optional[float] = None,
+            paradex_fill: Optional[float] = None,
+    ) -> Dict:
+        """
+        记录开仓
+
+        Args:
+            direction: "GRVT_SHORT" (GRVT空+Paradex多) 或 "GRVT_LONG" (GRVT多+Paradex空)
+            size: 每条腿的数量
+            entry_spread: 开仓时的价差（GRVT - Paradex）
+            grvt_intended / paradex_intended: 下单时的意向价格
+            grvt_fill / paradex_fill: 成交价格（未知时为 None）
+
+        Returns:
+            dict: 周期记录
+        """
+        cycle = {field: None for field in self.FIELDS}
+        cycle.update({
+            'cycle_id': len(self.cycles) + 1,
+            'direction': direction,
+            'size': size,
+            'entry_spread': entry_spread,
+            'grvt_entry_intended': grvt_intended,
+            'grvt_entry_fill': grvt_fill,
+            'paradex_entry_intended': paradex_intended,
+            'paradex_entry_fill': paradex_fill,
+            'opened_at': datetime.now(),
+        })
+        self.cycles.append(cycle)
+        return cycle
+
+    def _fill_pnl(self, cycle: Dict) -> Optional[float]:
+        """根据两条腿的成交价计算毛盈亏，成交价不全时返回 None"""
+        prices = [cycle['grvt_entry_fill'], cycle['grvt_exit_fill'],
+                  cycle['paradex_entry_fill'], cycle['paradex_exit_fill']]
+        if any(price is None for price in prices):
+            return None
+
+        grvt_sign = -1 if cycle['direction'] == 'GRVT_SHORT' else 1
+        grvt_pnl = grvt_sign * (cycle['grvt_exit_fill'] - cycle['grvt_entry_fill']) * cycle['size']
+        paradex_pnl = -grvt_sign * (cycle['paradex_exit_fill'] - cycle['paradex_entry_fill']) * cycle['size']
+        return grvt_pnl + paradex_pnl
+
+    def _fees(self, cycle: Dict) -> float:
+        """按成交价（缺失时用意向价）估算四笔成交的手续费"""
+        def notional(fill, intended):
+            price = fill if fill is not None else intended
+            return abs(price or 0.0) * cycle['size']
+
+        grvt_notional = (notional(cycle['grvt_entry_fill'], cycle['grvt_entry_intended']) +
+                         notional(cycle['grvt_exit_fill'], cycle['grvt_exit_intended']))
+        paradex_notional = (notional(cycle['paradex_entry_fill'], cycle['paradex_entry_intended']) +
+                            notional(cycle['paradex_exit_fill'], cycle['paradex_exit_intended']))
+        return grvt_notional * self.grvt_fee_rate + paradex_notional * self.paradex_fee_rate
+
+    def close_cycle(
+            self,
+            cycle: Dict,
+            grvt_intended: Optional[float] = None,
+            paradex_intended: Optional[float] = None,
+            grvt_fill: Optional[float] = None,
+            paradex_fill: Optional[float] = None,
+            realized_pnl: Optional[float] = None,
+            exit_reason: Optional[str] = None,
+    ) -> Dict:
+        """
+        记录平仓并更新累计统计
+
+        Args:
+            cycle: open_cycle 返回的周期记录
+            grvt_intended / paradex_intended: 平仓意向价格
+            grvt_fill / paradex_fill: 平仓成交价格
+            realized_pnl: 平台显示的平仓前总盈亏（优先于按成交价计算的毛盈亏）
+            exit_reason: 平仓原因（平仓策略触发时记录）
+
+        Returns:
+            dict: 更新后的周期记录
+        """
+        cycle.update({
+            'grvt_exit_intended': grvt_intended,
+            'grvt_exit_fill': grvt_fill,
+            'paradex_exit_intended': paradex_intended,
+            'paradex_exit_fill': paradex_fill,
+            'closed_at': datetime.now(),
+            'exit_reason': exit_reason,
+        })
+
+        gross_pnl = realized_pnl if realized_pnl is not None else self._fill_pnl(cycle)
+        gross_pnl = gross_pnl or 0.0
+        fees = self._fees(cycle)
+
+        cycle['gross_pnl'] = gross_pnl
+        cycle['fees'] = fees
+        cycle['net_pnl'] = gross_pnl - fees
+        cycle['holding_seconds'] = (cycle['closed_at'] - cycle['opened_at']).total_seconds()
+
+        self.closed_count += 1
+        self.win_count += 1 if cycle['net_pnl'] > 0 else 0
+        self.total_gross_pnl += gross_pnl
+        self.total_fees += fees
+        self.total_net_pnl += cycle['net_pnl']
+        self.total_holding_seconds += cycle['holding_seconds']
+        self.total_entry_spread += abs(cycle['entry_spread'] or 0.0)
+
+        return cycle
+
+    def summary(self) -> Dict[str, float]:
+        """已平仓周期的汇总统计"""
+        count = self.closed_count
+        return {
+            'closed_cycles': count,
+            'win_rate': self.win_count / count if count else 0.0,
+            'total_gross_pnl': self.total_gross_pnl,
+            'total_fees': self.total_fees,
+            'total_net_pnl': self.total_net_pnl,
+            'avg_net_pnl': self.total_net_pnl / count if count else 0.0,
+            'avg_holding_seconds': self.total_holding_seconds / count if count else 0.0,
+            'avg_entry_spread': self.total_entry_spread / count if count else 0.0,
+        }
+
+    def print_summary(self):
+        """打印账本汇总"""
+        summary = self.summary()
+        print(f"  已平仓周期: {summary['closed_cycles']}")
+        if summary['closed_cycles'] == 0:
+            return
+        print(f"  胜率:       {summary['win_rate'] * 100:.1f}%")
+        print(f"  毛盈亏:     ${summary['total_gross_pnl']:.4f}")
+        print(f"  手续费:     ${summary['total_fees']:.4f}")
+        print(f"  净盈亏:     ${summary['total_net_pnl']:.4f}")
+        print(f"  平均净盈亏: ${summary['avg_net_pnl']:.4f}")
+        print(f"  平均持仓:   {summary['avg_holding_seconds'] / 60:.1f} 分钟")
+        print(f"  平均开仓价差: ${summary['avg_entry_spread']:.2f}")
+
+    def _serializable(self, cycle: Dict) -> Dict:
+        return {key: value.isoformat() if isinstance(value, datetime) else value
+                for key, value in cycle.items()}
+
+    def export_csv(self, path: str):
+        """导出所有周期为 CSV"""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self.FIELDS)
+            writer.writeheader()
+            for cycle in self.cycles:
+                writer.writerow(self._serializable(cycle))
+        print(f"✓ 账本已导出: {path}")
+
+    def export_json(self, path: str):
+        """导出所有周期及汇总为 JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'summary': self.summary(),
+                'cycles': [self._serializable(cycle) for cycle in self.cycles],
+            }, f, ensure_ascii=False, indent=2)
+        print(f"✓ 账本已导出: {path}")
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+多笔对冲仓位（lot）
+同一品种可以同时持有多笔独立的对冲仓位，每笔有自己的开仓价差、平仓策略状态和持仓计时（各自的 PositionManager）；
+价差继续扩大时按阶梯加仓，平仓时逐笔平掉
+"""
+
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from position_manager import PositionManager
+
+
+class HedgeLot:
+    """一笔对冲仓位"""
+
+    def __init__(self, lot_id: int, direction: str, size: float, entry_spread: float,
+                 cycle: Optional[dict], manager: Optional[PositionManager], notional: float = 0.0):
+        """
+        Args:
+            lot_id: 编号
+            direction: "GRVT_SHORT" 或 "GRVT_LONG"
+            size: 每条腿的数量
+            entry_spread: 开仓价差（GRVT - Paradex）
+            cycle: 账本周期记录
+            manager: 本笔仓位的持仓管理器
+            notional: 单腿名义价值（账户级风控额度）
+        """
+        self.lot_id = lot_id
+        self.direction = direction
+        self.size = size
+        self.entry_spread = entry_spread
+        self.cycle = cycle
+        self.manager = manager
+        self.notional = notional
+
+        # 平仓策略状态与触发原因
+        self.exit_state: Optional[dict] = None
+        self.exit_reason: Optional[str] = None
+        # 逐笔平仓时两条腿已平掉的数量（GRVT 平仓单可能部分成交），重试只平剩余部分
+        self.grvt_closed_size = 0.0
+        self.paradex_closed_size = 0.0
+        # 强平风控触发后改为不检查盈亏的强制市价平仓
+        self.force_close = False
+
+    @property
+    def grvt_remaining(self) -> float:
+        """GRVT 腿还需平掉的数量"""
+        return max(0.0, round(self.size - self.grvt_closed_size, 10))
+
+    @property
+    def is_active(self) -> bool:
+        """是否仍有持仓（持仓中或平仓中）"""
+        return self.manager.phase in (PositionManager.HOLDING, PositionManager.CLOSING)
+
+    def describe(self) -> str:
+        side = "GRVT空/Paradex多" if self.direction == "GRVT_SHORT" else "GRVT多/Paradex空"
+        return f"#{self.lot_id} {side} {self.size} @ ${self.entry_spread:+.2f}（{self.manager.status()}）"
+
+
+class LotBook:
+    """
+    一个品种的全部对冲仓位
+
+    每笔仓位平仓后进入自己的冷却期，冷却期内仍占用一个名额；max_lots=1 时与单仓位行为一致
+    """
+
+    def __init__(self, make_manager: Callable[["HedgeLot"], PositionManager],
+                 max_lots: int = 1, ladder_step: float = 5.0,
+                 force_close: Optional[Callable[[], Awaitable[bool]]] = None):
+        """
+        Args:
+            make_manager: 为新仓位创建持仓管理器（平仓回调绑定该仓位）
+            max_lots: 同时持有（含冷却中）的最大仓位数
+            ladder_step: 加仓阶梯：每多一笔，价差需要比已有仓位的最大开仓价差再扩大的金额（美元）
+            force_close: 风控强制平仓（平掉本品种全部持仓，返回是否成功）；标记为强制平仓的仓位
+                         不再调用自己的平仓回调，改为等待它的结果
+        """
+        self.make_manager = make_manager
+        self.max_lots = max_lots
+        self.ladder_step = ladder_step
+        self.force_close = force_close
+
+        self.lots: List[HedgeLot] = []
+        self.next_id = 1
+
+    def _prune(self):
+        """移除已结束（平仓且冷却完毕）的仓位；平仓失败（STUCK）的仓位一直保留"""
+        self.lots = [lot for lot in self.lots if lot.manager.phase != PositionManager.IDLE]
+
+    @property
+    def active(self) -> List[HedgeLot]:
+        self._prune()
+        return [lot for lot in self.lots if lot.is_active]
+
+    @property
+    def holding(self) -> List[HedgeLot]:
+        self._prune()
+        return [lot for lot in self.lots if lot.manager.phase == PositionManager.HOLDING]
+
+    @property
+    def stuck(self) -> List[HedgeLot]:
+        """重试用完仍未平仓、需要手动处理的仓位"""
+        self._prune()
+        return [lot for lot in self.lots if lot.manager.phase == PositionManager.STUCK]
+
+    @property
+    def total_size(self) -> float:
+        return sum(lot.size for lot in self.active)
+
+    def required_spread(self, direction: str, threshold: float) -> Optional[float]:
+        """
+        开下一笔仓位要求的最小价差（绝对值）
+
+        Args:
+            direction: 新仓位方向
+            threshold: 第一笔仓位的开仓阈值
+
+        Returns:
+            float: 要求的价差；名额已满、方向与已有仓位相反或有仓位平仓失败时返回 None
+        """
+        self._prune()
+        if len(self.lots) >= self.max_lots or self.stuck:
+            return None
+
+        active = self.active
+        if any(lot.direction != direction for lot in active):
+            return None
+
+        holding = [lot for lot in active if lot.manager.phase == PositionManager.HOLDING]
+        if not holding:
+            return threshold
+        return max(threshold, max(abs(lot.entry_spread) for lot in holding) + self.ladder_step)
+
+    def can_open(self, price_diff: float, threshold: float) -> bool:
+        """价差是否达到下一笔仓位的要求"""
+        direction = "GRVT_SHORT" if price_diff > 0 else "GRVT_LONG"
+        required = self.required_spread(direction, threshold)
+        return required is not None and abs(price_diff) >= required
+
+    def status(self) -> str:
+        """全部仓位的简短描述，用于日志"""
+        self._prune()
+        if not self.lots:
+            return "空闲"
+        return "；".join(lot.describe() for lot in self.lots)
+
+    def open(self, direction: str, size: float, entry_spread: float, cycle: Optional[dict],
+             notional: float = 0.0, hold_seconds: Optional[int] = None,
+             exit_state: Optional[dict] = None) -> HedgeLot:
+        """
+        登记一笔已开仓的仓位并立即开始持仓计时（进入账本时已是 HOLDING，不会被当作已结束的仓位移除）
+
+        Args:
+            hold_seconds: 持仓时间（秒），None 时由持仓管理器在 hold_range 内随机
+            exit_state: 平仓策略状态（ExitPolicy.open 的返回值）
+        """
+        lot = HedgeLot(self.next_id, direction, size, entry_spread, cycle, None, notional)
+        lot.exit_state = exit_state
+        lot.manager = self.make_manager(lot)
+        close = lot.manager.close
+        lot.manager.close = lambda: self._close_lot(lot, close)
+        lot.manager.start_hold(cycle, hold_seconds=hold_seconds)
+        self.next_id += 1
+        self.lots.append(lot)
+        return lot
+
+    def check_exit(self, policy, price_diff: float) -> List[Tuple[HedgeLot, str, str]]:
+        """
+        用平仓策略逐笔检查持仓中的仓位，触发的仓位记录平仓原因并立即开始平仓
+
+        Args:
+            policy: 平仓策略（ExitPolicy）
+            price_diff: 最新价差（GRVT - Paradex）
+
+        Returns:
+            list: 本次触发平仓的 (仓位, 平仓原因, 触发时的策略状态描述)
+        """
+        triggered = []
+        for lot in self.holding:
+            if lot.exit_state is None:
+                continue
+            reason = policy.evaluate(lot.exit_state, price_diff)
+            if reason is None:
+                continue
+            triggered.append((lot, reason, policy.describe(lot.exit_state)))
+            lot.exit_reason = reason
+            lot.exit_state = None
+            lot.manager.close_now()
+        return triggered
+
+    async def _close_lot(self, lot: HedgeLot, close: Callable[[], Awaitable[bool]]) -> bool:
+        """一次平仓尝试：强平风控触发后不再走条件平仓，等待（必要时重新发起）强制平仓"""
+        if lot.force_close and self.force_close is not None:
+            return await asyncio.shield(self.force_close())
+        return await close()
+
+    def force_close_all(self, reason: str = "liquidation") -> int:
+        """持仓中和平仓中的仓位全部改为强制平仓并立即开始平仓，返回标记的数量"""
+        active = self.active
+        for lot in active:
+            lot.force_close = True
+            lot.exit_reason = lot.exit_reason or reason
+        self.close_all_now()
+        return len(active)
+
+    def close_all_now(self) -> int:
+        """全部持仓中的仓位立即开始平仓，返回数量"""
+        holding = self.holding
+        for lot in holding:
+            lot.manager.close_now()
+        return len(holding)
+
+    async def wait_flat(self):
+        """等待全部仓位平仓（平仓失败的仓位不再等待）"""
+        while True:
+            active = self.active
+            if not active:
+                return
+            await asyncio.gather(*(lot.manager.wait_flat() for lot in active))
+
+    async def stop(self):
+        """取消全部仓位的后台计时；未平仓的仓位保持持仓"""
+        await asyncio.gather(*(lot.manager.stop() for lot in self.lots))
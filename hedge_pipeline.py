@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+对冲流水线
+报价生产 -> 信号判断 -> 下单执行 三个协程通过丢弃最旧数据的有界队列连接：
+执行一笔多秒的下单时报价和信号照常更新，执行器每次都拿到最新的机会
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+
+class DropOldestQueue:
+    """满了就丢弃最旧元素的有界 asyncio 队列，生产方永不阻塞"""
+
+    def __init__(self, maxsize: int = 1):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, item: Any):
+        while self._queue.full():
+            try:
+                self._queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                break
+        self._queue.put_nowait(item)
+
+    async def get(self) -> Any:
+        return await self._queue.get()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+
+class HedgePipeline:
+    """把 HedgeTradingBot 的监控循环拆成报价生产、信号判断和执行三个阶段"""
+
+    def __init__(
+            self,
+            bot,
+            quote_interval: Optional[float] = None,
+            queue_size: int = 1,
+            max_signal_age: Optional[float] = None,
+    ):
+        """
+        Args:
+            bot: HedgeTradingBot（提供 get_price_difference / should_open / execute_opportunity）
+            quote_interval: 报价读取间隔（秒），None 时使用 bot.check_interval
+            queue_size: 报价队列和信号队列的容量，满了丢弃最旧的
+            max_signal_age: 信号最大有效期（秒），执行前超过该时间的信号直接丢弃；None 时为两个报价间隔
+        """
+        self.bot = bot
+        self.quote_interval = quote_interval if quote_interval is not None else bot.check_interval
+        self.max_signal_age = max_signal_age if max_signal_age is not None else 2 * self.quote_interval
+
+        self.quotes = DropOldestQueue(queue_size)
+        self.signals = DropOldestQueue(queue_size)
+
+        self.quote_count = 0
+        self.signal_count = 0
+        self.executed_count = 0
+        self.stale_count = 0
+
+        self._task: Optional[asyncio.Task] = None
+
+    async def produce_quotes(self):
+        """报价生产：按固定节奏读取两边价格，不等待信号和执行"""
+        while True:
+            started = time.time()
+            try:
+                grvt_price, paradex_price, price_diff = await self.bot.get_price_difference()
+                if grvt_price is not None and paradex_price is not None and price_diff is not None:
+                    self.quotes.put({
+                        'ts': started,
+                        'grvt_price': grvt_price,
+                        'paradex_price': paradex_price,
+                        'price_diff': price_diff,
+                        'paradex_quote': self.bot.last_paradex_quote,
+                        'route': self.bot.last_route,
+                    })
+                    self.quote_count += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ 读取报价出错: {e}")
+
+            await asyncio.sleep(max(0.0, self.quote_interval - (time.time() - started)))
+
+    async def generate_signals(self):
+        """信号判断：对每个报价做开仓检查，通过的作为信号交给执行器"""
+        while True:
+            quote = await self.quotes.get()
+            try:
+                if self.bot.should_open(quote['grvt_price'], quote['paradex_price'], quote['price_diff'],
+                                        route=quote['route']):
+                    self.signals.put(quote)
+                    self.signal_count += 1
+            except Exception as e:
+                print(f"❌ 生成信号出错: {e}")
+
+    async def execute_signals(self):
+        """执行：只处理仍然新鲜的信号，执行期间积压的旧信号已被更新的覆盖"""
+        while True:
+            signal = await self.signals.get()
+
+            if not self.bot.is_running:
+                continue
+
+            age = time.time() - signal['ts']
+            if age > self.max_signal_age:
+                self.stale_count += 1
+                print(f"ℹ️  信号已过期 {age:.1f} 秒（上限 {self.max_signal_age:.1f} 秒），丢弃")
+                continue
+
+            # 信号生成后状态可能已变化（例如刚开了仓），执行前再检查一次
+            if not self.bot.should_open(signal['grvt_price'], signal['paradex_price'], signal['price_diff'],
+                                        route=signal['route']):
+                continue
+
+            try:
+                await self.bot.execute_opportunity(
+                    signal['grvt_price'],
+                    signal['paradex_price'],
+                    signal['price_diff'],
+                    paradex_quote=signal['paradex_quote'],
+                    route=signal['route'],
+                )
+                self.executed_count += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ 执行信号出错: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """各阶段计数"""
+        return {
+            'quotes': self.quote_count,
+            'signals': self.signal_count,
+            'executed': self.executed_count,
+            'stale_signals': self.stale_count,
+            'dropped_quotes': self.quotes.dropped,
+            'dropped_signals': self.signals.dropped,
+        }
+
+    async def run(self):
+        await asyncio.gather(
+            self.produce_quotes(),
+            self.generate_signals(),
+            self.execute_signals(),
+        )
+
+    def start(self) -> asyncio.Task:
+        """在后台启动流水线"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """停止流水线的全部阶段"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
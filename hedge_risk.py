@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+"""
+对冲风控组件
+包含跨平台净敞口对账、强平距离监控等后台风控任务，以及多品种共享的账户级风控
+"""
+
+import asyncio
+import re
+from datetime import datetime
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Iterable, Optional
+
+if TYPE_CHECKING:
+    # 仅用于类型标注；grvt 模块本身引用 base_asset，运行时导入会形成循环
+    from grvt import GrvtTradingBot
+    from paradex_trader import ParadexTrader
+
+
+def base_asset(symbol: str) -> str:
+    """
+    提取交易品种的基础资产，用于跨平台对齐
+
+    例如 "BTC-USDT" / "BTC-USD-PERP" / "BTC Perp" -> "BTC"
+    """
+    parts = re.split(r'[-_/\s]+', (symbol or '').strip().upper())
+    return parts[0] if parts else ''
+
+
+class ExposureReconciler:
+    """跨平台净敞口对账器（GRVT + Paradex）"""
+
+    def __init__(
+            self,
+            grvt_bot: "GrvtTradingBot",
+            paradex_trader: "ParadexTrader",
+            tolerance: float = 0.0005,
+            interval: float = 15,
+            confirm_checks: int = 2,
+            auto_flatten: bool = False,
+            is_busy: Optional[Callable[[], bool]] = None,
+            set_busy: Optional[Callable[[bool], None]] = None,
+            on_alert: Optional[Callable[[str, float], Awaitable[None]]] = None,
+            assets: Optional[Iterable[str]] = None,
+    ):
+        """
+        Args:
+            tolerance: 允许的净敞口（币数量），超过即视为不平衡
+            interval: 后台对账间隔（秒）
+            confirm_checks: 连续多少次不平衡才告警/自动平衡，避免两腿之间的瞬时误报
+            auto_flatten: 是否在确认不平衡后用 Paradex 市价单补齐差额
+            is_busy: 返回 True 时跳过本轮对账（下单流程正在操作页面）
+            set_busy: 设置下单占用标志；自动平衡下单期间置为 True，下单流程不会同时操作页面
+            on_alert: 确认不平衡时的回调 (资产, 净敞口)
+            assets: 只对账这些基础资产（如 {"BTC"}），None 表示全部
+        """
+        self.grvt_bot = grvt_bot
+        self.paradex_trader = paradex_trader
+        self.tolerance = tolerance
+        self.interval = interval
+        self.confirm_checks = confirm_checks
+        self.auto_flatten = auto_flatten
+        self.is_busy = is_busy
+        self.set_busy = set_busy
+        self.on_alert = on_alert
+        self.assets = {asset.upper() for asset in assets} if assets else None
+
+        self.net_exposure: Dict[str, float] = {}
+        self.imbalance_streak: Dict[str, int] = {}
+        self.last_reconcile_time: Optional[datetime] = None
+
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_balanced(self) -> bool:
+        """最近一次对账是否所有资产都在容差内"""
+        return all(abs(net) <= self.tolerance for net in self.net_exposure.values())
+
+    async def reconcile_once(self) -> Optional[Dict[str, float]]:
+        """
+        读取两边持仓并计算每个资产的带符号净敞口
+
+        Returns:
+            dict: {资产: 净敞口}，读取失败返回 None
+        """
+        grvt_positions, paradex_positions = await asyncio.gather(
+            self.grvt_bot.get_positions_snapshot(),
+            self.paradex_trader.get_positions_snapshot()
+        )
+
+        if grvt_positions is None or paradex_positions is None:
+            print("⚠️ 敞口对账：无法读取持仓，跳过本轮")
+            return None
+
+        net_exposure: Dict[str, float] = {}
+        for pos in grvt_positions:
+            asset = base_asset(pos['product'])
+            net_exposure[asset] = net_exposure.get(asset, 0.0) + pos['quantity']
+        for pos in paradex_positions:
+            asset = base_asset(pos['market'])
+            net_exposure[asset] = net_exposure.get(asset, 0.0) + pos['size']
+
+        if self.assets is not None:
+            net_exposure = {asset: net for asset, net in net_exposure.items() if asset in self.assets}
+
+        self.net_exposure = net_exposure
+        self.last_reconcile_time = datetime.now()
+
+        for asset, net in net_exposure.items():
+            if abs(net) <= self.tolerance:
+                self.imbalance_streak[asset] = 0
+                continue
+
+            streak = self.imbalance_streak.get(asset, 0) + 1
+            self.imbalance_streak[asset] = streak
+            print(f"⚠️ 敞口不平衡: {asset} 净敞口 {net:+.6f}（第{streak}次）")
+
+            if streak >= self.confirm_checks:
+                await self._handle_imbalance(asset, net)
+
+        for asset in list(self.imbalance_streak):
+            if asset not in net_exposure:
+                self.imbalance_streak[asset] = 0
+
+        return net_exposure
+
+    async def _handle_imbalance(self, asset: str, net: float):
+        """确认不平衡后告警，并按配置自动补齐"""
+        print("\n" + "🚨" * 30)
+        print(f"净敞口超出容差: {asset} {net:+.6f}（容差 {self.tolerance}）")
+        print("🚨" * 30 + "\n")
+
+        if self.on_alert:
+            try:
+                await self.on_alert(asset, net)
+            except Exception as e:
+                print(f"❌ 敞口告警回调失败: {e}")
+
+        if not self.auto_flatten:
+            print("ℹ️ 未开启自动平衡，请手动处理")
+            return
+
+        paradex_market = self.paradex_trader.page.url.rstrip('/').split('/')[-1]
+        if base_asset(paradex_market) != asset:
+            print(f"⚠️ Paradex 页面当前为 {paradex_market}，无法自动平衡 {asset}")
+            return
+
+        # 告警回调期间下单流程可能已开始操作页面，下单前重新检查并占用
+        if self.is_busy is not None and self.is_busy():
+            print("ℹ️ 下单流程正在操作页面，本轮不自动平衡")
+            return
+
+        side = "SELL" if net > 0 else "BUY"
+        print(f"🔧 自动平衡: Paradex 市价 {side} {abs(net):.6f}")
+        if self.set_busy is not None:
+            self.set_busy(True)
+        try:
+            flattened = await self.paradex_trader.execute_market_order(side=side, order_size=round(abs(net), 6), verify=True)
+        finally:
+            if self.set_busy is not None:
+                self.set_busy(False)
+
+        if flattened:
+            self.imbalance_streak[asset] = 0
+            print("✅ 自动平衡完成")
+        else:
+            print("❌ 自动平衡失败，请手动处理")
+
+    async def run(self):
+        """后台循环对账"""
+        print(f"🔍 敞口对账已启动（间隔 {self.interval}秒，容差 {self.tolerance}）")
+        while True:
+            try:
+                if self.is_busy is None or not self.is_busy():
+                    await self.reconcile_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ 敞口对账出错: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> asyncio.Task:
+        """启动后台对账任务"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """停止后台对账任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class LiquidationMonitor:
+    """GRVT 持仓强平距离监控器"""
+
+    def __init__(
+            self,
+            grvt_bot: "GrvtTradingBot",
+            threshold: float = 0.05,
+            interval: float = 2,
+            on_breach: Optional[Callable[[Dict, float], Awaitable[None]]] = None,
+            assets: Optional[Iterable[str]] = None,
+    ):
+        """
+        Args:
+            threshold: 强平距离阈值（比例），如 0.05 表示标记价距强平价不足 5% 时触发
+            interval: 轮询间隔（秒）
+            on_breach: 低于阈值时的提前平仓回调 (持仓, 强平距离)
+            assets: 只监控这些基础资产，None 表示全部
+        """
+        self.grvt_bot = grvt_bot
+        self.threshold = threshold
+        self.interval = interval
+        self.on_breach = on_breach
+        self.assets = {asset.upper() for asset in assets} if assets else None
+
+        # {产品: {liq_price, mark_price, distance, updated_at}}
+        self.positions: Dict[str, Dict] = {}
+        self.skipped_reads = 0
+
+        self._breached: Dict[str, bool] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def liquidation_distance(mark_price: Optional[float], liq_price: Optional[float]) -> Optional[float]:
+        """标记价到强平价的相对距离，数据无效返回 None"""
+        if not mark_price or not liq_price or mark_price <= 0 or liq_price <= 0:
+            return None
+        return abs(mark_price - liq_price) / mark_price
+
+    async def check_once(self) -> Optional[Dict[str, Dict]]:
+        """
+        被动读取一次持仓表格（Positions 标签未激活时不切换，直接跳过）
+
+        Returns:
+            dict: 最新的强平距离表，本轮未读取返回 None
+        """
+        snapshot = await self.grvt_bot.get_positions_snapshot(switch_tab=False)
+        if snapshot is None:
+            self.skipped_reads += 1
+            return None
+
+        now = datetime.now()
+        positions = {}
+        for pos in snapshot:
+            if self.assets is not None and base_asset(pos['product']) not in self.assets:
+                continue
+
+            distance = self.liquidation_distance(pos['mark_price'], pos['liq_price'])
+            positions[pos['product']] = {
+                'quantity': pos['quantity'],
+                'liq_price': pos['liq_price'],
+                'mark_price': pos['mark_price'],
+                'distance': distance,
+                'updated_at': now,
+            }
+
+            if distance is None:
+                continue
+
+            if distance < self.threshold:
+                if not self._breached.get(pos['product']):
+                    self._breached[pos['product']] = True
+                    print(f"🚨 {pos['product']} 距强平仅 {distance:.2%}"
+                          f"（标记价 {pos['mark_price']}，强平价 {pos['liq_price']}）")
+                    if self.on_breach:
+                        try:
+                            await self.on_breach(pos, distance)
+                        except Exception as e:
+                            print(f"❌ 提前平仓回调失败: {e}")
+            else:
+                self._breached[pos['product']] = False
+
+        self.positions = positions
+        return positions
+
+    async def run(self):
+        """后台循环监控"""
+        print(f"🛡️ 强平距离监控已启动（阈值 {self.threshold:.2%}，间隔 {self.interval}秒）")
+        while True:
+            try:
+                await self.check_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ 强平监控出错: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> asyncio.Task:
+        """启动后台监控任务"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """停止后台监控任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class AccountRiskManager:
+    """账户级共享风控，多个品种的对冲机器人共用同一个实例"""
+
+    def __init__(self, max_open_hedges: int = 3, max_total_notional: Optional[float] = None):
+        """
+        Args:
+            max_open_hedges: 同时持有对冲仓位的品种数上限
+            max_total_notional: 所有品种单腿名义价值之和上限（美元），None 表示不限
+        """
+        self.max_open_hedges = max_open_hedges
+        self.max_total_notional = max_total_notional
+
+        # {资产: 单腿名义价值}
+        self.open_hedges: Dict[str, float] = {}
+        self.halted = False
+        self.halt_reason = ''
+
+    @property
+    def total_notional(self) -> float:
+        return sum(self.open_hedges.values())
+
+    def try_acquire(self, asset: str, notional: float, scale_in: bool = False) -> bool:
+        """
+        开仓前申请风险额度
+
+        Args:
+            asset: 基础资产
+            notional: 本次单腿名义价值
+            scale_in: 是否为已有对冲仓位的品种加仓（不占用新的品种名额，名义价值累加）
+
+        Returns:
+            bool: 是否允许开仓
+        """
+        if self.halted:
+            print(f"⛔ 账户风控已暂停开仓: {self.halt_reason}")
+            return False
+
+        if asset in self.open_hedges and not scale_in:
+            print(f"⚠️ {asset} 已有对冲仓位，不重复开仓")
+            return False
+
+        if asset not in self.open_hedges and len(self.open_hedges) >= self.max_open_hedges:
+            print(f"⚠️ 同时对冲品种数已达上限 {self.max_open_hedges}")
+            return False
+
+        if self.max_total_notional is not None and self.total_notional + notional > self.max_total_notional:
+            print(f"⚠️ 总名义价值将超过上限 ${self.max_total_notional:,.2f}"
+                  f"（当前 ${self.total_notional:,.2f}，本次 ${notional:,.2f}）")
+            return False
+
+        self.open_hedges[asset] = self.open_hedges.get(asset, 0.0) + notional
+        return True
+
+    def release(self, asset: str, notional: Optional[float] = None):
+        """
+        平仓（或开仓失败）后释放额度
+
+        Args:
+            asset: 基础资产
+            notional: 释放的名义价值（逐笔平仓时），None 表示释放该品种的全部额度
+        """
+        if notional is None or asset not in self.open_hedges:
+            self.open_hedges.pop(asset, None)
+            return
+        remaining = self.open_hedges[asset] - notional
+        if remaining <= 1e-9:
+            self.open_hedges.pop(asset, None)
+        else:
+            self.open_hedges[asset] = remaining
+
+    def halt(self, reason: str):
+        """暂停所有品种开新仓"""
+        self.halted = True
+        self.halt_reason = reason
+        print(f"⛔ 账户风控暂停开仓: {reason}")
+
+    def resume(self):
+        """恢复开仓"""
+        self.halted = False
+        self.halt_reason = ''
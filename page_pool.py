@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+热备页面池
+为每个交易页面预先打开并加载好备用页面，页面崩溃、卡死或掉登录时立即切换到备用页面
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from playwright.async_api import BrowserContext, Page
+
+from browser_profile import open_window
+
+
+class PagePool:
+    """持久化浏览器上下文上的热备页面池"""
+
+    def __init__(
+            self,
+            context: BrowserContext,
+            spares_per_key: int = 1,
+            health_interval: float = 5,
+            freeze_timeout: float = 3,
+            probe_timeout: int = 3000,
+            page_setup: Optional[Callable[[Page], Awaitable[None]]] = None,
+            new_window: bool = False,
+    ):
+        """
+        Args:
+            context: 浏览器上下文
+            spares_per_key: 每个页面类型保持的备用页面数量
+            health_interval: 健康检查间隔（秒）
+            freeze_timeout: 执行一段 JS 超过该时间（秒）视为页面卡死
+            probe_timeout: 就绪探针的超时时间（毫秒）
+            page_setup: 新页面导航前的初始化（如 RenderProfile.apply）
+            new_window: 备用页面是否在独立窗口中打开（换上后与原页面一样处于前台，不被当作后台标签页降频）
+        """
+        self.context = context
+        self.spares_per_key = spares_per_key
+        self.health_interval = health_interval
+        self.freeze_timeout = freeze_timeout
+        self.probe_timeout = probe_timeout
+        self.page_setup = page_setup
+        self.new_window = new_window
+
+        # {key: url}、{key: 就绪探针}、{key: [备用页面]}
+        self.urls: Dict[str, str] = {}
+        self.probes: Dict[str, Callable[[Page, int], Awaitable[bool]]] = {}
+        self.spares: Dict[str, List[Page]] = {}
+
+        self.swap_count = 0
+        self.last_swap_seconds: Optional[float] = None
+
+        self._refill_tasks: Dict[str, asyncio.Task] = {}
+        self._watch_tasks: List[asyncio.Task] = []
+
+    def register(self, key: str, url: str, probe: Callable[[Page, int], Awaitable[bool]]):
+        """
+        注册一种页面
+
+        Args:
+            key: 页面类型，例如 "grvt:BTC-USDT"
+            url: 页面地址
+            probe: 就绪探针 (page, 超时毫秒) -> 是否就绪，未登录时也应返回 False
+        """
+        self.urls[key] = url
+        self.probes[key] = probe
+        self.spares.setdefault(key, [])
+
+    async def _open_ready_page(self, key: str) -> Optional[Page]:
+        """打开一个新页面，导航并等待就绪"""
+        page = await open_window(self.context) if self.new_window else await self.context.new_page()
+        try:
+            if self.page_setup:
+                await self.page_setup(page)
+            await page.goto(self.urls[key])
+            if await self.probes[key](page, 30000):
+                return page
+            print(f"⚠️ 备用页面 {key} 未就绪")
+        except Exception as e:
+            print(f"⚠️ 打开备用页面 {key} 失败: {e}")
+
+        await self._close_quietly(page)
+        return None
+
+    async def fill(self, key: Optional[str] = None):
+        """把备用页面补充到 spares_per_key 个"""
+        keys = [key] if key else list(self.urls)
+        for k in keys:
+            while len(self.spares[k]) < self.spares_per_key:
+                page = await self._open_ready_page(k)
+                if page is None:
+                    break
+                self.spares[k].append(page)
+                print(f"✓ 备用页面就绪: {k}（{len(self.spares[k])}/{self.spares_per_key}）")
+
+    def _schedule_refill(self, key: str):
+        task = self._refill_tasks.get(key)
+        if task is None or task.done():
+            self._refill_tasks[key] = asyncio.create_task(self.fill(key))
+
+    async def check_health(self, key: str, page: Page, full: bool = True) -> bool:
+        """
+        检查页面健康状态
+
+        Args:
+            full: 为 False 时只检查页面是否关闭/卡死，不运行就绪探针
+
+        Returns:
+            bool: 页面是否健康
+        """
+        if page.is_closed():
+            return False
+
+        try:
+            await asyncio.wait_for(page.evaluate("1"), timeout=self.freeze_timeout)
+        except Exception:
+            return False
+
+        if not full:
+            return True
+
+        return await self.probes[key](page, self.probe_timeout)
+
+    async def swap(self, key: str, bad_page: Optional[Page] = None) -> Optional[Page]:
+        """
+        用备用页面替换故障页面，没有备用页面时现场打开一个
+
+        Returns:
+            Page: 新页面，失败返回 None
+        """
+        start = time.perf_counter()
+
+        page = None
+        while self.spares[key]:
+            candidate = self.spares[key].pop(0)
+            if await self.check_health(key, candidate, full=False):
+                page = candidate
+                break
+            await self._close_quietly(candidate)
+
+        if page is None:
+            print(f"⚠️ {key} 没有可用的备用页面，重新打开...")
+            page = await self._open_ready_page(key)
+            if page is None:
+                return None
+
+        await page.bring_to_front()
+        self.swap_count += 1
+        self.last_swap_seconds = time.perf_counter() - start
+        print(f"🔁 {key} 已切换到备用页面（耗时 {self.last_swap_seconds * 1000:.0f}ms）")
+
+        if bad_page is not None:
+            asyncio.create_task(self._close_quietly(bad_page))
+        self._schedule_refill(key)
+
+        return page
+
+    async def _watch(
+            self,
+            key: str,
+            get_page: Callable[[], Page],
+            set_page: Callable[[Page], None],
+            is_busy: Optional[Callable[[], bool]] = None,
+    ):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                page = get_page()
+                # 下单流程进行中只检查崩溃/卡死，避免探针误判导致中途换页
+                busy = is_busy is not None and is_busy()
+                if await self.check_health(key, page, full=not busy):
+                    continue
+
+                print(f"❌ {key} 页面不健康，准备切换")
+                new_page = await self.swap(key, page)
+                if new_page is not None:
+                    set_page(new_page)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ {key} 健康检查出错: {e}")
+
+    def watch(
+            self,
+            key: str,
+            get_page: Callable[[], Page],
+            set_page: Callable[[Page], None],
+            is_busy: Optional[Callable[[], bool]] = None,
+    ) -> asyncio.Task:
+        """
+        后台监控一个正在使用的页面，不健康时替换为备用页面
+
+        Args:
+            get_page: 返回当前使用的页面
+            set_page: 页面被替换后的回调
+            is_busy: 返回 True 时只做轻量检查
+        """
+        task = asyncio.create_task(self._watch(key, get_page, set_page, is_busy))
+        self._watch_tasks.append(task)
+        return task
+
+    @staticmethod
+    async def _close_quietly(page: Page):
+        try:
+            if not page.is_closed():
+                await page.close()
+        except Exception:
+            pass
+
+    async def close(self):
+        """停止监控并关闭所有备用页面"""
+        for task in self._watch_tasks + list(self._refill_tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._watch_tasks, *self._refill_tasks.values(), return_exceptions=True)
+        self._watch_tasks = []
+        self._refill_tasks = {}
+
+        for pages in self.spares.values():
+            for page in pages:
+                await self._close_quietly(page)
+            pages.clear()
@@ -17,18 +17,35 @@ class ParadexTrader:
     def __init__(self, page: Page):
         self.page = page
 
-    async def wait_for_page_ready(self, timeout: int = 30000) -> bool:
+        # 独立的持仓/委托面板页面；为 None 时与交易页面共用，需要在同一页面上切换标签
+        self.positions_page: Optional[Page] = None
+        self.orders_page: Optional[Page] = None
+
+    @property
+    def positions_view(self) -> Page:
+        """读取/操作持仓表格使用的页面"""
+        return self.positions_page or self.page
+
+    @property
+    def orders_view(self) -> Page:
+        """读取/操作委托表格使用的页面"""
+        return self.orders_page or self.page
+
+    async def wait_for_page_ready(self, timeout: int = 30000, settle_delay: float = 2, quiet: bool = False) -> bool:
         """
         等待页面关键元素加载完成
 
         Args:
             timeout: 超时时间（毫秒）
+            settle_delay: 元素出现后额外等待的时间（秒），健康检查时传 0
+            quiet: 是否不打印日志
 
         Returns:
             bool: 是否加载成功
         """
         try:
-            print("等待页面加载...")
+            if not quiet:
+                print("等待页面加载...")
 
             await self.page.wait_for_selector(
                 '[role="grid"][aria-readonly="true"]',
@@ -48,13 +65,16 @@ class ParadexTrader:
                 timeout=timeout
             )
 
-            await asyncio.sleep(2)
+            if settle_delay:
+                await asyncio.sleep(settle_delay)
 
-            print("✓ 页面加载完成")
+            if not quiet:
+                print("✓ 页面加载完成")
             return True
 
         except Exception as e:
-            print(f"✗ 页面加载超时: {e}")
+            if not quiet:
+                print(f"✗ 页面加载超时: {e}")
             return False
 
     def extract_price_from_label(self, aria_label: str) -> Optional[float]:
@@ -198,6 +218,44 @@ class ParadexTrader:
         print(f"✗ 获取最低卖价失败")
         return None
 
+    async def get_orderbook_depth(self, levels: int = 10) -> Optional[Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]]:
+        """
+        一次 evaluate 批量读取订单簿多档深度（不打印日志，适合高频调用）
+
+        Args:
+            levels: 每边读取的档数
+
+        Returns:
+            (bids, asks): 买盘按价格从高到低、卖盘从低到高，每档为 (价格, 数量)；失败返回 None
+        """
+        try:
+            raw_levels = await self.page.locator('[aria-label*="Bid @"], [aria-label*="Ask @"]').evaluate_all('''
+                (elements) => elements.map((el) => ({
+                    label: el.getAttribute('aria-label') || '',
+                    text: el.innerText || '',
+                }))
+            ''')
+
+            bids, asks = [], []
+            for raw in raw_levels:
+                price = self.extract_price_from_label(raw['label'])
+                if price is None:
+                    continue
+                # 行内文本依次为 价格、数量、累计，取价格之后的第一个数字作为数量
+                numbers = [float(n) for n in re.findall(r'\d+(?:\.\d+)?', raw['text'].replace(',', ''))]
+                if price in numbers:
+                    numbers.remove(price)
+                size = numbers[0] if numbers else 0.0
+                (bids if raw['label'].startswith('Bid') else asks).append((price, size))
+
+            bids.sort(key=lambda level: -level[0])
+            asks.sort(key=lambda level: level[0])
+            return bids[:levels], asks[:levels]
+
+        except Exception as e:
+            print(f"✗ 读取 Paradex 订单簿深度失败: {e}")
+            return None
+
     def calculate_mid_price(self, bid: float, ask: float) -> float:
         """
         计算买卖价的中间价
@@ -638,7 +696,7 @@ class ParadexTrader:
 
             await asyncio.sleep(2)
 
-            open_orders_tab = self.page.locator(
+            open_orders_tab = self.orders_view.locator(
                 'button[role="tab"][id*="trigger-open-orders"]'
             )
 
@@ -648,7 +706,7 @@ class ParadexTrader:
             print("✓ 已切换到未结订单标签")
             await asyncio.sleep(0.5)
 
-            orders_panel = self.page.locator(
+            orders_panel = self.orders_view.locator(
                 'div[role="tabpanel"][id*="open-orders"][data-state="active"]'
             )
             await expect(orders_panel).to_be_visible(timeout=5000)
@@ -702,7 +760,7 @@ class ParadexTrader:
         try:
             print("\n检查未结订单...")
 
-            open_orders_tab = self.page.locator(
+            open_orders_tab = self.orders_view.locator(
                 'button[role="tab"]:has-text("未结订单")'
             )
 
@@ -713,7 +771,7 @@ class ParadexTrader:
             await open_orders_tab.click()
             await asyncio.sleep(0.5)
 
-            orders_panel = self.page.locator(
+            orders_panel = self.orders_view.locator(
                 'div[role="tabpanel"][id="open-orders"]'
             )
 
@@ -748,7 +806,7 @@ class ParadexTrader:
         try:
             print("\n检查持仓变化...")
 
-            positions_tab = self.page.locator(
+            positions_tab = self.positions_view.locator(
                 'button[role="tab"]:has-text("位置"), button[role="tab"]:has-text("持仓")'
             ).first
 
@@ -759,7 +817,7 @@ class ParadexTrader:
             await positions_tab.click()
             await asyncio.sleep(0.5)
 
-            positions_panel = self.page.locator(
+            positions_panel = self.positions_view.locator(
                 'div[role="tabpanel"][id="open-positions"]'
             )
 
@@ -809,7 +867,7 @@ class ParadexTrader:
         try:
             print("\n获取当前持仓...")
 
-            positions_tab = self.page.locator(
+            positions_tab = self.positions_view.locator(
                 'button[role="tab"]:has-text("位置")'
             ).first
 
@@ -821,7 +879,7 @@ class ParadexTrader:
                 await positions_tab.click()
                 await asyncio.sleep(0.5)
 
-            positions_panel = self.page.locator(
+            positions_panel = self.positions_view.locator(
                 'div[role="tabpanel"][id="open-positions"]'
             )
 
@@ -876,6 +934,86 @@ class ParadexTrader:
             print(f"✗ 获取持仓失败: {e}")
             return []
 
+    @staticmethod
+    def _parse_number(text: Optional[str]) -> Optional[float]:
+        """
+        从单元格文本中解析第一个数字
+
+        Args:
+            text: 如 "0.002 BTC"、"+$1.23"、"-$1.23"
+
+        Returns:
+            float: 解析出的数字，无效返回 None
+        """
+        if not text:
+            return None
+        # 先去掉 $、+ 和千分位，"-$1.23" 的负号才能紧挨数字
+        cleaned = text.replace('$', '').replace('+', '').replace(',', '')
+        match = re.search(r'-?\d+(?:\.\d+)?', cleaned)
+        if not match:
+            return None
+        return float(match.group(0))
+
+    async def get_positions_snapshot(self, switch_tab: bool = True) -> Optional[List[Dict]]:
+        """
+        一次 evaluate 批量读取持仓表格
+
+        Args:
+            switch_tab: 持仓标签未激活时是否切换过去；为 False 时直接返回 None
+
+        Returns:
+            list: 持仓列表，每个元素包含 {market, side, size(带符号), upnl}；
+                  标签未激活且不允许切换时返回 None
+        """
+        try:
+            positions_tab = self.positions_view.locator(
+                'button[role="tab"]:has-text("位置"), button[role="tab"]:has-text("持仓")'
+            ).first
+
+            if await positions_tab.get_attribute('aria-selected') != 'true':
+                if not switch_tab:
+                    return None
+                await positions_tab.click()
+
+            positions_panel = self.positions_view.locator('div[role="tabpanel"][id="open-positions"]')
+            await expect(positions_panel).to_be_visible(timeout=5000)
+
+            raw_rows = await positions_panel.locator('tbody tr').evaluate_all('''
+                (rows) => rows.map((row) => {
+                    const cells = Array.from(row.querySelectorAll('td'))
+                        .map((cell) => (cell.innerText || '').trim());
+                    const link = row.querySelector('td a');
+                    return { market: link ? link.innerText.split('\\n')[0].trim() : (cells[0] || ''), cells: cells };
+                })
+            ''')
+
+            positions = []
+            for raw in raw_rows:
+                cells = raw['cells']
+                if len(cells) < 3:
+                    continue
+
+                size = self._parse_number(cells[2])
+                if size is None:
+                    continue
+
+                side = cells[1]
+                is_short = any(word in side for word in ('空', '卖', 'Short', 'SHORT', 'Sell', 'SELL'))
+                size = -abs(size) if is_short else abs(size)
+
+                positions.append({
+                    'market': raw['market'],
+                    'side': side,
+                    'size': size,
+                    'upnl': self._parse_number(cells[7]) if len(cells) > 7 else None,
+                })
+
+            return positions
+
+        except Exception as e:
+            print(f"✗ 批量读取持仓失败: {e}")
+            return None
+
     async def close_position_market(self, market: str = None, row_index: int = None) -> bool:
         """
         使用市价单平仓
@@ -892,7 +1030,7 @@ class ParadexTrader:
             print(f"开始市价平仓: {market if market else f'第{row_index + 1}个持仓'}")
             print("=" * 60)
 
-            positions_tab = self.page.locator(
+            positions_tab = self.positions_view.locator(
                 'button[role="tab"]:has-text("位置")'
             ).first
 
@@ -900,7 +1038,7 @@ class ParadexTrader:
                 await positions_tab.click()
                 await asyncio.sleep(0.5)
 
-            positions_panel = self.page.locator(
+            positions_panel = self.positions_view.locator(
                 'div[role="tabpanel"][id="open-positions"]'
             )
 
@@ -955,13 +1093,13 @@ class ParadexTrader:
             # 等待弹窗出现
             print("等待平仓确认弹窗...")
 
-            modal_title = self.page.locator('h1:has-text("市场关闭")')
+            modal_title = self.positions_view.locator('h1:has-text("市场关闭")')
 
             if await modal_title.count() > 0 and await modal_title.is_visible():
                 print("✓ 平仓确认弹窗已出现")
 
                 try:
-                    action_div = self.page.locator('div.MarketCloseModal__Action-sc-10otwkl-5').first
+                    action_div = self.positions_view.locator('div.MarketCloseModal__Action-sc-10otwkl-5').first
                     if await action_div.is_visible():
                         action_text = (await action_div.text_content()).strip()
                         print(f"  操作类型: {action_text}")
@@ -978,7 +1116,7 @@ class ParadexTrader:
                 confirm_button = None
 
                 for selector in confirm_button_selectors:
-                    btn = self.page.locator(selector)
+                    btn = self.positions_view.locator(selector)
                     if await btn.count() > 0 and await btn.is_visible():
                         confirm_button = btn.first
                         break
@@ -1161,7 +1299,8 @@ class ParadexTrader:
         print("=" * 60 + "\n")
         return True
 
-    async def execute_limit_order(self, side: str = "BUY", order_size: float = 0.02, verify: bool = True) -> bool:
+    async def execute_limit_order(self, side: str = "BUY", order_size: float = 0.02, verify: bool = True,
+                                  price: Optional[float] = None) -> bool:
         """
         执行完整的限价订单流程
 
@@ -1169,6 +1308,7 @@ class ParadexTrader:
             side: "BUY" 做多 或 "SELL" 做空
             order_size: 订单大小，默认 0.02
             verify: 是否验证订单成功
+            price: 限价，None 时使用当前中间价
 
         Returns:
             bool: 操作是否成功
@@ -1179,18 +1319,19 @@ class ParadexTrader:
         print(f"开始执行限价订单 ({side_text})")
         print("=" * 60)
 
-        bid = await self.get_highest_bid_price()
-        ask = await self.get_lowest_ask_price()
+        if price is None:
+            bid = await self.get_highest_bid_price()
+            ask = await self.get_lowest_ask_price()
 
-        if bid is None or ask is None:
-            print("❌ 无法获取有效价格，终止操作")
-            return False
+            if bid is None or ask is None:
+                print("❌ 无法获取有效价格，终止操作")
+                return False
 
-        if ask <= bid:
-            print(f"❌ 价格异常：卖价({ask}) <= 买价({bid})，终止操作")
-            return False
+            if ask <= bid:
+                print(f"❌ 价格异常：卖价({ask}) <= 买价({bid})，终止操作")
+                return False
 
-        mid_price = self.calculate_mid_price(bid, ask)
+            price = self.calculate_mid_price(bid, ask)
 
         if not await self.click_limit_order_tab():
             print("❌ 切换限价订单失败，终止操作")
@@ -1204,7 +1345,7 @@ class ParadexTrader:
 
         await asyncio.sleep(0.3)
 
-        if not await self.input_limit_price(mid_price):
+        if not await self.input_limit_price(price):
             print("❌ 输入限价失败，终止操作")
             return False
 
@@ -1251,16 +1392,16 @@ class ParadexTrader:
         """
         异步获取持仓表格中所有订单的 Total UP&L 数据
         """
-        positions_tab = self.page.locator(
+        positions_tab = self.positions_view.locator(
             'button[role="tab"]:has-text("位置"), button[role="tab"]:has-text("持仓")'
         ).first
 
         await positions_tab.click()
         # 等待表格加载
-        await self.page.wait_for_selector('table.table__StyledTable-sc-1ay5exl-1', timeout=10000)
+        await self.positions_view.wait_for_selector('table.table__StyledTable-sc-1ay5exl-1', timeout=10000)
 
         # 获取所有持仓行
-        rows = await self.page.locator('table tbody tr').all()
+        rows = await self.positions_view.locator('table tbody tr').all()
 
         results = []
         for row in rows:
@@ -1291,3 +1432,77 @@ class ParadexTrader:
         return results
 
 
+
+    async def cancel_open_orders(self) -> bool:
+        """
+        取消未结订单标签下的全部订单
+
+        Returns:
+            bool: 操作后是否已没有未结订单
+        """
+        try:
+            open_orders_tab = self.orders_view.locator('button[role="tab"]:has-text("未结订单")').first
+            if await open_orders_tab.get_attribute('aria-selected') != 'true':
+                await open_orders_tab.click()
+
+            orders_panel = self.orders_view.locator('div[role="tabpanel"][id="open-orders"]')
+            await expect(orders_panel).to_be_visible(timeout=5000)
+
+            rows = orders_panel.locator('tbody tr')
+            for _ in range(await rows.count()):
+                cancel_button = rows.first.locator('button:has-text("取消"), button:has-text("Cancel")').last
+                if await cancel_button.count() == 0:
+                    break
+                await cancel_button.click()
+                await asyncio.sleep(0.5)
+
+            remaining = await rows.count()
+            if remaining:
+                print(f"⚠️ 仍有 {remaining} 个未结订单")
+                return False
+
+            print("✓ 未结订单已全部取消")
+            return True
+
+        except Exception as e:
+            print(f"✗ 取消订单失败: {e}")
+            return False
+
+    # ==================== 交易所适配器接口（venues.VenueAdapter） ====================
+
+    venue = "paradex"
+
+    async def get_quote(self) -> Tuple[Optional[float], Optional[float]]:
+        """最优 (买价, 卖价)：一次 evaluate 读取一档深度，失败时退回逐个读取"""
+        depth = await self.get_orderbook_depth(1)
+        if depth and depth[0] and depth[1]:
+            return depth[0][0][0], depth[1][0][0]
+        return await self.get_highest_bid_price(), await self.get_lowest_ask_price()
+
+    async def place_limit_order(self, side: str, size: float, price: float) -> bool:
+        """限价单，side 为 "BUY" 或 "SELL" """
+        return await self.execute_limit_order(side=side, order_size=size, price=price)
+
+    async def place_market_order(self, side: str, size: float) -> bool:
+        """市价单，side 为 "BUY" 或 "SELL" """
+        return await self.execute_market_order(side=side, order_size=size)
+
+    async def cancel_orders(self, symbol: Optional[str] = None) -> bool:
+        """取消全部未结订单（页面只显示当前市场的委托）"""
+        return await self.cancel_open_orders()
+
+    async def get_net_positions(self) -> Optional[Dict[str, float]]:
+        """{市场: 带符号的持仓数量}，读取失败返回 None"""
+        snapshot = await self.get_positions_snapshot()
+        if snapshot is None:
+            return None
+        return {pos['market']: pos['size'] for pos in snapshot}
+
+    async def get_total_pnl(self, symbol: Optional[str] = None) -> Optional[float]:
+        """持仓未实现盈亏合计（symbol 不为 None 时只统计同一基础资产），读取失败返回 None"""
+        snapshot = await self.get_positions_snapshot()
+        if snapshot is None:
+            return None
+        asset = symbol.split('-')[0].upper() if symbol else None
+        return sum(pos['upnl'] or 0.0 for pos in snapshot
+                   if asset is None or pos['market'].split('-')[0].upper() == asset)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+对冲持仓生命周期调度
+持仓时间、平仓重试和冷却期都是后台定时任务，主监控循环不再被长时间 sleep 阻塞，
+期间价差监控、记录和风控检查照常运行
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional, Tuple
+
+
+class PositionManager:
+    """
+    管理一个品种的对冲周期：持仓计时 -> 平仓（失败重试） -> 冷却
+
+    重试次数用完仍未平仓时进入 STUCK（终止状态）：持仓仍在，不再自动平仓也不允许开新仓，需手动平仓后重启
+    """
+
+    IDLE = "idle"
+    HOLDING = "holding"
+    CLOSING = "closing"
+    COOLDOWN = "cooldown"
+    STUCK = "stuck"
+
+    def __init__(
+            self,
+            close: Callable[[], Awaitable[bool]],
+            on_closed: Optional[Callable[[dict], None]] = None,
+            hold_range: Tuple[int, int] = (600, 1200),
+            cooldown_range: Tuple[int, int] = (180, 300),
+            close_retry_interval: float = 3,
+            max_close_retries: int = 500,
+    ):
+        """
+        Args:
+            close: 执行一次平仓尝试，返回是否成功
+            on_closed: 平仓成功后的回调，参数为开仓时传入的周期记录
+            hold_range: 持仓时间范围（秒），每个周期随机取值
+            cooldown_range: 平仓后冷却时间范围（秒）
+            close_retry_interval: 平仓失败后的重试间隔（秒）
+            max_close_retries: 最大平仓尝试次数
+        """
+        self.close = close
+        self.on_closed = on_closed
+        self.hold_range = hold_range
+        self.cooldown_range = cooldown_range
+        self.close_retry_interval = close_retry_interval
+        self.max_close_retries = max_close_retries
+
+        self.phase = self.IDLE
+        self.cycle: Optional[dict] = None
+        self.hold_until: Optional[datetime] = None
+        self.cooldown_until: Optional[datetime] = None
+        self.close_attempts = 0
+
+        self._task: Optional[asyncio.Task] = None
+        self._flat = asyncio.Event()
+        self._flat.set()
+
+    def can_open(self) -> bool:
+        """是否可以开新仓（没有未平仓周期且不在冷却期）"""
+        return self.phase == self.IDLE
+
+    def status(self) -> str:
+        """当前阶段的简短描述，用于日志"""
+        now = datetime.now()
+        if self.phase == self.HOLDING and self.hold_until:
+            return f"持仓中，{max(0, int((self.hold_until - now).total_seconds()))} 秒后平仓"
+        if self.phase == self.CLOSING:
+            return f"平仓中（第 {self.close_attempts}/{self.max_close_retries} 次）"
+        if self.phase == self.COOLDOWN and self.cooldown_until:
+            return f"冷却中，{max(0, int((self.cooldown_until - now).total_seconds()))} 秒后可开仓"
+        if self.phase == self.STUCK:
+            return "平仓失败，需手动平仓"
+        return "空闲"
+
+    def start_hold(self, cycle: Optional[dict] = None, hold_seconds: Optional[int] = None) -> asyncio.Task:
+        """
+        开仓成功后调用：在后台计时，到期后平仓并进入冷却期
+
+        Args:
+            cycle: 周期记录，平仓成功后传给 on_closed
+            hold_seconds: 持仓时间（秒），None 时在 hold_range 内随机
+        """
+        if self._task and not self._task.done():
+            raise RuntimeError(f"已有进行中的周期（{self.status()}）")
+
+        randomized = hold_seconds is None
+        if randomized:
+            hold_seconds = random.randint(*self.hold_range)
+
+        self.cycle = cycle
+        self.phase = self.HOLDING
+        self.hold_until = datetime.now() + timedelta(seconds=hold_seconds)
+        self.close_attempts = 0
+        self._flat.clear()
+
+        label = "随机等待" if randomized else "最长持仓"
+        print(f"\n⏳ {label} {hold_seconds} 秒 ({hold_seconds / 60:.1f} 分钟) 后关仓易（后台计时，继续监控）...")
+        print("┌────────────────────────────────────────────")
+        print(f"│ 当前时间   : \033[96m{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\033[0m")
+        print(f"│ 到期时间   : \033[93m{self.hold_until.strftime('%Y-%m-%d %H:%M:%S')}\033[0m")
+        print(f"│ 剩余时间   : \033[92m{hold_seconds // 60:02d}分 {hold_seconds % 60:02d}秒\033[0m")
+        print("└────────────────────────────────────────────")
+
+        self._task = asyncio.create_task(self._run_cycle())
+        return self._task
+
+    def close_now(self):
+        """跳过剩余持仓时间，立即开始平仓"""
+        if self.phase == self.HOLDING:
+            self.hold_until = datetime.now()
+
+    async def _run_cycle(self):
+        # 以 hold_until 为准，close_now 可以提前结束持仓
+        while datetime.now() < self.hold_until:
+            await asyncio.sleep(min(1.0, (self.hold_until - datetime.now()).total_seconds()))
+
+        print("\n" + "=" * 60)
+        print("步骤 2: 关闭持仓")
+        print("=" * 60)
+
+        self.phase = self.CLOSING
+        closed = False
+        for attempt in range(1, self.max_close_retries + 1):
+            self.close_attempts = attempt
+            try:
+                closed = await self.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ 平仓出错: {e}")
+                closed = False
+
+            if closed:
+                print(f"✅ 关闭持仓成功 (第{attempt}次尝试)")
+                break
+
+            if attempt < self.max_close_retries:
+                print(f"❌ 关闭持仓失败 (第{attempt}/{self.max_close_retries}次)，{self.close_retry_interval}秒后重试...")
+                await asyncio.sleep(self.close_retry_interval)
+
+        self._flat.set()
+
+        if not closed:
+            # 保留周期记录和持仓状态，不回到 IDLE，避免账本丢掉这笔仓位并继续开新仓
+            print(f"❌ 已达到最大重试次数({self.max_close_retries})，关闭持仓失败，请手动平仓后重启")
+            self.phase = self.STUCK
+            return
+
+        cycle, self.cycle = self.cycle, None
+
+        if self.on_closed:
+            try:
+                self.on_closed(cycle)
+            except Exception as e:
+                print(f"❌ 平仓回调出错: {e}")
+
+        cooldown = random.randint(*self.cooldown_range)
+        self.phase = self.COOLDOWN
+        self.cooldown_until = datetime.now() + timedelta(seconds=cooldown)
+        print(f"\n⏳ 冷却 {cooldown} 秒 ({cooldown / 60:.1f} 分钟) 后继续下一次交易...")
+        await asyncio.sleep(cooldown)
+        self.phase = self.IDLE
+
+    async def wait_flat(self):
+        """等待当前周期平仓（或放弃平仓）"""
+        await self._flat.wait()
+
+    async def stop(self):
+        """取消后台计时；未平仓的周期保持持仓"""
+        if self.phase == self.STUCK:
+            print("⚠️ 停止时仍有平仓失败的对冲周期，请手动检查持仓")
+        if self._task and not self._task.done():
+            if self.phase in (self.HOLDING, self.CLOSING):
+                print(f"⚠️ 停止时仍有未平仓的对冲周期（{self.status()}），请手动检查持仓")
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
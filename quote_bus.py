@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+共享内存报价总线
+持有浏览器的进程把各交易所的盘口和深度写入 multiprocessing.shared_memory 环形缓冲区（seqlock 版本号），
+任意多个策略进程直接从共享内存读取报价，不需要 Playwright，也不各自抓取页面
+"""
+
+import asyncio
+import math
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_MAGIC = b"QUOTEBUS"
+_VERSION = 1
+# magic, version, 通道数, 每个通道的环形缓冲区容量, 每边深度档数
+_HEADER = struct.Struct("<8sIIII")
+_NAME_SIZE = 64
+_SEQ = struct.Struct("<Q")
+
+Level = Tuple[float, float]
+
+
+def quote_channel(venue: str, symbol: str) -> str:
+    """通道名约定：交易所:品种，例如 grvt:BTC-USDT、paradex:BTC-USD-PERP"""
+    return f"{venue}:{symbol}"
+
+
+class QuoteBus:
+    """
+    单写多读的共享内存报价环形缓冲区
+
+    内存布局：头部 | 通道名 × N | 每个通道 [已发布条数 | 条目 × capacity]
+    条目：seq | ts, bid, ask, 买档数, 卖档数, 买价[depth], 买量[depth], 卖价[depth], 卖量[depth]
+
+    写入第 n 条时先把 seq 置为 2n+1（奇数表示正在写），写完置为 2n+2；
+    读取方前后两次读到相同的偶数 seq 才认为数据完整，否则重试。
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+
+        magic, version, n_channels, self.capacity, self.depth = _HEADER.unpack_from(self.buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"共享内存 {shm.name} 不是报价总线")
+
+        self.payload = struct.Struct(f"<dddII{4 * self.depth}d")
+        self.entry_size = _SEQ.size + self.payload.size
+        self.channel_size = _SEQ.size + self.entry_size * self.capacity
+
+        names_offset = _HEADER.size
+        self.channels: Dict[str, int] = {}
+        for i in range(n_channels):
+            raw = bytes(self.buf[names_offset + i * _NAME_SIZE:names_offset + (i + 1) * _NAME_SIZE])
+            name = raw.rstrip(b"\0").decode("utf-8")
+            self.channels[name] = names_offset + n_channels * _NAME_SIZE + i * self.channel_size
+
+    @staticmethod
+    def _size(n_channels: int, capacity: int, depth: int) -> int:
+        entry_size = _SEQ.size + struct.calcsize(f"<dddII{4 * depth}d")
+        return _HEADER.size + n_channels * _NAME_SIZE + n_channels * (_SEQ.size + entry_size * capacity)
+
+    @classmethod
+    def create(cls, name: str, channels: Iterable[str], capacity: int = 1024, depth: int = 10) -> "QuoteBus":
+        """
+        创建报价总线（发布进程调用）
+
+        Args:
+            name: 共享内存名称，读取方用同一名称连接
+            channels: 通道名列表，例如 ["grvt:BTC-USDT", "paradex:BTC-USD-PERP"]
+            capacity: 每个通道保留的历史条数
+            depth: 每边保存的深度档数
+        """
+        channels = list(channels)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=cls._size(len(channels), capacity, depth))
+        shm.buf[:shm.size] = bytes(shm.size)
+
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, _VERSION, len(channels), capacity, depth)
+        for i, channel in enumerate(channels):
+            encoded = channel.encode("utf-8")
+            if len(encoded) > _NAME_SIZE:
+                shm.close()
+                shm.unlink()
+                raise ValueError(f"通道名过长: {channel}")
+            offset = _HEADER.size + i * _NAME_SIZE
+            shm.buf[offset:offset + len(encoded)] = encoded
+
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "QuoteBus":
+        """连接已存在的报价总线（策略进程调用）"""
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python 3.13 以前读取方退出时 resource_tracker 会误删共享内存，需手动取消登记
+            shm = shared_memory.SharedMemory(name=name)
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+        return cls(shm, owner=False)
+
+    def _entry_offset(self, channel: str, index: int) -> int:
+        return self.channels[channel] + _SEQ.size + (index % self.capacity) * self.entry_size
+
+    def head(self, channel: str) -> int:
+        """通道已发布的总条数"""
+        return _SEQ.unpack_from(self.buf, self.channels[channel])[0]
+
+    def publish(self, channel: str, bid: Optional[float], ask: Optional[float],
+                bids: Iterable[Level] = (), asks: Iterable[Level] = (), ts: Optional[float] = None) -> int:
+        """
+        写入一条报价（只允许一个写入方）
+
+        Args:
+            channel: 通道名
+            bid / ask: 最优买价/卖价，缺失为 None
+            bids / asks: 深度 [(价格, 数量)]，超出 depth 的档位被截断
+            ts: 时间戳（time.time()），None 时取当前时间
+
+        Returns:
+            int: 本条报价的序号
+        """
+        bids = list(bids)[:self.depth]
+        asks = list(asks)[:self.depth]
+        pad = [0.0] * self.depth
+
+        def column(levels, i):
+            return [level[i] for level in levels] + pad[len(levels):]
+
+        n = self.head(channel)
+        offset = self._entry_offset(channel, n)
+
+        _SEQ.pack_into(self.buf, offset, 2 * n + 1)
+        self.payload.pack_into(
+            self.buf, offset + _SEQ.size,
+            time.time() if ts is None else ts,
+            math.nan if bid is None else bid,
+            math.nan if ask is None else ask,
+            len(bids), len(asks),
+            *column(bids, 0), *column(bids, 1), *column(asks, 0), *column(asks, 1),
+        )
+        _SEQ.pack_into(self.buf, offset, 2 * n + 2)
+        _SEQ.pack_into(self.buf, self.channels[channel], n + 1)
+        return n
+
+    def read(self, channel: str, index: int, max_retries: int = 100) -> Optional[Dict]:
+        """
+        读取第 index 条报价
+
+        Returns:
+            dict: {seq, ts, bid, ask, bids, asks}；该条尚未写入或已被覆盖时返回 None
+        """
+        offset = self._entry_offset(channel, index)
+        expected = 2 * index + 2
+
+        for _ in range(max_retries):
+            seq = _SEQ.unpack_from(self.buf, offset)[0]
+            if seq & 1:
+                continue
+            if seq != expected:
+                return None
+
+            values = self.payload.unpack_from(self.buf, offset + _SEQ.size)
+            if _SEQ.unpack_from(self.buf, offset)[0] != seq:
+                continue
+
+            ts, bid, ask, n_bids, n_asks = values[:5]
+            depth = self.depth
+            bid_px, bid_sz = values[5:5 + depth], values[5 + depth:5 + 2 * depth]
+            ask_px, ask_sz = values[5 + 2 * depth:5 + 3 * depth], values[5 + 3 * depth:]
+            return {
+                'seq': index,
+                'ts': ts,
+                'bid': None if math.isnan(bid) else bid,
+                'ask': None if math.isnan(ask) else ask,
+                'bids': list(zip(bid_px[:n_bids], bid_sz[:n_bids])),
+                'asks': list(zip(ask_px[:n_asks], ask_sz[:n_asks])),
+            }
+
+        return None
+
+    def latest(self, channel: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """
+        读取通道最新一条报价
+
+        Args:
+            max_age: 报价最大允许时效（秒），超过时返回 None
+
+        Returns:
+            dict: 报价，无数据或已过期返回 None
+        """
+        for _ in range(3):
+            head = self.head(channel)
+            if head == 0:
+                return None
+            quote = self.read(channel, head - 1)
+            if quote is not None:
+                if max_age is not None and time.time() - quote['ts'] > max_age:
+                    return None
+                return quote
+        return None
+
+    def read_since(self, channel: str, last_seq: int = -1) -> List[Dict]:
+        """
+        读取序号大于 last_seq 的所有报价（最多 capacity 条，落后太多时更早的已被覆盖）
+
+        Returns:
+            list: 按序号递增的报价列表
+        """
+        head = self.head(channel)
+        start = max(last_seq + 1, head - self.capacity)
+        quotes = []
+        for index in range(start, head):
+            quote = self.read(channel, index)
+            if quote is not None:
+                quotes.append(quote)
+        return quotes
+
+    def close(self):
+        """断开共享内存；创建方同时删除它"""
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class QuotePublisher:
+    """后台轮询各交易所页面的订单簿深度并写入报价总线"""
+
+    def __init__(self, bus: QuoteBus, sources: Dict[str, object], interval: float = 0.2):
+        """
+        Args:
+            bus: 报价总线（创建方）
+            sources: {通道名: 具有 get_orderbook_depth(levels) 方法的读取器（GrvtTradingBot / ParadexTrader）}
+            interval: 轮询间隔（秒）
+        """
+        self.bus = bus
+        self.sources = sources
+        self.interval = interval
+
+        self.publish_count = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish_once(self, channel: str):
+        depth = await self.sources[channel].get_orderbook_depth(self.bus.depth)
+        if depth is None:
+            return
+        bids, asks = depth
+        self.bus.publish(
+            channel,
+            bids[0][0] if bids else None,
+            asks[0][0] if asks else None,
+            bids, asks,
+        )
+        self.publish_count += 1
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.gather(*(self.publish_once(channel) for channel in self.sources))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ 发布报价出错: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> asyncio.Task:
+        """在后台启动发布任务"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """停止发布任务"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+if __name__ == "__main__":
+    # 示例读取方：python quote_bus.py <共享内存名称>，每秒打印各通道最新报价
+    import sys
+
+    bus = QuoteBus.attach(sys.argv[1] if len(sys.argv) > 1 else "hedge_quotes")
+    try:
+        while True:
+            for channel in bus.channels:
+                quote = bus.latest(channel)
+                if quote:
+                    age = (time.time() - quote['ts']) * 1000
+                    print(f"{channel:<28} #{quote['seq']:<8} bid {quote['bid']} ask {quote['ask']} "
+                          f"({len(quote['bids'])}/{len(quote['asks'])} 档, {age:.0f}ms 前)")
+            print("-" * 60)
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bus.close()
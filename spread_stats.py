@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+价差滚动统计
+每个价差样本增量更新 EWMA 均值/方差、z-score、窗口最小/最大值和分位数：
+EWMA、窗口均值、最小/最大值为均摊 O(1)；分位数使用有序副本，二分查找 O(log window)，
+但列表插入/删除要移动 O(window) 个元素（窗口为数百到数千个样本时为微秒级），可以在每个 tick 上调用
+"""
+
+import bisect
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+class SpreadStats:
+    """固定样本数窗口 + EWMA 的价差统计"""
+
+    def __init__(self, window: int = 600, halflife: float = 100, min_samples: int = 30):
+        """
+        Args:
+            window: 窗口样本数（最小/最大值、分位数、窗口均值使用）
+            halflife: EWMA 半衰期（样本数）
+            min_samples: 样本数少于该值时 is_ready 为 False
+        """
+        self.window = window
+        self.alpha = 1 - math.exp(math.log(0.5) / halflife)
+        self.min_samples = min_samples
+
+        self.count = 0
+        self.last: Optional[float] = None
+        self.last_ts: Optional[float] = None
+
+        # EWMA
+        self.ewma_mean = 0.0
+        self.ewma_var = 0.0
+
+        # 窗口：原始样本（环形缓冲区）、有序副本（分位数，插入/删除 O(window)）、单调队列（最小/最大值）
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._sorted: List[float] = []
+        self._window_sum = 0.0
+        self._min_queue: Deque[Tuple[int, float]] = deque()
+        self._max_queue: Deque[Tuple[int, float]] = deque()
+
+    def update(self, value: float, ts: Optional[float] = None):
+        """
+        加入一个价差样本（有序副本的插入/删除为 O(window)，其余统计量均摊 O(1)）
+
+        Args:
+            value: 价差（GRVT - Paradex）
+            ts: 样本时间戳，None 时取当前时间
+        """
+        index = self.count
+        self.count += 1
+        self.last = value
+        self.last_ts = time.time() if ts is None else ts
+
+        if index == 0:
+            self.ewma_mean = value
+            self.ewma_var = 0.0
+        else:
+            diff = value - self.ewma_mean
+            increment = self.alpha * diff
+            self.ewma_mean += increment
+            self.ewma_var = (1 - self.alpha) * (self.ewma_var + diff * increment)
+
+        if len(self._samples) == self.window:
+            expired = self._samples[0]
+            self._window_sum -= expired
+            del self._sorted[bisect.bisect_left(self._sorted, expired)]
+        self._samples.append(value)
+        self._window_sum += value
+        bisect.insort(self._sorted, value)
+
+        # 单调队列：队首即窗口最小/最大值，每个样本最多进出一次
+        oldest = index - self.window + 1
+        while self._min_queue and self._min_queue[-1][1] >= value:
+            self._min_queue.pop()
+        self._min_queue.append((index, value))
+        while self._min_queue[0][0] < oldest:
+            self._min_queue.popleft()
+
+        while self._max_queue and self._max_queue[-1][1] <= value:
+            self._max_queue.pop()
+        self._max_queue.append((index, value))
+        while self._max_queue[0][0] < oldest:
+            self._max_queue.popleft()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.count >= self.min_samples
+
+    @property
+    def mean(self) -> float:
+        """EWMA 均值"""
+        return self.ewma_mean
+
+    @property
+    def std(self) -> float:
+        """EWMA 标准差"""
+        return math.sqrt(max(self.ewma_var, 0.0))
+
+    @property
+    def window_mean(self) -> Optional[float]:
+        return self._window_sum / len(self._samples) if self._samples else None
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._min_queue[0][1] if self._min_queue else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._max_queue[0][1] if self._max_queue else None
+
+    def zscore(self, value: Optional[float] = None) -> Optional[float]:
+        """
+        样本相对 EWMA 均值的 z-score
+
+        Args:
+            value: 价差，None 时使用最新样本
+
+        Returns:
+            float: z-score，样本不足或标准差为 0 时返回 None
+        """
+        value = self.last if value is None else value
+        std = self.std
+        if value is None or self.count < 2 or std == 0:
+            return None
+        return (value - self.ewma_mean) / std
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        窗口内的分位数（线性插值）
+
+        Args:
+            q: 分位，0-100
+        """
+        if not self._sorted:
+            return None
+        position = (len(self._sorted) - 1) * q / 100
+        lower = int(position)
+        upper = min(lower + 1, len(self._sorted) - 1)
+        return self._sorted[lower] + (self._sorted[upper] - self._sorted[lower]) * (position - lower)
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """当前全部统计量"""
+        return {
+            'count': self.count,
+            'last': self.last,
+            'mean': self.mean,
+            'std': self.std,
+            'zscore': self.zscore(),
+            'window_mean': self.window_mean,
+            'min': self.min,
+            'max': self.max,
+            'p5': self.percentile(5),
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+        }
+
+
+class AdaptiveThresholds:
+    """
+    根据价差滚动统计自适应调整开仓阈值和平仓价差带
+
+    开仓阈值 = |均值| + entry_k·σ；平仓价差带 = exit_k·σ，价差回到 EWMA 均值 ± 价差带以内视为已回归，
+    均限制在上下限之内；新值与当前值的相对变化不超过 hysteresis 时保持不变，避免阈值来回抖动
+    """
+
+    def __init__(
+            self,
+            entry_k: float = 2.0,
+            exit_k: float = 0.5,
+            min_entry: float = 2.0,
+            max_entry: float = 50.0,
+            min_exit: float = 0.2,
+            max_exit: float = 10.0,
+            max_exit_ratio: float = 0.5,
+            hysteresis: float = 0.1,
+            entry: float = 10.0,
+            exit: float = 1.0,
+    ):
+        """
+        Args:
+            entry_k / exit_k: 开仓阈值/平仓价差带对应的 σ 倍数
+            min_entry / max_entry: 开仓阈值上下限（美元）
+            min_exit / max_exit: 平仓价差带上下限（美元）
+            max_exit_ratio: 平仓价差带不超过开仓阈值的该比例，保证两者之间留有空间
+            hysteresis: 相对变化小于该比例时不更新
+            entry / exit: 统计量就绪前使用的固定阈值
+        """
+        self.entry_k = entry_k
+        self.exit_k = exit_k
+        self.min_entry = min_entry
+        self.max_entry = max_entry
+        self.min_exit = min_exit
+        self.max_exit = max_exit
+        self.max_exit_ratio = max_exit_ratio
+        self.hysteresis = hysteresis
+
+        self.entry = entry
+        self.exit = exit
+        self.update_count = 0
+
+    @staticmethod
+    def _clamp(value: float, low: float, high: float) -> float:
+        return max(low, min(high, value))
+
+    def _changed(self, current: float, target: float) -> bool:
+        if current == 0:
+            return target != 0
+        return abs(target - current) / abs(current) > self.hysteresis
+
+    def update(self, stats: SpreadStats) -> bool:
+        """
+        用最新统计量更新阈值
+
+        Returns:
+            bool: 阈值是否发生变化
+        """
+        if not stats.is_ready:
+            return False
+
+        base = abs(stats.mean)
+        entry = self._clamp(base + self.entry_k * stats.std, self.min_entry, self.max_entry)
+        exit = self._clamp(self.exit_k * stats.std, self.min_exit, self.max_exit)
+        exit = min(exit, entry * self.max_exit_ratio)
+
+        changed = False
+        if self._changed(self.entry, entry):
+            self.entry = entry
+            changed = True
+        if self._changed(self.exit, exit):
+            self.exit = exit
+            changed = True
+        # 开仓阈值单独变化时也要保证平仓价差带不超过其比例
+        if self.exit > self.entry * self.max_exit_ratio:
+            self.exit = self.entry * self.max_exit_ratio
+            changed = True
+
+        if changed:
+            self.update_count += 1
+        return changed
+
+    def within_exit_band(self, stats: SpreadStats, value: Optional[float] = None) -> bool:
+        """
+        价差是否已回到 EWMA 均值 ± 平仓价差带以内
+
+        Args:
+            stats: 价差统计
+            value: 价差，None 时使用最新样本
+
+        Returns:
+            bool: 统计量未就绪或没有样本时返回 False
+        """
+        value = stats.last if value is None else value
+        if not stats.is_ready or value is None:
+            return False
+        return abs(value - stats.mean) <= self.exit
+
+    def exit_spread(self, stats: SpreadStats) -> float:
+        """预期平仓时剩余的价差（绝对值）：均值一侧价差带的外沿，统计量未就绪时为 0"""
+        if not stats.is_ready:
+            return 0.0
+        return abs(stats.mean) + self.exit
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from edge_model import EdgeModel
+
+# Paradex 中间价 100：买盘 99.9 / 99.8，卖盘 100.1 / 100.2
+DEPTH = ([(99.9, 1.0), (99.8, 1.0)], [(100.1, 1.0), (100.2, 1.0)])
+
+
+def test_market_slippage_walks_levels():
+    assert EdgeModel.market_slippage(DEPTH[1], 1.5, 100.0) == pytest.approx(1.0 * 0.1 + 0.5 * 0.2)
+    assert EdgeModel.market_slippage(DEPTH[1], 3.0, 100.0) is None
+
+
+def test_gross_minus_fees_without_depth():
+    model = EdgeModel(grvt_fee_rate=0.0, paradex_fee_rate=0.001)
+    edge = model.evaluate(5.0, 105.0, 100.0, 1.0)
+
+    assert edge['gross'] == pytest.approx(5.0)
+    assert edge['fees'] == pytest.approx(2 * 100.0 * 0.001)
+    assert edge['slippage'] == 0.0
+    assert edge['net'] == pytest.approx(5.0 - 0.2)
+
+
+def test_exit_spread_reduces_gross():
+    model = EdgeModel(paradex_fee_rate=0.0)
+    assert model.evaluate(5.0, 105.0, 100.0, 2.0, exit_spread=1.5)['gross'] == pytest.approx((5.0 - 1.5) * 2)
+
+
+def test_slippage_uses_opening_and_closing_sides():
+    model = EdgeModel(paradex_fee_rate=0.0)
+    # GRVT 空：Paradex 吃卖盘开多、吃买盘平仓，各 0.1
+    edge = model.evaluate(5.0, 105.0, 100.0, 1.0, paradex_depth=DEPTH)
+    assert edge['slippage'] == pytest.approx(0.2)
+    assert edge['net'] == pytest.approx(4.8)
+
+
+def test_insufficient_depth_has_no_net():
+    model = EdgeModel()
+    edge = model.evaluate(5.0, 105.0, 100.0, 5.0, paradex_depth=DEPTH)
+    assert edge['net'] is None
+    assert not model.is_worth_it(edge)
+
+
+def test_funding_sign_follows_direction():
+    model = EdgeModel(paradex_fee_rate=0.0, grvt_funding_rate=0.001, expected_hold_seconds=3600)
+    # GRVT 资金费率更高：GRVT 空头收取，GRVT 多头支付
+    short = model.evaluate(5.0, 100.0, 100.0, 1.0)
+    long = model.evaluate(-5.0, 100.0, 100.0, 1.0)
+    assert short['funding'] == pytest.approx(0.1)
+    assert long['funding'] == pytest.approx(-0.1)
+
+
+def test_min_net_edge():
+    model = EdgeModel(paradex_fee_rate=0.0, min_net_edge=1.0)
+    assert model.is_worth_it(model.evaluate(1.0, 101.0, 100.0, 1.0))
+    assert not model.is_worth_it(model.evaluate(0.5, 100.5, 100.0, 1.0))
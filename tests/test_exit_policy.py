@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+from exit_policy import CONVERGED, MAX_HOLD, TRAILING_STOP, ExitPolicy
+from hedge_lots import LotBook
+from position_manager import PositionManager
+
+
+def test_required_ratio_decays_linearly():
+    policy = ExitPolicy(target_ratio=0.8, min_ratio=0.2, decay_start=100, max_hold=400)
+    assert policy.required_ratio(50) == 0.8
+    assert policy.required_ratio(250) == pytest.approx(0.5)
+    assert policy.required_ratio(400) == pytest.approx(0.2)
+    assert policy.required_ratio(1000) == pytest.approx(0.2)
+
+
+def test_converged_for_short_spread():
+    policy = ExitPolicy(target_ratio=0.8, decay_start=100, max_hold=400)
+    state = policy.open(entry_spread=10.0, size=1.0, opened_at=0.0)
+
+    assert policy.evaluate(state, 5.0, now=10.0) is None
+    assert state['ratio'] == pytest.approx(0.5)
+    assert policy.evaluate(state, 2.0, now=20.0) == CONVERGED
+
+
+def test_converged_for_long_spread_towards_fair():
+    policy = ExitPolicy(target_ratio=0.8, decay_start=100, max_hold=400)
+    state = policy.open(entry_spread=-10.0, size=1.0, fair=-2.0, opened_at=0.0)
+
+    # 需要回归 8 美元中的 80%：价差回到 -3.6 以上
+    assert policy.evaluate(state, -4.0, now=10.0) is None
+    assert policy.evaluate(state, -3.5, now=10.0) == CONVERGED
+
+
+def test_fair_on_wrong_side_falls_back_to_zero():
+    policy = ExitPolicy()
+    state = policy.open(entry_spread=5.0, size=1.0, fair=8.0, opened_at=0.0)
+    assert state['move'] == 5.0
+
+
+def test_time_decay_lowers_required_ratio():
+    policy = ExitPolicy(target_ratio=0.8, min_ratio=0.2, decay_start=100, max_hold=400)
+    state = policy.open(entry_spread=10.0, size=1.0, opened_at=0.0)
+    assert policy.evaluate(state, 5.0, now=50.0) is None
+    assert policy.evaluate(state, 5.0, now=300.0) == CONVERGED
+
+
+def test_max_hold():
+    policy = ExitPolicy(target_ratio=0.8, min_ratio=0.8, max_hold=400)
+    state = policy.open(entry_spread=10.0, size=1.0, opened_at=0.0)
+    assert policy.evaluate(state, 12.0, now=399.0) is None
+    assert policy.evaluate(state, 12.0, now=400.0) == MAX_HOLD
+
+
+def test_trailing_stop_after_activation():
+    policy = ExitPolicy(target_ratio=1.0, min_ratio=1.0, max_hold=1000, trail_activate=3.0, trail_giveback=1.0)
+    state = policy.open(entry_spread=10.0, size=1.0, cost=0.5, opened_at=0.0)
+
+    assert policy.evaluate(state, 7.0, now=1.0) is None
+    assert state['peak_pnl'] is None
+    assert policy.evaluate(state, 6.0, now=2.0) is None
+    assert state['peak_pnl'] == pytest.approx(3.5)
+    assert policy.evaluate(state, 5.0, now=3.0) is None
+    assert state['peak_pnl'] == pytest.approx(4.5)
+    assert policy.evaluate(state, 6.0, now=4.0) == TRAILING_STOP
+
+
+def test_describe_includes_progress():
+    policy = ExitPolicy()
+    state = policy.open(entry_spread=10.0, size=1.0, opened_at=0.0)
+    policy.evaluate(state, 5.0, now=10.0)
+    assert "50%" in policy.describe(state, now=10.0)
+
+
+def test_converging_spread_closes_lot_opened_through_book():
+    policy = ExitPolicy(target_ratio=0.8, decay_start=100, max_hold=400)
+    closes = []
+
+    async def close():
+        closes.append(True)
+        return True
+
+    async def run():
+        book = LotBook(
+            lambda lot: PositionManager(close=close, max_close_retries=1, close_retry_interval=0, cooldown_range=(0, 0)),
+            max_lots=2, ladder_step=5.0,
+        )
+        lot = book.open("GRVT_SHORT", 1.0, 10.0, None, hold_seconds=3600,
+                        exit_state=policy.open(10.0, 1.0))
+        try:
+            assert book.check_exit(policy, 7.0) == []
+            assert lot.manager.phase == PositionManager.HOLDING
+
+            triggered = book.check_exit(policy, 1.0)
+            assert [(hit, reason) for hit, reason, _ in triggered] == [(lot, CONVERGED)]
+            await asyncio.wait_for(book.wait_flat(), timeout=5)
+        finally:
+            await book.stop()
+        return lot
+
+    lot = asyncio.run(run())
+    assert lot.exit_reason == CONVERGED
+    assert lot.exit_state is None
+    assert closes == [True]
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from fill_model import FillModel
+
+
+def flat_book(model: FillModel, count: int, bid: float = 99.0, ask: float = 101.0, step: float = 1.0):
+    for i in range(count):
+        model.record_book(bid, ask, ts=i * step)
+
+
+def test_record_book_ignores_invalid_and_expires_old_samples():
+    model = FillModel(window=10)
+    model.record_book(None, 101.0, ts=0)
+    model.record_book(101.0, 100.0, ts=0)
+    assert len(model.book) == 0
+
+    flat_book(model, 30)
+    assert model.book[0][0] >= model.book[-1][0] - 10
+
+
+def test_not_ready_without_samples():
+    model = FillModel(min_samples=60)
+    flat_book(model, 10)
+    assert model.estimate("SELL", 0.0) is None
+    assert model.plan("SELL", 99.0, 101.0) is None
+
+
+def test_fill_times_for_static_book():
+    model = FillModel(max_wait=10, max_starts=1000)
+    flat_book(model, 40)
+
+    # 盘口不动：对手价（-1）下一个样本即成交，中间价永远等不到
+    starts, fills = model.fill_times("SELL", -1.0)
+    assert starts == 30
+    assert fills == [1.0] * 30
+    assert model.fill_times("SELL", 0.0)[1] == []
+
+
+def test_fill_times_detects_bid_crossing_sell_price():
+    model = FillModel(max_wait=5, max_starts=1000)
+    for i in range(20):
+        # 第 10 秒买一涨到 100.5，吃穿中间价以上 0.5 的卖单
+        bid = 100.5 if i == 10 else 99.0
+        model.record_book(bid, 101.0, ts=i)
+
+    starts, fills = model.fill_times("SELL", 0.5)
+    assert starts == 15
+    assert sorted(fills) == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_plan_picks_most_conservative_qualifying_offset():
+    model = FillModel(min_samples=10, max_wait=10, candidates=(-1.0, 0.0, 1.0), target_prob=0.7)
+    flat_book(model, 40)
+
+    plan = model.plan("BUY", 99.0, 101.0)
+    # 只有对手价能成交：买单挂在卖一
+    assert plan['offset'] == -1.0
+    assert plan['price'] == pytest.approx(101.0)
+    assert plan['prob'] == pytest.approx(1.0)
+    assert plan['wait'] == model.min_wait
+
+
+def test_recorded_outcomes_calibrate_probability():
+    model = FillModel(min_samples=10, max_wait=10, prior_weight=10)
+    flat_book(model, 40)
+    for _ in range(10):
+        model.record_order("SELL", -1.0, filled=False)
+
+    estimate = model.estimate("SELL", -1.0)
+    assert estimate['book_prob'] == pytest.approx(1.0)
+    assert estimate['prob'] == pytest.approx(0.5)
+
+
+def test_plan_rejects_crossed_book():
+    model = FillModel(min_samples=10)
+    flat_book(model, 40)
+    assert model.plan("SELL", 101.0, 99.0) is None
+
+
+def test_trades_through_price_count_as_fills():
+    model = FillModel(max_wait=5, max_starts=1000)
+    flat_book(model, 20)
+    # 盘口不动，但第 10 秒有一笔成交打到 100.5
+    model.record_trade(100.5, ts=10)
+
+    starts, fills = model.fill_times("SELL", 0.5)
+    assert starts == 15
+    assert sorted(fills) == [1.0, 2.0, 3.0, 4.0, 5.0]
+    # 成交价没有达到更保守的挂单价
+    assert model.fill_times("SELL", 1.0)[1] == []
+    # 卖方向的成交价不会让买单成交
+    assert model.fill_times("BUY", 0.5)[1] == []
+
+
+def test_earlier_of_book_cross_and_trade_is_used():
+    model = FillModel(max_wait=5, max_starts=1000)
+    for i in range(20):
+        bid = 100.5 if i == 12 else 99.0
+        model.record_book(bid, 101.0, ts=i)
+    model.record_trade(100.6, ts=10)
+
+    starts, fills = model.fill_times("SELL", 0.5)
+    # 起点 5..9 由第 10 秒的成交先成交；起点 10、11 由第 12 秒盘口吃穿成交
+    assert sorted(fills) == [1.0, 1.0, 2.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_record_trade_ignores_missing_price_and_expires_old_trades():
+    model = FillModel(window=10)
+    model.record_trade(None, ts=0)
+    assert len(model.trades) == 0
+
+    for i in range(30):
+        model.record_trade(100.0, ts=i)
+    assert model.trades[0][0] >= model.trades[-1][0] - 10
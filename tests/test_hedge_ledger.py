@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import csv
+
+import pytest
+
+from hedge_ledger import HedgeLedger
+
+
+def open_short(ledger: HedgeLedger) -> dict:
+    return ledger.open_cycle(
+        direction="GRVT_SHORT", size=1.0, entry_spread=10.0,
+        grvt_intended=100.0, paradex_intended=90.0, grvt_fill=100.0, paradex_fill=90.0,
+    )
+
+
+def test_close_cycle_computes_pnl_from_fills():
+    ledger = HedgeLedger(grvt_fee_rate=0.0, paradex_fee_rate=0.001)
+    cycle = ledger.close_cycle(open_short(ledger), grvt_fill=98.0, paradex_fill=91.0)
+
+    # GRVT 空 100 -> 98 赚 2，Paradex 多 90 -> 91 赚 1
+    assert cycle['gross_pnl'] == pytest.approx(3.0)
+    assert cycle['fees'] == pytest.approx((90.0 + 91.0) * 0.001)
+    assert cycle['net_pnl'] == pytest.approx(3.0 - 0.181)
+
+
+def test_long_direction_signs():
+    ledger = HedgeLedger(grvt_fee_rate=0.0, paradex_fee_rate=0.0)
+    cycle = ledger.open_cycle(
+        direction="GRVT_LONG", size=2.0, entry_spread=-10.0,
+        grvt_intended=90.0, paradex_intended=100.0, grvt_fill=90.0, paradex_fill=100.0,
+    )
+    cycle = ledger.close_cycle(cycle, grvt_fill=95.0, paradex_fill=97.0)
+    assert cycle['gross_pnl'] == pytest.approx((5.0 + 3.0) * 2)
+
+
+def test_realized_pnl_overrides_fills_and_missing_fills_count_as_zero():
+    ledger = HedgeLedger(grvt_fee_rate=0.0, paradex_fee_rate=0.0)
+    assert ledger.close_cycle(open_short(ledger), realized_pnl=-1.5)['gross_pnl'] == -1.5
+    assert ledger.close_cycle(open_short(ledger), grvt_fill=None, paradex_fill=91.0)['gross_pnl'] == 0.0
+
+
+def test_summary_accumulates_closed_cycles():
+    ledger = HedgeLedger(grvt_fee_rate=0.0, paradex_fee_rate=0.0)
+    ledger.close_cycle(open_short(ledger), realized_pnl=2.0)
+    ledger.close_cycle(open_short(ledger), realized_pnl=-1.0)
+    open_short(ledger)
+
+    summary = ledger.summary()
+    assert summary['closed_cycles'] == 2
+    assert summary['win_rate'] == 0.5
+    assert summary['total_net_pnl'] == pytest.approx(1.0)
+    assert summary['avg_entry_spread'] == pytest.approx(10.0)
+
+
+def test_empty_summary():
+    summary = HedgeLedger().summary()
+    assert summary['closed_cycles'] == 0
+    assert summary['win_rate'] == 0.0
+    assert summary['avg_net_pnl'] == 0.0
+
+
+def test_export_csv(tmp_path):
+    ledger = HedgeLedger()
+    ledger.close_cycle(open_short(ledger), realized_pnl=1.0, exit_reason="converged")
+    open_short(ledger)
+
+    path = tmp_path / "ledger.csv"
+    ledger.export_csv(str(path))
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+
+    assert [row['cycle_id'] for row in rows] == ['1', '2']
+    assert rows[0]['exit_reason'] == "converged"
+    assert rows[1]['closed_at'] == ""
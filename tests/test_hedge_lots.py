@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+from hedge_lots import LotBook
+from position_manager import PositionManager
+
+
+def make_book(max_lots: int = 3, ladder_step: float = 5.0, close_result: bool = True,
+              cooldown: int = 60) -> LotBook:
+    async def close():
+        return close_result
+    return LotBook(
+        lambda lot: PositionManager(close=close, max_close_retries=2, close_retry_interval=0,
+                                    cooldown_range=(cooldown, cooldown)),
+        max_lots=max_lots, ladder_step=ladder_step,
+    )
+
+
+def run_book(scenario, **kwargs):
+    """在事件循环中运行 scenario(book)，结束后停止全部后台计时任务"""
+    async def run():
+        book = make_book(**kwargs)
+        try:
+            return book, await scenario(book)
+        finally:
+            await book.stop()
+    return asyncio.run(run())
+
+
+def test_first_lot_uses_threshold():
+    assert make_book().required_spread("GRVT_SHORT", 10.0) == 10.0
+
+
+def test_opened_lot_is_holding_and_counted():
+    async def scenario(book):
+        lot = book.open("GRVT_SHORT", 1.0, 12.0, None, hold_seconds=3600)
+        await asyncio.sleep(0)
+        return (lot, lot.manager.phase, list(book.active), list(book.holding),
+                book.required_spread("GRVT_SHORT", 10.0))
+
+    _, (lot, phase, active, holding, required) = run_book(scenario, max_lots=1)
+    assert phase == PositionManager.HOLDING
+    assert active == [lot]
+    assert holding == [lot]
+    # 唯一名额已被占用，不能再开仓
+    assert required is None
+
+
+def test_scale_in_requires_ladder_step_above_largest_entry():
+    async def scenario(book):
+        book.open("GRVT_SHORT", 1.0, 12.0, None, hold_seconds=3600)
+        book.open("GRVT_SHORT", 1.0, 18.0, None, hold_seconds=3600)
+        return book.required_spread("GRVT_SHORT", 10.0), book.can_open(23.0, 10.0), book.can_open(22.0, 10.0)
+
+    _, (required, can_23, can_22) = run_book(scenario, ladder_step=5.0)
+    assert required == 23.0
+    assert can_23
+    assert not can_22
+
+
+def test_opposite_direction_blocked():
+    async def scenario(book):
+        book.open("GRVT_SHORT", 1.0, 12.0, None, hold_seconds=3600)
+        return book.required_spread("GRVT_LONG", 10.0), book.can_open(-50.0, 10.0)
+
+    _, (required, can_open) = run_book(scenario)
+    assert required is None
+    assert not can_open
+
+
+def test_full_book_blocked_including_cooldown():
+    async def scenario(book):
+        book.open("GRVT_SHORT", 1.0, 12.0, None, hold_seconds=3600)
+        book.open("GRVT_SHORT", 1.0, 18.0, None, hold_seconds=0)
+        # 第二笔持仓时间为 0，平仓成功后进入冷却
+        for _ in range(100):
+            if book.lots[1].manager.phase == PositionManager.COOLDOWN:
+                break
+            await asyncio.sleep(0.01)
+        return book.required_spread("GRVT_SHORT", 10.0), [lot.lot_id for lot in book.active]
+
+    _, (required, active_ids) = run_book(scenario, max_lots=2)
+    assert required is None
+    # 冷却中的仓位不参与加仓阶梯，但占用名额
+    assert active_ids == [1]
+
+
+def test_finished_lots_are_pruned():
+    async def scenario(book):
+        lot = book.open("GRVT_SHORT", 1.0, 12.0, None, hold_seconds=0)
+        await lot.manager._task
+        return lot
+
+    book, lot = run_book(scenario, max_lots=1, cooldown=0)
+    assert lot.manager.phase == PositionManager.IDLE
+    assert book.required_spread("GRVT_SHORT", 10.0) == 10.0
+    assert book.lots == []
+    assert book.status() == "空闲"
+
+
+def test_stuck_lot_stays_and_blocks_entries():
+    async def scenario(book):
+        lot = book.open("GRVT_SHORT", 1.0, 12.0, None, hold_seconds=0)
+        await book.wait_flat()
+        return lot
+
+    book, lot = run_book(scenario, max_lots=3, close_result=False)
+    assert lot.manager.phase == PositionManager.STUCK
+    assert book.lots == [lot]
+    assert book.stuck == [lot]
+    assert book.active == []
+    assert book.required_spread("GRVT_SHORT", 10.0) is None
+    assert not lot.manager.can_open()
+
+
+def test_close_all_now_only_touches_holding_lots():
+    async def scenario(book):
+        holding = book.open("GRVT_SHORT", 1.0, 12.0, None, hold_seconds=3600)
+        closing = book.open("GRVT_SHORT", 1.0, 18.0, None, hold_seconds=3600)
+        closing.manager.phase = PositionManager.CLOSING
+        hold_until = holding.manager.hold_until
+        return book.close_all_now(), hold_until, holding.manager.hold_until
+
+    _, (count, before, after) = run_book(scenario)
+    assert count == 1
+    assert after < before
+
+
+def test_total_size_counts_active_lots():
+    async def scenario(book):
+        book.open("GRVT_SHORT", 1.0, 12.0, None, hold_seconds=3600)
+        book.open("GRVT_SHORT", 1.0, 18.0, None, hold_seconds=3600).size = 2.5
+        return book.total_size
+
+    _, total = run_book(scenario)
+    assert total == pytest.approx(3.5)
+
+
+def test_grvt_remaining_tracks_partial_close():
+    async def scenario(book):
+        lot = book.open("GRVT_SHORT", 1.0, 12.0, None, hold_seconds=3600)
+        lot.grvt_closed_size += 0.4
+        partial = lot.grvt_remaining
+        lot.grvt_closed_size += 0.6
+        return partial, lot.grvt_remaining
+
+    _, (partial, remaining) = run_book(scenario)
+    assert partial == pytest.approx(0.6)
+    assert remaining == 0.0
+
+
+def test_liquidation_force_closes_every_lot_without_normal_closes():
+    normal_closes = []
+    force_closes = []
+
+    async def close():
+        normal_closes.append(True)
+        return True
+
+    async def force_close():
+        force_closes.append(True)
+        return True
+
+    async def run():
+        book = LotBook(
+            lambda lot: PositionManager(close=close, max_close_retries=2, close_retry_interval=0, cooldown_range=(60, 60)),
+            max_lots=3, ladder_step=5.0, force_close=force_close,
+        )
+        lots = [book.open("GRVT_SHORT", 1.0, spread, None, hold_seconds=3600) for spread in (12.0, 18.0)]
+        try:
+            assert book.force_close_all() == 2
+            await asyncio.wait_for(book.wait_flat(), timeout=5)
+            return lots, [lot.manager.phase for lot in lots]
+        finally:
+            await book.stop()
+
+    lots, phases = asyncio.run(run())
+    assert all(lot.force_close and lot.exit_reason == "liquidation" for lot in lots)
+    assert phases == [PositionManager.COOLDOWN] * 2
+    assert len(force_closes) == 2
+    assert normal_closes == []
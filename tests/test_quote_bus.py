@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import time
+import uuid
+from multiprocessing import shared_memory
+
+import pytest
+
+from quote_bus import QuoteBus, _SEQ, quote_channel
+
+CHANNEL = quote_channel("grvt", "BTC-USDT")
+
+
+@pytest.fixture
+def bus():
+    bus = QuoteBus.create(f"test_quotes_{uuid.uuid4().hex[:8]}", [CHANNEL, "paradex:BTC-USD-PERP"],
+                          capacity=4, depth=2)
+    yield bus
+    bus.close()
+
+
+def test_publish_and_latest(bus):
+    assert bus.latest(CHANNEL) is None
+
+    seq = bus.publish(CHANNEL, 100.0, 101.0, bids=[(100.0, 1.0), (99.0, 2.0), (98.0, 3.0)], asks=[(101.0, 0.5)])
+    quote = bus.latest(CHANNEL)
+
+    assert seq == 0
+    assert quote['seq'] == 0
+    assert (quote['bid'], quote['ask']) == (100.0, 101.0)
+    # 超出 depth 的档位被截断
+    assert quote['bids'] == [(100.0, 1.0), (99.0, 2.0)]
+    assert quote['asks'] == [(101.0, 0.5)]
+    assert bus.latest("paradex:BTC-USD-PERP") is None
+
+
+def test_missing_prices_round_trip_as_none(bus):
+    bus.publish(CHANNEL, None, 101.0)
+    quote = bus.latest(CHANNEL)
+    assert quote['bid'] is None
+    assert quote['ask'] == 101.0
+
+
+def test_reader_sees_published_quotes(bus):
+    bus.publish(CHANNEL, 100.0, 101.0)
+    # 同一进程内不用 attach：它会取消 resource_tracker 登记，创建方 unlink 时 tracker 报错
+    reader = QuoteBus(shared_memory.SharedMemory(name=bus.shm.name), owner=False)
+    try:
+        assert reader.channels.keys() == bus.channels.keys()
+        assert reader.latest(CHANNEL)['bid'] == 100.0
+    finally:
+        reader.close()
+
+
+def test_overwritten_entries_are_not_returned(bus):
+    for i in range(6):
+        bus.publish(CHANNEL, 100.0 + i, 101.0 + i)
+
+    assert bus.head(CHANNEL) == 6
+    assert bus.read(CHANNEL, 0) is None
+    assert bus.read(CHANNEL, 5)['bid'] == 105.0
+    assert [quote['seq'] for quote in bus.read_since(CHANNEL)] == [2, 3, 4, 5]
+    assert [quote['seq'] for quote in bus.read_since(CHANNEL, last_seq=3)] == [4, 5]
+
+
+def test_read_rejects_entry_being_written(bus):
+    bus.publish(CHANNEL, 100.0, 101.0)
+    offset = bus._entry_offset(CHANNEL, 0)
+
+    # 奇数 seq 表示写入方正在写这一条
+    _SEQ.pack_into(bus.buf, offset, 1)
+    assert bus.read(CHANNEL, 0, max_retries=5) is None
+
+    _SEQ.pack_into(bus.buf, offset, 2)
+    assert bus.read(CHANNEL, 0)['bid'] == 100.0
+
+
+def test_latest_respects_max_age(bus):
+    bus.publish(CHANNEL, 100.0, 101.0, ts=time.time() - 10)
+    assert bus.latest(CHANNEL, max_age=5) is None
+    assert bus.latest(CHANNEL, max_age=30)['bid'] == 100.0
+
+
+def test_rejects_foreign_memory():
+    shm = shared_memory.SharedMemory(name=f"test_foreign_{uuid.uuid4().hex[:8]}", create=True, size=64)
+    try:
+        with pytest.raises(ValueError):
+            QuoteBus(shm, owner=False)
+    finally:
+        shm.close()
+        shm.unlink()
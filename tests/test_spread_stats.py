@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import random
+import statistics
+
+import pytest
+
+from spread_stats import AdaptiveThresholds, SpreadStats
+
+
+def test_not_ready_until_min_samples():
+    stats = SpreadStats(min_samples=3)
+    stats.update(1.0)
+    stats.update(2.0)
+    assert not stats.is_ready
+    stats.update(3.0)
+    assert stats.is_ready
+
+
+def test_window_min_max_mean_and_percentile_match_brute_force():
+    rng = random.Random(7)
+    stats = SpreadStats(window=50)
+    values = []
+    for _ in range(300):
+        value = rng.uniform(-20, 20)
+        values.append(value)
+        stats.update(value)
+
+        window = values[-50:]
+        assert stats.min == min(window)
+        assert stats.max == max(window)
+        assert stats.window_mean == pytest.approx(statistics.fmean(window))
+
+    window = sorted(values[-50:])
+    assert stats.percentile(0) == window[0]
+    assert stats.percentile(100) == window[-1]
+    assert stats.percentile(50) == pytest.approx(statistics.median(window))
+
+
+def test_ewma_tracks_constant_series():
+    stats = SpreadStats(halflife=10)
+    for _ in range(100):
+        stats.update(5.0)
+    assert stats.mean == pytest.approx(5.0)
+    assert stats.std == pytest.approx(0.0)
+    # 标准差为 0 时没有 z-score
+    assert stats.zscore() is None
+
+
+def test_halflife_weights_recent_samples():
+    stats = SpreadStats(halflife=1)
+    stats.update(0.0)
+    stats.update(10.0)
+    # 半衰期 1 个样本：新样本权重为 0.5
+    assert stats.mean == pytest.approx(5.0)
+
+
+def test_zscore_sign():
+    stats = SpreadStats(halflife=20)
+    for i in range(100):
+        stats.update(1.0 if i % 2 else -1.0)
+    assert stats.zscore(5.0) > 0
+    assert stats.zscore(-5.0) < 0
+
+
+def test_empty_stats():
+    stats = SpreadStats()
+    assert stats.min is None
+    assert stats.max is None
+    assert stats.window_mean is None
+    assert stats.percentile(50) is None
+    assert stats.zscore() is None
+    assert stats.snapshot()['count'] == 0
+
+
+def alternating_stats(mean: float, amplitude: float, count: int = 200) -> SpreadStats:
+    """围绕 mean 上下交替的价差序列（σ 约等于 amplitude）"""
+    stats = SpreadStats(halflife=50, min_samples=30)
+    for i in range(count):
+        stats.update(mean + (amplitude if i % 2 else -amplitude))
+    return stats
+
+
+def test_thresholds_unchanged_before_stats_ready():
+    thresholds = AdaptiveThresholds(entry=10.0, exit=1.0)
+    assert not thresholds.update(SpreadStats(min_samples=30))
+    assert (thresholds.entry, thresholds.exit) == (10.0, 1.0)
+
+
+def test_entry_follows_mean_and_sigma_and_exit_is_a_band():
+    stats = alternating_stats(mean=4.0, amplitude=2.0)
+    thresholds = AdaptiveThresholds(entry_k=2.0, exit_k=0.5, min_entry=0.0, min_exit=0.0, hysteresis=0.0)
+
+    assert thresholds.update(stats)
+    assert thresholds.entry == pytest.approx(abs(stats.mean) + 2.0 * stats.std)
+    # 平仓价差带只取 σ 倍数，不含均值
+    assert thresholds.exit == pytest.approx(0.5 * stats.std)
+
+
+def test_thresholds_are_clamped():
+    thresholds = AdaptiveThresholds(min_entry=3.0, max_entry=5.0, min_exit=0.5, max_exit=1.0, hysteresis=0.0)
+    thresholds.update(alternating_stats(mean=0.0, amplitude=0.01))
+    assert thresholds.entry == 3.0
+    assert thresholds.exit == 0.5
+
+    thresholds.update(alternating_stats(mean=100.0, amplitude=50.0))
+    assert thresholds.entry == 5.0
+    assert thresholds.exit == 1.0
+
+
+def test_exit_band_capped_by_entry_ratio():
+    thresholds = AdaptiveThresholds(exit_k=10.0, max_exit=100.0, max_exit_ratio=0.5, hysteresis=0.0)
+    thresholds.update(alternating_stats(mean=0.0, amplitude=2.0))
+    assert thresholds.exit <= thresholds.entry * 0.5 + 1e-9
+
+
+def test_hysteresis_ignores_small_changes():
+    thresholds = AdaptiveThresholds(entry_k=2.0, min_entry=0.0, hysteresis=0.5, entry=10.0)
+    # 新的开仓阈值约为 11，相对变化 10% 小于 50%
+    thresholds.update(alternating_stats(mean=7.0, amplitude=2.0))
+    assert thresholds.entry == 10.0
+
+
+def test_within_exit_band():
+    stats = alternating_stats(mean=4.0, amplitude=2.0)
+    thresholds = AdaptiveThresholds(exit=0.5)
+
+    assert thresholds.within_exit_band(stats, stats.mean + 0.4)
+    assert thresholds.within_exit_band(stats, stats.mean - 0.4)
+    assert not thresholds.within_exit_band(stats, stats.mean + 0.6)
+    # 统计量未就绪时不判定为回归
+    assert not thresholds.within_exit_band(SpreadStats(), 0.0)
+
+
+def test_exit_spread_is_band_edge_in_spread_units():
+    stats = alternating_stats(mean=-4.0, amplitude=2.0)
+    thresholds = AdaptiveThresholds(exit=0.5)
+    assert thresholds.exit_spread(stats) == pytest.approx(abs(stats.mean) + 0.5)
+    assert thresholds.exit_spread(SpreadStats()) == 0.0
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+from venues import VenueRouter, best_pair
+
+
+def test_best_pair_picks_largest_executable_spread():
+    route = best_pair({
+        'grvt': (101.0, 101.2),
+        'paradex': (99.8, 100.0),
+        'other': (100.5, 100.7),
+    })
+    # 在 GRVT 按买一卖出、在 Paradex 按卖一买入
+    assert route['sell_venue'] == 'grvt'
+    assert route['buy_venue'] == 'paradex'
+    assert route['spread'] == pytest.approx(1.0)
+
+
+def test_best_pair_reverse_direction():
+    route = best_pair({'grvt': (99.0, 99.2), 'paradex': (100.0, 100.2)})
+    assert (route['sell_venue'], route['buy_venue']) == ('paradex', 'grvt')
+    assert (route['sell_price'], route['buy_price']) == (100.0, 99.2)
+
+
+def test_best_pair_returns_negative_spread_when_no_arbitrage():
+    route = best_pair({'grvt': (100.0, 100.2), 'paradex': (100.0, 100.2)})
+    assert route['spread'] == pytest.approx(-0.2)
+
+
+def test_best_pair_skips_missing_prices():
+    assert best_pair({'grvt': (None, 100.2), 'paradex': (None, 100.0)}) is None
+    assert best_pair({'grvt': (100.0, 100.2)}) is None
+
+    route = best_pair({'grvt': (None, 100.2), 'paradex': (101.0, None), 'other': (None, None)})
+    assert (route['sell_venue'], route['buy_venue']) == ('paradex', 'grvt')
+
+
+class FakeVenue:
+    venue = "fake"
+
+    def __init__(self, quote=None, error=None):
+        self.quote = quote
+        self.error = error
+
+    async def get_quote(self):
+        if self.error:
+            raise self.error
+        return self.quote
+
+
+def test_router_scan_tolerates_failing_venue():
+    router = VenueRouter({
+        'grvt': FakeVenue((101.0, 101.2)),
+        'paradex': FakeVenue((99.8, 100.0)),
+        'broken': FakeVenue(error=RuntimeError("page closed")),
+    })
+    route = asyncio.run(router.scan())
+
+    assert (route['sell_venue'], route['buy_venue']) == ('grvt', 'paradex')
+    assert route['quotes']['broken'] == (None, None)
+    assert router.last_best is route
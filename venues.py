@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+交易所适配器接口与多交易所路由
+GrvtTradingBot、ParadexTrader 都实现 VenueAdapter；VenueRouter 每个 tick 并行读取全部交易所的盘口，
+在所有交易所两两组合中找出可成交价差（一边的买一 - 另一边的卖一）最大的一对
+"""
+
+import asyncio
+import itertools
+import statistics
+import time
+from typing import Dict, List, Optional, Protocol, Tuple, runtime_checkable
+
+Level = Tuple[float, float]
+
+
+@runtime_checkable
+class VenueAdapter(Protocol):
+    """交易所适配器：对冲核心只通过这些方法读取报价、下单、撤单和查询持仓"""
+
+    venue: str
+
+    async def get_quote(self) -> Tuple[Optional[float], Optional[float]]:
+        """最优 (买价, 卖价)"""
+        ...
+
+    async def get_orderbook_depth(self, levels: int = 10) -> Optional[Tuple[List[Level], List[Level]]]:
+        """订单簿深度 (bids, asks)"""
+        ...
+
+    async def place_limit_order(self, side: str, size: float, price: float) -> bool:
+        ...
+
+    async def place_market_order(self, side: str, size: float) -> bool:
+        ...
+
+    async def cancel_orders(self, symbol: Optional[str] = None) -> bool:
+        ...
+
+    async def get_net_positions(self) -> Optional[Dict[str, float]]:
+        """{品种: 带符号的持仓数量}"""
+        ...
+
+    async def get_total_pnl(self, symbol: Optional[str] = None) -> Optional[float]:
+        ...
+
+
+def best_pair(quotes: Dict[str, Tuple[Optional[float], Optional[float]]]) -> Optional[Dict]:
+    """
+    在所有交易所两两组合中找出可成交价差最大的一对
+
+    Args:
+        quotes: {交易所名: (买一, 卖一)}，缺失的价格为 None
+
+    Returns:
+        dict: {sell_venue, buy_venue, sell_price, buy_price, spread}，
+              在 sell_venue 按买一卖出、在 buy_venue 按卖一买入，spread = sell_price - buy_price；
+              可用报价不足两个交易所时返回 None
+    """
+    best = None
+    for sell_venue, buy_venue in itertools.permutations(quotes, 2):
+        bid = quotes[sell_venue][0]
+        ask = quotes[buy_venue][1]
+        if bid is None or ask is None:
+            continue
+        spread = bid - ask
+        if best is None or spread > best['spread']:
+            best = {
+                'sell_venue': sell_venue,
+                'buy_venue': buy_venue,
+                'sell_price': bid,
+                'buy_price': ask,
+                'spread': spread,
+            }
+    return best
+
+
+class VenueRouter:
+    """在 N 个交易所之间寻找可成交价差最大的交易所对"""
+
+    def __init__(self, venues: Dict[str, VenueAdapter]):
+        """
+        Args:
+            venues: {交易所名: 适配器}
+        """
+        self.venues = venues
+        self.last_quotes: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+        self.last_best: Optional[Dict] = None
+
+    async def _quote(self, name: str) -> Tuple[Optional[float], Optional[float]]:
+        try:
+            return await self.venues[name].get_quote()
+        except Exception as e:
+            print(f"❌ 读取 {name} 报价失败: {e}")
+            return None, None
+
+    async def scan(self) -> Optional[Dict]:
+        """
+        并行读取全部交易所的盘口并选出最优交易所对
+
+        Returns:
+            dict: best_pair 的结果，附带 quotes；可用报价不足时返回 None
+        """
+        names = list(self.venues)
+        quotes = await asyncio.gather(*(self._quote(name) for name in names))
+        self.last_quotes = dict(zip(names, quotes))
+
+        best = best_pair(self.last_quotes)
+        if best is not None:
+            best['quotes'] = self.last_quotes
+        self.last_best = best
+        return best
+
+
+async def benchmark_venue(adapter: VenueAdapter, rounds: int = 20) -> Dict[str, Dict[str, float]]:
+    """
+    测量一个交易所热路径（报价、深度、持仓）每次调用的耗时，只读不下单
+
+    Args:
+        adapter: 交易所适配器
+        rounds: 每项调用次数
+
+    Returns:
+        dict: {调用名: {median_ms, p95_ms, max_ms, failures}}
+    """
+    calls = {
+        'get_quote': adapter.get_quote,
+        'get_orderbook_depth': adapter.get_orderbook_depth,
+        'get_net_positions': adapter.get_net_positions,
+    }
+
+    results = {}
+    for name, call in calls.items():
+        timings = []
+        failures = 0
+        for _ in range(rounds):
+            started = time.perf_counter()
+            try:
+                if await call() is None:
+                    failures += 1
+            except Exception:
+                failures += 1
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        results[name] = {
+            'median_ms': statistics.median(timings),
+            'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+            'max_ms': timings[-1],
+            'failures': failures,
+        }
+    return results
+
+
+async def benchmark_venues(venues: Dict[str, VenueAdapter], rounds: int = 20) -> Dict[str, Dict]:
+    """依次测量每个交易所的热路径并打印对比表（依次进行，避免互相抢占 CPU）"""
+    results = {}
+    for name, adapter in venues.items():
+        results[name] = await benchmark_venue(adapter, rounds)
+
+    print("\n" + "=" * 60)
+    print(f"交易所热路径耗时（每项 {rounds} 次）")
+    print("=" * 60)
+    for name, calls in results.items():
+        for call, stats in calls.items():
+            print(f"  {name:<10} {call:<22} 中位 {stats['median_ms']:>7.1f}ms  "
+                  f"p95 {stats['p95_ms']:>7.1f}ms  最大 {stats['max_ms']:>7.1f}ms  失败 {stats['failures']}")
+    print("=" * 60)
+    return results